@@ -209,7 +209,9 @@ void RestoreTensor(OpKernelContext* context,
         file_pattern, open_func, preferred_shard));
     reader = allocated_reader.get();
   }
-  OP_REQUIRES_OK(context, CHECK_NOTNULL(reader)->status());
+  // A cached reader may have been created for another shard.
+  CHECK_NOTNULL(reader)->LoadPreferredShard(preferred_shard);
+  OP_REQUIRES_OK(context, reader->status());
 
   // Get the shape and type from the save file.
   DataType type;
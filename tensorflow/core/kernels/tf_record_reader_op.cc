@@ -5,6 +5,7 @@
 #include "tensorflow/core/kernels/reader_base.h"
 #include "tensorflow/core/lib/core/errors.h"
 #include "tensorflow/core/lib/io/record_reader.h"
+#include "tensorflow/core/lib/io/zlib_file.h"
 #include "tensorflow/core/lib/strings/strcat.h"
 #include "tensorflow/core/public/env.h"
 
@@ -12,15 +13,26 @@ namespace tensorflow {
 
 class TFRecordReader : public ReaderBase {
  public:
-  TFRecordReader(const string& node_name, Env* env)
+  TFRecordReader(const string& node_name, const string& compression_type,
+                 Env* env)
       : ReaderBase(strings::StrCat("TFRecordReader '", node_name, "'")),
         env_(env),
+        compression_type_(compression_type),
         offset_(0) {}
 
   Status OnWorkStartedLocked() override {
     offset_ = 0;
     RandomAccessFile* file = nullptr;
     TF_RETURN_IF_ERROR(env_->NewRandomAccessFile(current_work(), &file));
+    if (!compression_type_.empty()) {
+      io::ZlibFormat format;
+      Status s = io::ParseZlibFormat(compression_type_, &format);
+      if (!s.ok()) {
+        delete file;
+        return s;
+      }
+      file = new io::ZlibInputFile(file, format);
+    }
     file_.reset(file);
     reader_.reset(new io::RecordReader(file));
     return Status::OK();
@@ -56,6 +68,7 @@ class TFRecordReader : public ReaderBase {
 
  private:
   Env* const env_;
+  const string compression_type_;
   uint64 offset_;
   std::unique_ptr<RandomAccessFile> file_;
   std::unique_ptr<io::RecordReader> reader_;
@@ -66,7 +79,16 @@ class TFRecordReaderOp : public ReaderOpKernel {
   explicit TFRecordReaderOp(OpKernelConstruction* context)
       : ReaderOpKernel(context) {
     Env* env = context->env();
-    SetReaderFactory([this, env]() { return new TFRecordReader(name(), env); });
+    string compression_type;
+    OP_REQUIRES_OK(context,
+                   context->GetAttr("compression_type", &compression_type));
+    if (!compression_type.empty()) {
+      io::ZlibFormat format;
+      OP_REQUIRES_OK(context, io::ParseZlibFormat(compression_type, &format));
+    }
+    SetReaderFactory([this, compression_type, env]() {
+      return new TFRecordReader(name(), compression_type, env);
+    });
   }
 };
 
@@ -0,0 +1,245 @@
+#include "tensorflow/core/lib/io/zlib_file.h"
+
+#include <string.h>
+#include <zlib.h>
+#include <algorithm>
+
+#include "tensorflow/core/lib/core/errors.h"
+
+namespace tensorflow {
+namespace io {
+
+namespace {
+
+// The number of compressed bytes that ZlibInputFile reads at a time.
+const size_t kInputChunkSize = 256 << 10;
+
+// The number of bytes that are inflated or deflated at a time.
+const size_t kOutputChunkSize = 256 << 10;
+
+int WindowBits(ZlibFormat format) {
+  // zlib reads and writes a gzip header and trailer when 16 is added to the
+  // window bits.
+  return format == ZlibFormat::kGzip ? MAX_WBITS + 16 : MAX_WBITS;
+}
+
+Status ZlibError(const char* operation, const z_stream& stream, int code) {
+  return errors::DataLoss(operation, " failed with error ", code, ": ",
+                          stream.msg == nullptr ? "" : stream.msg);
+}
+
+}  // namespace
+
+Status ParseZlibFormat(const string& compression_type, ZlibFormat* format) {
+  if (compression_type == "ZLIB") {
+    *format = ZlibFormat::kZlib;
+  } else if (compression_type == "GZIP") {
+    *format = ZlibFormat::kGzip;
+  } else {
+    return errors::InvalidArgument("Unsupported compression type \"",
+                                   compression_type,
+                                   "\", expected \"ZLIB\" or \"GZIP\"");
+  }
+  return Status::OK();
+}
+
+struct ZlibInputFile::State {
+  z_stream stream;
+  Status init_status;
+  string input;
+  // The number of bytes of the file that were passed to inflate().
+  uint64 input_offset = 0;
+  // The inflated bytes that have not been discarded, and the uncompressed
+  // offset of the first of them.
+  string output;
+  uint64 output_offset = 0;
+  // Whether the end of the compressed stream was reached.
+  bool finished = false;
+};
+
+ZlibInputFile::ZlibInputFile(RandomAccessFile* file, ZlibFormat format)
+    : file_(file), format_(format), state_(new State) {
+  memset(&state_->stream, 0, sizeof(state_->stream));
+  const int code = inflateInit2(&state_->stream, WindowBits(format_));
+  if (code != Z_OK) {
+    state_->init_status = ZlibError("inflateInit2", state_->stream, code);
+  }
+  state_->input.resize(kInputChunkSize);
+}
+
+ZlibInputFile::~ZlibInputFile() {
+  if (state_->init_status.ok()) {
+    inflateEnd(&state_->stream);
+  }
+}
+
+Status ZlibInputFile::Read(uint64 offset, size_t n, StringPiece* result,
+                           char* scratch) const {
+  State* state = state_.get();
+  if (!state->init_status.ok()) {
+    return state->init_status;
+  }
+  z_stream* stream = &state->stream;
+  if (offset < state->output_offset) {
+    // The data was already discarded, so inflate the file from its start.
+    const int code = inflateReset(stream);
+    if (code != Z_OK) {
+      return ZlibError("inflateReset", *stream, code);
+    }
+    stream->avail_in = 0;
+    state->input_offset = 0;
+    state->output.clear();
+    state->output_offset = 0;
+    state->finished = false;
+  }
+  while (true) {
+    // Discard the output before "offset", which will not be read again.
+    const size_t discarded =
+        std::min<uint64>(offset - state->output_offset, state->output.size());
+    state->output.erase(0, discarded);
+    state->output_offset += discarded;
+    if (state->output_offset + state->output.size() >= offset + n ||
+        state->finished) {
+      break;
+    }
+    if (stream->avail_in == 0) {
+      StringPiece data;
+      Status s = file_->Read(state->input_offset, kInputChunkSize, &data,
+                             &state->input[0]);
+      if (!s.ok() && !errors::IsOutOfRange(s)) {
+        return s;
+      }
+      if (data.empty()) {
+        // The rest of the file has not been written yet.
+        break;
+      }
+      if (data.data() != state->input.data()) {
+        memmove(&state->input[0], data.data(), data.size());
+      }
+      stream->next_in = reinterpret_cast<Bytef*>(&state->input[0]);
+      stream->avail_in = data.size();
+      state->input_offset += data.size();
+    }
+    const size_t size = state->output.size();
+    state->output.resize(size + kOutputChunkSize);
+    stream->next_out = reinterpret_cast<Bytef*>(&state->output[size]);
+    stream->avail_out = kOutputChunkSize;
+    const int code = inflate(stream, Z_NO_FLUSH);
+    state->output.resize(size + kOutputChunkSize - stream->avail_out);
+    if (code == Z_STREAM_END) {
+      state->finished = true;
+    } else if (code != Z_OK && code != Z_BUF_ERROR) {
+      return ZlibError("inflate", *stream, code);
+    }
+  }
+  const uint64 start = offset - state->output_offset;
+  const size_t available =
+      start < state->output.size()
+          ? std::min<uint64>(n, state->output.size() - start)
+          : 0;
+  memcpy(scratch, state->output.data() + start, available);
+  *result = StringPiece(scratch, available);
+  if (available < n) {
+    return errors::OutOfRange("Read less bytes than requested");
+  }
+  return Status::OK();
+}
+
+struct ZlibOutputFile::State {
+  z_stream stream;
+  Status init_status;
+  string output;
+  // Whether data was appended since the last flush.
+  bool pending = false;
+  bool closed = false;
+};
+
+ZlibOutputFile::ZlibOutputFile(WritableFile* file, ZlibFormat format)
+    : file_(file), state_(new State) {
+  memset(&state_->stream, 0, sizeof(state_->stream));
+  const int code =
+      deflateInit2(&state_->stream, Z_DEFAULT_COMPRESSION, Z_DEFLATED,
+                   WindowBits(format), 8, Z_DEFAULT_STRATEGY);
+  if (code != Z_OK) {
+    state_->init_status = ZlibError("deflateInit2", state_->stream, code);
+  }
+  state_->output.resize(kOutputChunkSize);
+}
+
+ZlibOutputFile::~ZlibOutputFile() {
+  if (!state_->closed) {
+    Close();
+  }
+}
+
+Status ZlibOutputFile::Deflate(int flush) {
+  z_stream* stream = &state_->stream;
+  do {
+    stream->next_out = reinterpret_cast<Bytef*>(&state_->output[0]);
+    stream->avail_out = kOutputChunkSize;
+    const int code = deflate(stream, flush);
+    if (code != Z_OK && code != Z_STREAM_END && code != Z_BUF_ERROR) {
+      return ZlibError("deflate", *stream, code);
+    }
+    const size_t size = kOutputChunkSize - stream->avail_out;
+    if (size > 0) {
+      TF_RETURN_IF_ERROR(
+          file_->Append(StringPiece(state_->output.data(), size)));
+    }
+  } while (stream->avail_out == 0);
+  return Status::OK();
+}
+
+Status ZlibOutputFile::Append(const StringPiece& data) {
+  if (!state_->init_status.ok()) {
+    return state_->init_status;
+  }
+  if (state_->closed) {
+    return errors::FailedPrecondition("Append to a closed file");
+  }
+  if (data.empty()) {
+    return Status::OK();
+  }
+  z_stream* stream = &state_->stream;
+  stream->next_in =
+      reinterpret_cast<Bytef*>(const_cast<char*>(data.data()));
+  stream->avail_in = data.size();
+  state_->pending = true;
+  return Deflate(Z_NO_FLUSH);
+}
+
+Status ZlibOutputFile::Flush() {
+  if (!state_->init_status.ok()) {
+    return state_->init_status;
+  }
+  if (state_->closed) {
+    return errors::FailedPrecondition("Flush of a closed file");
+  }
+  if (state_->pending) {
+    TF_RETURN_IF_ERROR(Deflate(Z_SYNC_FLUSH));
+    state_->pending = false;
+  }
+  return file_->Flush();
+}
+
+Status ZlibOutputFile::Sync() {
+  TF_RETURN_IF_ERROR(Flush());
+  return file_->Sync();
+}
+
+Status ZlibOutputFile::Close() {
+  if (state_->closed) {
+    return Status::OK();
+  }
+  state_->closed = true;
+  Status s = state_->init_status;
+  if (s.ok()) {
+    s = Deflate(Z_FINISH);
+    deflateEnd(&state_->stream);
+  }
+  s.Update(file_->Close());
+  return s;
+}
+
+}  // namespace io
+}  // namespace tensorflow
@@ -0,0 +1,83 @@
+#ifndef TENSORFLOW_LIB_IO_ZLIB_FILE_H_
+#define TENSORFLOW_LIB_IO_ZLIB_FILE_H_
+
+#include <memory>
+
+#include "tensorflow/core/lib/core/stringpiece.h"
+#include "tensorflow/core/platform/port.h"
+#include "tensorflow/core/public/env.h"
+#include "tensorflow/core/public/status.h"
+
+namespace tensorflow {
+namespace io {
+
+// The formats of the files that ZlibInputFile and ZlibOutputFile read and
+// write.
+enum class ZlibFormat {
+  kZlib,  // A zlib stream (RFC 1950)
+  kGzip,  // A gzip file (RFC 1952)
+};
+
+// Sets "*format" to the format that "compression_type" names, which must be
+// "ZLIB" or "GZIP".
+Status ParseZlibFormat(const string& compression_type, ZlibFormat* format);
+
+// A RandomAccessFile that reads the uncompressed contents of a compressed
+// file, such as one written by ZlibOutputFile.  Offsets are offsets in the
+// uncompressed contents.
+//
+// Reading is only efficient if each read starts at or after the start of the
+// previous one, as it does when records are read in order: reading earlier
+// data inflates the file again from its start.  The file may be appended to
+// while it is read.
+//
+// Unlike other RandomAccessFiles, a ZlibInputFile is not safe for concurrent
+// use by multiple threads.
+class ZlibInputFile : public RandomAccessFile {
+ public:
+  // Takes ownership of "file".
+  ZlibInputFile(RandomAccessFile* file, ZlibFormat format);
+  ~ZlibInputFile() override;
+
+  Status Read(uint64 offset, size_t n, StringPiece* result,
+              char* scratch) const override;
+
+ private:
+  struct State;
+
+  std::unique_ptr<RandomAccessFile> file_;
+  const ZlibFormat format_;
+  std::unique_ptr<State> state_;
+
+  TF_DISALLOW_COPY_AND_ASSIGN(ZlibInputFile);
+};
+
+// A WritableFile that compresses the data appended to it, and writes it to
+// another file.  Flush() makes all the data appended so far readable.
+class ZlibOutputFile : public WritableFile {
+ public:
+  // Takes ownership of "file".
+  ZlibOutputFile(WritableFile* file, ZlibFormat format);
+  ~ZlibOutputFile() override;
+
+  Status Append(const StringPiece& data) override;
+  Status Close() override;
+  Status Flush() override;
+  Status Sync() override;
+
+ private:
+  struct State;
+
+  // Deflates the pending input with "flush", and appends the output to file_.
+  Status Deflate(int flush);
+
+  std::unique_ptr<WritableFile> file_;
+  std::unique_ptr<State> state_;
+
+  TF_DISALLOW_COPY_AND_ASSIGN(ZlibOutputFile);
+};
+
+}  // namespace io
+}  // namespace tensorflow
+
+#endif  // TENSORFLOW_LIB_IO_ZLIB_FILE_H_
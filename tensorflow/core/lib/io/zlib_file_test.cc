@@ -0,0 +1,131 @@
+#include "tensorflow/core/lib/io/zlib_file.h"
+#include <gtest/gtest.h>
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/lib/core/status_test_util.h"
+#include "tensorflow/core/lib/io/record_reader.h"
+#include "tensorflow/core/lib/io/record_writer.h"
+#include "tensorflow/core/public/env.h"
+
+namespace tensorflow {
+namespace io {
+
+namespace {
+
+// Appends to a string that outlives the file.
+class StringDest : public WritableFile {
+ public:
+  explicit StringDest(string* contents) : contents_(contents) {}
+
+  Status Close() override { return Status::OK(); }
+  Status Flush() override { return Status::OK(); }
+  Status Sync() override { return Status::OK(); }
+  Status Append(const StringPiece& slice) override {
+    contents_->append(slice.data(), slice.size());
+    return Status::OK();
+  }
+
+ private:
+  string* contents_;
+};
+
+// Reads a string that may still be appended to.
+class StringSource : public RandomAccessFile {
+ public:
+  explicit StringSource(const string* contents) : contents_(contents) {}
+
+  Status Read(uint64 offset, size_t n, StringPiece* result,
+              char* scratch) const override {
+    if (offset >= contents_->size()) {
+      *result = StringPiece();
+      return errors::OutOfRange("end of file");
+    }
+    n = std::min<uint64>(n, contents_->size() - offset);
+    *result = StringPiece(contents_->data() + offset, n);
+    return Status::OK();
+  }
+
+ private:
+  const string* contents_;
+};
+
+string Record(int i) { return string(i % 100, 'a' + i % 26); }
+
+}  // namespace
+
+class ZlibFileTest : public testing::TestWithParam<ZlibFormat> {};
+
+TEST_P(ZlibFileTest, RoundTrip) {
+  string contents;
+  {
+    ZlibOutputFile file(new StringDest(&contents), GetParam());
+    RecordWriter writer(&file);
+    for (int i = 0; i < 10000; ++i) {
+      EXPECT_OK(writer.WriteRecord(Record(i)));
+    }
+    EXPECT_OK(file.Close());
+  }
+  ZlibInputFile file(new StringSource(&contents), GetParam());
+  RecordReader reader(&file);
+  uint64 offset = 0;
+  string record;
+  for (int i = 0; i < 10000; ++i) {
+    EXPECT_OK(reader.ReadRecord(&offset, &record));
+    EXPECT_EQ(Record(i), record);
+  }
+  EXPECT_TRUE(errors::IsOutOfRange(reader.ReadRecord(&offset, &record)));
+  // Reading an earlier record inflates the file again.
+  uint64 first_offset = 0;
+  EXPECT_OK(reader.ReadRecord(&first_offset, &record));
+  EXPECT_EQ(Record(0), record);
+}
+
+TEST_P(ZlibFileTest, ReadsFlushedDataOfGrowingFile) {
+  string contents;
+  ZlibOutputFile output(new StringDest(&contents), GetParam());
+  ZlibInputFile input(new StringSource(&contents), GetParam());
+  char scratch[10];
+  StringPiece result;
+  EXPECT_OK(output.Append("hello"));
+  EXPECT_OK(output.Flush());
+  EXPECT_OK(input.Read(0, 5, &result, scratch));
+  EXPECT_EQ("hello", result);
+  EXPECT_TRUE(errors::IsOutOfRange(input.Read(5, 5, &result, scratch)));
+  EXPECT_EQ("", result);
+  EXPECT_OK(output.Append("world"));
+  EXPECT_OK(output.Close());
+  EXPECT_OK(input.Read(5, 5, &result, scratch));
+  EXPECT_EQ("world", result);
+}
+
+INSTANTIATE_TEST_CASE_P(Formats, ZlibFileTest,
+                        testing::Values(ZlibFormat::kZlib, ZlibFormat::kGzip));
+
+TEST(ZlibFile, WritesGzipHeader) {
+  string contents;
+  ZlibOutputFile file(new StringDest(&contents), ZlibFormat::kGzip);
+  EXPECT_OK(file.Append("data"));
+  EXPECT_OK(file.Close());
+  ASSERT_GE(contents.size(), 2);
+  EXPECT_EQ('\x1f', contents[0]);
+  EXPECT_EQ('\x8b', contents[1]);
+}
+
+TEST(ZlibFile, CorruptedData) {
+  string contents(100, 'x');
+  ZlibInputFile file(new StringSource(&contents), ZlibFormat::kZlib);
+  char scratch[10];
+  StringPiece result;
+  EXPECT_TRUE(errors::IsDataLoss(file.Read(0, 10, &result, scratch)));
+}
+
+TEST(ZlibFile, ParseZlibFormat) {
+  ZlibFormat format;
+  EXPECT_OK(ParseZlibFormat("ZLIB", &format));
+  EXPECT_EQ(ZlibFormat::kZlib, format);
+  EXPECT_OK(ParseZlibFormat("GZIP", &format));
+  EXPECT_EQ(ZlibFormat::kGzip, format);
+  EXPECT_TRUE(errors::IsInvalidArgument(ParseZlibFormat("zip", &format)));
+}
+
+}  // namespace io
+}  // namespace tensorflow
@@ -1,6 +1,9 @@
 #include "tensorflow/core/util/tensor_slice_reader.h"
 
+#include <algorithm>
+
 #include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/lib/core/threadpool.h"
 #include "tensorflow/core/lib/gtl/stl_util.h"
 #include "tensorflow/core/lib/io/iterator.h"
 #include "tensorflow/core/lib/io/match.h"
@@ -19,6 +22,10 @@ namespace checkpoint {
 TensorSliceReader::Table::~Table() {}
 
 namespace {
+
+// The maximum number of files whose meta data LoadAllShards() reads at a time.
+const int kMaxConcurrentShardLoads = 8;
+
 class TensorSliceReaderTable : public TensorSliceReader::Table {
  public:
   explicit TensorSliceReaderTable(RandomAccessFile* f, table::Table* t)
@@ -119,43 +126,100 @@ void TensorSliceReader::LoadShard(int shard) const {
   if (sss_[shard] || !status_.ok()) {
     return;  // Already loaded, or invalid.
   }
-  string value;
+  Table* table = nullptr;
   SavedTensorSlices sts;
-  const string fname = fnames_[shard];
+  Status s = ReadShard(shard, &table, &sts);
+  AddShard(shard, table, sts, s);
+}
+
+Status TensorSliceReader::ReadShard(int shard, Table** table,
+                                    SavedTensorSlices* sts) const {
+  const string& fname = fnames_[shard];
   VLOG(1) << "Reading meta data from file " << fname << "...";
-  Table* table;
-  Status s = open_function_(fname, &table);
+  *table = nullptr;
+  Status s = open_function_(fname, table);
   if (!s.ok()) {
-    status_ = errors::DataLoss("Unable to open table file ", fname, ": ",
-                               s.ToString());
-    return;
+    return errors::DataLoss("Unable to open table file ", fname, ": ",
+                            s.ToString());
   }
-  sss_[shard].reset(table);
-  if (!(table->Get(kSavedTensorSlicesKey, &value) &&
-        ParseProtoUnlimited(&sts, value))) {
-    status_ = errors::Internal(
+  string value;
+  if (!((*table)->Get(kSavedTensorSlicesKey, &value) &&
+        ParseProtoUnlimited(sts, value))) {
+    return errors::Internal(
         "Failed to find the saved tensor slices at the beginning of the "
         "checkpoint file: ",
         fname);
+  }
+  return Status::OK();
+}
+
+void TensorSliceReader::AddShard(int shard, Table* table,
+                                 const SavedTensorSlices& sts,
+                                 const Status& s) const {
+  sss_[shard].reset(table);
+  if (!s.ok()) {
+    status_ = s;
     return;
   }
   for (const SavedSliceMeta& ssm : sts.meta().tensor()) {
     TensorShape ssm_shape(ssm.shape());
     for (const TensorSliceProto& tsp : ssm.slice()) {
       TensorSlice ss_slice(tsp);
-      RegisterTensorSlice(ssm.name(), ssm_shape, ssm.type(), fname, ss_slice);
+      RegisterTensorSlice(ssm.name(), ssm_shape, ssm.type(), fnames_[shard],
+                          ss_slice);
     }
   }
 }
 
 void TensorSliceReader::LoadAllShards() const {
   VLOG(1) << "Loading all shards for " << filepattern_;
-  for (size_t i = 0; i < fnames_.size() && status_.ok(); ++i) {
-    LoadShard(i);
+  std::vector<int> shards;
+  for (size_t i = 0; i < fnames_.size(); ++i) {
+    if (!sss_[i]) {
+      shards.push_back(i);
+    }
+  }
+  if (shards.size() > 1 && status_.ok()) {
+    // Reading the meta data of a file is mostly waiting for it to be read,
+    // so read several files at a time, and then add them in order.
+    std::vector<Table*> tables(shards.size(), nullptr);
+    std::vector<SavedTensorSlices> metas(shards.size());
+    std::vector<Status> statuses(shards.size());
+    {
+      thread::ThreadPool pool(
+          Env::Default(), "load_shards",
+          std::min<int>(shards.size(), kMaxConcurrentShardLoads));
+      for (size_t i = 0; i < shards.size(); ++i) {
+        pool.Schedule([this, i, &shards, &tables, &metas, &statuses]() {
+          statuses[i] = ReadShard(shards[i], &tables[i], &metas[i]);
+        });
+      }
+      // The destructor of the pool waits for the reads to finish.
+    }
+    for (size_t i = 0; i < shards.size(); ++i) {
+      if (status_.ok()) {
+        AddShard(shards[i], tables[i], metas[i], statuses[i]);
+      } else {
+        delete tables[i];
+      }
+    }
+  } else {
+    for (size_t i = 0; i < shards.size() && status_.ok(); ++i) {
+      LoadShard(shards[i]);
+    }
   }
   all_shards_loaded_ = true;
 }
 
+void TensorSliceReader::LoadPreferredShard(int shard) const {
+  // kLoadAllShards is negative.
+  if (shard < 0 || static_cast<size_t>(shard) >= fnames_.size()) {
+    return;
+  }
+  mutex_lock l(mu_);
+  LoadShard(shard);
+}
+
 const TensorSliceSet* TensorSliceReader::FindTensorSlice(
     const string& name, const TensorSlice& slice,
     std::vector<std::pair<TensorSlice, string>>* details) const {
@@ -64,6 +64,13 @@ class TensorSliceReader {
   // of the tensor.
   bool HasTensor(const string& name, TensorShape* shape, DataType* type) const;
 
+  // Loads the meta data of the file at index "shard" in the list of matched
+  // files, if it is not loaded yet, so that the tensors that it contains are
+  // found without loading the other files.  Does nothing if "shard" is
+  // kLoadAllShards or out of range.  Readers are shared by the restore ops
+  // of a step, each of which can prefer a different shard.
+  void LoadPreferredShard(int shard) const;
+
   // Checks if the reader contains all the data about a tensor slice, and if
   // yes, copies the data of the slice to "data". The caller needs to make sure
   // that "data" points to a buffer that holds enough data.
@@ -81,7 +88,16 @@ class TensorSliceReader {
   friend class TensorSliceWriteTestHelper;
 
   void LoadShard(int shard) const;
+  // Loads the shards that are not loaded yet, reading several of them at a
+  // time.
   void LoadAllShards() const;
+  // Opens the file of "shard" and reads its meta data, without changing the
+  // state of the reader, so that it can run concurrently for several shards.
+  // "*table" may be set even if this fails.
+  Status ReadShard(int shard, Table** table, SavedTensorSlices* sts) const;
+  // Adds the shard read by ReadShard() with status "s" to the reader.
+  void AddShard(int shard, Table* table, const SavedTensorSlices& sts,
+                const Status& s) const;
   void RegisterTensorSlice(const string& name, const TensorShape& shape,
                            DataType type, const string& tag,
                            const TensorSlice& slice) const;
@@ -1,5 +1,7 @@
 #include "tensorflow/core/util/tensor_slice_reader.h"
 
+#include <atomic>
+
 #include "tensorflow/core/framework/types.h"
 #include "tensorflow/core/lib/core/status_test_util.h"
 #include "tensorflow/core/lib/core/stringpiece.h"
@@ -157,6 +159,55 @@ TEST(TensorSliceReaderTest, SimpleFloat) {
   SimpleFloatHelper(CreateTableTensorSliceBuilder, OpenTableTensorSliceReader);
 }
 
+TEST(TensorSliceReaderTest, LoadsPreferredShards) {
+  const string fname_base =
+      io::JoinPath(testing::TmpDir(), "preferred_shards_checkpoint");
+  const int kNumFiles = 10;
+  // File #i contains the tensor "ti", whose only value is i.
+  for (int i = 0; i < kNumFiles; ++i) {
+    TensorSliceWriter writer(strings::StrCat(fname_base, "_", i),
+                             CreateTableTensorSliceBuilder);
+    const float data[] = {static_cast<float>(i)};
+    TF_CHECK_OK(writer.Add(strings::StrCat("t", i), TensorShape({1}),
+                           TensorSlice::ParseOrDie("-"), data));
+    TF_CHECK_OK(writer.Finish());
+  }
+
+  std::atomic<int> num_opened(0);
+  auto open_function = [&num_opened](const string& fname,
+                                     TensorSliceReader::Table** table) {
+    ++num_opened;
+    return OpenTableTensorSliceReader(fname, table);
+  };
+  TensorSliceReader reader(strings::StrCat(fname_base, "_*"), open_function,
+                           3);
+  EXPECT_OK(reader.status());
+  EXPECT_EQ(kNumFiles, reader.num_files());
+  EXPECT_EQ(1, num_opened);
+  EXPECT_EQ(1, reader.Tensors().size());
+
+  // Loading a shard only opens its file, once.
+  reader.LoadPreferredShard(3);
+  reader.LoadPreferredShard(5);
+  reader.LoadPreferredShard(5);
+  reader.LoadPreferredShard(kNumFiles);
+  reader.LoadPreferredShard(TensorSliceReader::kLoadAllShards);
+  EXPECT_EQ(2, num_opened);
+  EXPECT_EQ(2, reader.Tensors().size());
+
+  // Looking up a missing tensor loads all the other shards.
+  EXPECT_FALSE(reader.HasTensor("missing", nullptr, nullptr));
+  EXPECT_OK(reader.status());
+  EXPECT_EQ(kNumFiles, num_opened);
+  EXPECT_EQ(kNumFiles, reader.Tensors().size());
+  for (int i = 0; i < kNumFiles; ++i) {
+    float result;
+    EXPECT_TRUE(reader.CopySliceData(strings::StrCat("t", i),
+                                     TensorSlice::ParseOrDie("-"), &result));
+    EXPECT_EQ(i, result);
+  }
+}
+
 template <typename T, typename U>
 void SimpleIntXHelper(TensorSliceWriter::CreateBuilderFunction create_function,
                       TensorSliceReader::OpenTableFunction open_function,
@@ -0,0 +1,74 @@
+"""Benchmark for the client memory used by the PTB model graph.
+
+Builds the training graph of the PTB LSTM model in ptb_word_lm.py, and
+reports the number of operations and tensors in the graph, and the number
+of bytes per operation used by:
+
+* the Python objects that represent the operations and their output
+  tensors (the instances, their instance dictionaries, if any, and the
+  lists that they own), not counting the NodeDef protos; and
+* the whole process, measured as the growth in its maximum resident set
+  size while building the graph.
+
+To run:
+  bazel run -c opt tensorflow/models/rnn/ptb:ptb_graph_memory_benchmark -- \
+    --model=medium
+"""
+
+import resource
+import sys
+import time
+
+import tensorflow.python.platform
+
+import tensorflow as tf
+
+from tensorflow.models.rnn.ptb import ptb_word_lm
+
+FLAGS = tf.flags.FLAGS
+
+
+def _object_bytes(obj):
+  """Returns the bytes used by `obj` and by the lists that it owns."""
+  size = sys.getsizeof(obj)
+  if hasattr(obj, "__dict__"):
+    size += sys.getsizeof(obj.__dict__)
+    attrs = obj.__dict__.values()
+  else:
+    attrs = [getattr(obj, name, None) for name in type(obj).__slots__]
+  size += sum(sys.getsizeof(attr) for attr in attrs if isinstance(attr, list))
+  return size
+
+
+def _operation_bytes(op):
+  """Returns the bytes used by `op` and by its output tensors."""
+  return _object_bytes(op) + sum(_object_bytes(t) for t in op.outputs)
+
+
+def main(unused_args):
+  config = ptb_word_lm.get_config()
+  start_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  start_time = time.time()
+  with tf.Graph().as_default() as graph:
+    initializer = tf.random_uniform_initializer(-config.init_scale,
+                                                config.init_scale)
+    with tf.variable_scope("model", initializer=initializer):
+      ptb_word_lm.PTBModel(is_training=True, config=config)
+  duration = time.time() - start_time
+  rss_bytes = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss -
+               start_rss_kb) * 1024
+
+  ops = graph.get_operations()
+  num_tensors = sum(len(op.outputs) for op in ops)
+  object_bytes = sum(_operation_bytes(op) for op in ops)
+  print "Model: %s" % FLAGS.model
+  print "Built %d ops and %d tensors in %.2f sec" % (len(ops), num_tensors,
+                                                    duration)
+  print "Operation and Tensor objects: %.1f bytes/op" % (
+      float(object_bytes) / len(ops))
+  print "Process max RSS growth: %.1f bytes/op" % (
+      float(rss_bytes) / len(ops))
+
+
+if __name__ == "__main__":
+  tf.app.run()
@@ -0,0 +1,135 @@
+"""Benchmark for building the gradients of a bucketed seq2seq model.
+
+Builds a `seq2seq.model_with_buckets` translation model with `--num_buckets`
+buckets, like the one in translate/seq2seq_model.py, and reports for each
+bucket:
+
+* the time that `tf.gradients()` takes to build the gradients of the loss of
+  the bucket with respect to all the parameters, as the model does; and
+* the time that finding the ops between the loss and the parameters takes,
+  both with `gradients._PendingCount()` and with the reference implementation
+  that indexes lists by op id, whose cost is proportional to the size of the
+  whole graph.
+
+To run:
+  bazel run -c opt tensorflow/models/rnn:seq2seq_benchmark -- \
+    --num_buckets=8
+"""
+import collections
+import time
+
+import tensorflow.python.platform
+
+import tensorflow as tf
+
+from tensorflow.models.rnn import rnn_cell
+from tensorflow.models.rnn import seq2seq
+from tensorflow.python.ops import gradients
+
+FLAGS = tf.app.flags.FLAGS
+
+tf.app.flags.DEFINE_integer('num_buckets', 4,
+                            """Number of buckets in the model.""")
+tf.app.flags.DEFINE_integer('bucket_step', 10,
+                            """Difference between the lengths of the """
+                            """sequences of consecutive buckets.""")
+tf.app.flags.DEFINE_integer('size', 64, """Size of each model layer.""")
+tf.app.flags.DEFINE_integer('num_layers', 2,
+                            """Number of layers in the model.""")
+tf.app.flags.DEFINE_integer('vocab_size', 1000,
+                            """Size of the source and target vocabularies.""")
+
+
+def _BuildModel(buckets):
+  """Builds the model, and returns its losses for each bucket."""
+  encoder_inputs = [tf.placeholder(tf.int32, shape=[None])
+                    for _ in xrange(buckets[-1][0])]
+  decoder_inputs = [tf.placeholder(tf.int32, shape=[None])
+                    for _ in xrange(buckets[-1][1])]
+  targets = [tf.placeholder(tf.int32, shape=[None])
+             for _ in xrange(buckets[-1][1])]
+  weights = [tf.placeholder(tf.float32, shape=[None])
+             for _ in xrange(buckets[-1][1])]
+  cell = rnn_cell.MultiRNNCell([rnn_cell.GRUCell(FLAGS.size)] *
+                               FLAGS.num_layers)
+
+  def Seq2Seq(encoder_inputs, decoder_inputs):
+    return seq2seq.embedding_attention_seq2seq(
+        encoder_inputs, decoder_inputs, cell, FLAGS.vocab_size,
+        FLAGS.vocab_size)
+
+  _, losses = seq2seq.model_with_buckets(encoder_inputs, decoder_inputs,
+                                         targets, weights, buckets,
+                                         FLAGS.vocab_size, Seq2Seq)
+  return losses
+
+
+def _DensePendingCount(graph, to_ops, from_ops):
+  """Finds the ops between to_ops and from_ops with lists indexed by op id.
+
+  This is how `gradients._PendingCount()` used to work, before its cost was
+  made proportional to the ops that to_ops depend on.
+  """
+  reached_ops = [False] * (graph._last_id + 1)
+  for op in to_ops:
+    reached_ops[op._id] = True
+  queue = collections.deque(from_ops)
+  while queue:
+    op = queue.popleft()
+    if not reached_ops[op._id]:
+      reached_ops[op._id] = True
+      for output in op.outputs:
+        queue.extend(output.consumers())
+
+  between_ops = [False] * (graph._last_id + 1)
+  between_op_list = []
+  queue = collections.deque(to_ops)
+  while queue:
+    op = queue.popleft()
+    if reached_ops[op._id]:
+      between_ops[op._id] = True
+      between_op_list.append(op)
+      reached_ops[op._id] = False
+      queue.extend(inp.op for inp in op.inputs)
+
+  pending_count = [0] * (graph._last_id + 1)
+  for op in between_op_list:
+    for x in op.inputs:
+      if between_ops[x.op._id]:
+        pending_count[x.op._id] += 1
+    for x in op.control_inputs:
+      if between_ops[x._id]:
+        pending_count[x._id] += 1
+  return pending_count
+
+
+def main(unused_argv):
+  buckets = [((i + 1) * FLAGS.bucket_step, (i + 1) * FLAGS.bucket_step + 5)
+             for i in xrange(FLAGS.num_buckets)]
+  with tf.Graph().as_default() as graph:
+    start_time = time.time()
+    losses = _BuildModel(buckets)
+    params = tf.trainable_variables()
+    print 'Built the model in %.2f sec' % (time.time() - start_time)
+
+    from_ops = [param.op for param in params]
+    for bucket, loss in zip(buckets, losses):
+      num_ops = graph._last_id
+      start_time = time.time()
+      tf.gradients(loss, params)
+      gradients_duration = time.time() - start_time
+
+      start_time = time.time()
+      gradients._PendingCount([loss.op], from_ops)
+      sparse_duration = time.time() - start_time
+      start_time = time.time()
+      _DensePendingCount(graph, [loss.op], from_ops)
+      dense_duration = time.time() - start_time
+      print ('Bucket %s of %d ops: gradients() %.3f sec, _PendingCount() '
+             '%.3f sec, dense reference %.3f sec' % (
+                 bucket, num_ops, gradients_duration, sparse_duration,
+                 dense_duration))
+
+
+if __name__ == '__main__':
+  tf.app.run()
@@ -11,6 +11,8 @@ examples of how a graph is launched in a [`tf.Session`](#Session).
 
 @@get_default_session
 
+@@RunMetadata
+
 ## Error classes
 
 @@OpError
@@ -33,6 +35,7 @@ examples of how a graph is launched in a [`tf.Session`](#Session).
 """
 
 from tensorflow.python.client.session import InteractiveSession
+from tensorflow.python.client.session import RunMetadata
 from tensorflow.python.client.session import Session
 
 from tensorflow.python.framework import errors
@@ -1,19 +1,312 @@
 """A client interface for TensorFlow."""
 
+import collections
 import re
 import sys
 import threading
+import time
 
 import tensorflow.python.platform
 
 import numpy as np
 
+from tensorflow.core.framework import summary_pb2
 from tensorflow.python import pywrap_tensorflow as tf_session
 from tensorflow.python.framework import errors
 from tensorflow.python.framework import ops
 from tensorflow.python.platform import logging
 
 
+def _find_expansion(graph_element, index, kind):
+  """Returns the registered fetch or feed function for `graph_element`.
+
+  Args:
+    graph_element: The fetch or feed key to expand.
+    index: 1 to return the fetch function, or 2 to return the feed function,
+      of the matching entry in `BaseSession._REGISTERED_EXPANSIONS`.
+    kind: 'Fetch' or 'Feed', used in error messages.
+
+  Returns:
+    The fetch or feed function for the type of `graph_element`.
+
+  Raises:
+    TypeError: If no expansion is registered for the type of `graph_element`.
+  """
+  for expansion in BaseSession._REGISTERED_EXPANSIONS:
+    if isinstance(graph_element, expansion[0]):
+      return expansion[index]
+  raise TypeError('%s argument %r has invalid type %r'
+                  % (kind, graph_element, type(graph_element)))
+
+
+def _feed_fn(feed, feed_val):
+  """Expands `feed` and `feed_val` into a list of (subfeed, value) pairs."""
+  return _find_expansion(feed, 2, 'Feed')(feed, feed_val)
+
+
+def _convert_feed_value(feed_spec, subfeed_val):
+  """Converts a fed value to a numpy ndarray and validates its shape.
+
+  If `subfeed_val` is already a well-behaved, C-contiguous ndarray of the
+  fed type, it is returned as is, and `TF_Run` will read it without making
+  an intermediate copy. Otherwise, the value is copied into a new ndarray.
+
+  Args:
+    feed_spec: A tuple `(name, np_dtype, shape)`, as returned by
+      `BaseSession._process_feed()`.
+    subfeed_val: The value to be fed.
+
+  Returns:
+    A numpy ndarray containing `subfeed_val`.
+
+  Raises:
+    ValueError: If the shape of `subfeed_val` is not compatible with the
+      shape of a fed placeholder.
+  """
+  name, np_dtype, shape = feed_spec
+  if (isinstance(subfeed_val, np.ndarray) and subfeed_val.dtype == np_dtype
+      and subfeed_val.flags.carray):
+    np_val = subfeed_val
+  else:
+    np_val = np.array(subfeed_val, dtype=np_dtype)
+  if shape is not None and not shape.is_compatible_with(np_val.shape):
+    raise ValueError(
+        'Cannot feed value of shape %r for Tensor %r, '
+        'which has shape %r'
+        % (np_val.shape, name, tuple(shape.dims)))
+  return np_val
+
+
+FeedStats = collections.namedtuple(
+    'FeedStats', ['bytes_copied', 'bytes_passed_through'])
+
+
+class _RunFuture(object):
+  """The eventual result of a call to `BaseSession.run_async()`."""
+
+  def __init__(self):
+    self._done_event = threading.Event()
+    self._result = None
+    self._exc_info = None
+
+  def _set_result(self, fn, args):
+    """Calls `fn(*args)` and records its return value or raised exception."""
+    try:
+      self._result = fn(*args)
+    except Exception:  # pylint: disable=broad-except
+      self._exc_info = sys.exc_info()
+    self._done_event.set()
+
+  def done(self):
+    """Returns True if the step has finished running."""
+    return self._done_event.is_set()
+
+  def _wait(self, timeout):
+    if not self._done_event.wait(timeout):
+      raise errors.DeadlineExceededError(
+          None, None, 'Timed out waiting for the result of Session.run_async()')
+
+  def result(self, timeout=None):
+    """Waits for the step to finish and returns its result.
+
+    Args:
+      timeout: (Optional.) The maximum number of seconds to wait. If None,
+        waits indefinitely.
+
+    Returns:
+      The value that `Session.run()` returned for the step.
+
+    Raises:
+      DeadlineExceededError: If the step did not finish within `timeout`.
+      Exception: Any exception that `Session.run()` raised for the step.
+    """
+    self._wait(timeout)
+    if self._exc_info is not None:
+      raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+    return self._result
+
+  def exception(self, timeout=None):
+    """Waits for the step to finish and returns the exception it raised.
+
+    Args:
+      timeout: (Optional.) The maximum number of seconds to wait. If None,
+        waits indefinitely.
+
+    Returns:
+      The exception that `Session.run()` raised for the step, or None if it
+      succeeded.
+
+    Raises:
+      DeadlineExceededError: If the step did not finish within `timeout`.
+    """
+    self._wait(timeout)
+    if self._exc_info is not None:
+      return self._exc_info[1]
+    return None
+
+
+class _RunAsyncPool(object):
+  """A bounded pool of worker threads that runs steps for `run_async()`.
+
+  The workers only hold references to the session while they run a step, so
+  that idle workers do not prevent the session from being deleted.
+  """
+
+  def __init__(self, num_threads, max_pending):
+    """Creates a pool. The worker threads are started on first use.
+
+    Args:
+      num_threads: The number of worker threads.
+      max_pending: The number of submitted steps that may wait for a free
+        worker before `submit()` blocks.
+    """
+    self._num_threads = num_threads
+    self._max_pending = max_pending
+    self._cond = threading.Condition()
+    self._pending = collections.deque()
+    self._threads = []
+    self._closed = False
+
+  def submit(self, fn, args):
+    """Schedules `fn(*args)` to run on a worker thread.
+
+    Blocks while `max_pending` submitted calls are waiting for a worker.
+
+    Args:
+      fn: The function to call.
+      args: A tuple of arguments for `fn`.
+
+    Returns:
+      A future for the result of the call.
+
+    Raises:
+      RuntimeError: If the pool has been closed.
+    """
+    future = _RunFuture()
+    with self._cond:
+      if not self._threads and not self._closed:
+        for _ in xrange(self._num_threads):
+          worker = threading.Thread(target=self._run_worker)
+          worker.daemon = True
+          worker.start()
+          self._threads.append(worker)
+      while not self._closed and len(self._pending) >= self._max_pending:
+        self._cond.wait()
+      if self._closed:
+        raise RuntimeError('Attempted to use a closed Session.')
+      self._pending.append((future, fn, args))
+      self._cond.notify_all()
+    return future
+
+  def close(self):
+    """Stops the workers after their current calls, and fails pending ones."""
+    with self._cond:
+      self._closed = True
+      cancelled = list(self._pending)
+      self._pending.clear()
+      self._cond.notify_all()
+    for future, _, _ in cancelled:
+      # pylint: disable=protected-access
+      future._set_result(_raise_closed_session_error, ())
+      # pylint: enable=protected-access
+
+  def _run_worker(self):
+    while True:
+      with self._cond:
+        while not self._pending and not self._closed:
+          self._cond.wait()
+        if not self._pending:
+          return
+        future, fn, args = self._pending.popleft()
+        self._cond.notify_all()
+      future._set_result(fn, args)  # pylint: disable=protected-access
+      future = fn = args = None
+
+
+def _raise_closed_session_error():
+  raise RuntimeError('Attempted to use a closed Session.')
+
+
+class RunMetadata(object):
+  """Timing information about a single call to `Session.run()`.
+
+  Pass an instance of this class as the `run_metadata` argument of
+  [`Session.run()`](#Session.run) to have the wall time of the step, in
+  seconds, split into the following phases:
+
+  * `feed_conversion_secs`: Validating the fetches and converting the fed
+    values to numpy ndarrays.
+  * `extend_graph_secs`: Adding the operations that were created since the
+    previous step to the runtime graph (`TF_ExtendGraph`), or zero if no
+    operations were added.
+  * `run_secs`: Running the step in the runtime (`TF_Run`).
+  * `fetch_contraction_secs`: Mapping the fetched values back to the
+    structure of `fetches`.
+  * `total_secs`: The total wall time of the call.
+  """
+
+  _PHASES = ['feed_conversion_secs', 'extend_graph_secs', 'run_secs',
+             'fetch_contraction_secs', 'total_secs']
+
+  def __init__(self):
+    for phase in RunMetadata._PHASES:
+      setattr(self, phase, 0.0)
+
+  def __repr__(self):
+    return 'RunMetadata(%s)' % ', '.join(
+        '%s=%g' % (phase, getattr(self, phase))
+        for phase in RunMetadata._PHASES)
+
+
+class _StepTimeHistogram(object):
+  """Keeps the phase timings of the most recent timed steps of a session."""
+
+  def __init__(self, window_size):
+    self._lock = threading.Lock()
+    self._num_steps = 0
+    self._timings = dict(
+        (phase, collections.deque(maxlen=window_size))
+        for phase in RunMetadata._PHASES)
+
+  def add(self, run_metadata):
+    """Records the timings in `run_metadata`."""
+    with self._lock:
+      self._num_steps += 1
+      for phase, timings in self._timings.iteritems():
+        timings.append(getattr(run_metadata, phase))
+
+  def summary(self, tag_prefix):
+    """Returns a `Summary` proto of statistics over the recorded timings.
+
+    Args:
+      tag_prefix: A string that is prepended to the tag of each value.
+
+    Returns:
+      A `Summary` protocol buffer with a scalar value for the mean, median,
+      90th percentile and maximum of each phase, and for the number of timed
+      steps.
+    """
+    summary = summary_pb2.Summary()
+    with self._lock:
+      summary.value.add(tag='%s/num_steps' % tag_prefix,
+                        simple_value=self._num_steps)
+      for phase in RunMetadata._PHASES:
+        timings = sorted(self._timings[phase])
+        if not timings:
+          continue
+        tag = '%s/%s' % (tag_prefix, phase)
+        summary.value.add(tag=tag + '/mean',
+                          simple_value=sum(timings) / len(timings))
+        # Nearest-rank percentiles: the smallest timing that is at least as
+        # large as the given fraction of the timings.
+        summary.value.add(tag=tag + '/p50',
+                          simple_value=timings[(len(timings) - 1) // 2])
+        summary.value.add(tag=tag + '/p90',
+                          simple_value=timings[(len(timings) * 9 - 1) // 10])
+        summary.value.add(tag=tag + '/max', simple_value=timings[-1])
+    return summary
+
+
 class SessionInterface(object):
   """Base class for implementations of TensorFlow client sessions."""
 
@@ -39,7 +332,8 @@ class BaseSession(SessionInterface):
   execution of Operations and evaluation of Tensors.
   """
 
-  def __init__(self, target='', graph=None, config=None):
+  def __init__(self, target='', graph=None, config=None, run_async_threads=1,
+               max_pending_async_runs=1):
     """Constructs a new TensorFlow session.
 
     Args:
@@ -47,10 +341,16 @@ class BaseSession(SessionInterface):
       graph: (Optional) The graph to be used. If this argument is None,
         the default graph will be used.
       config: (Optional) ConfigProto proto used to configure the session.
+      run_async_threads: (Optional) The number of threads that run the steps
+        started by `run_async()`.
+      max_pending_async_runs: (Optional) The number of started steps that
+        may wait for a free thread before `run_async()` blocks.
 
     Raises:
       RuntimeError: If an error occurs while creating the TensorFlow
         session.
+      ValueError: If `run_async_threads` or `max_pending_async_runs` is less
+        than 1.
     """
     if graph is None:
       self._graph = ops.get_default_graph()
@@ -64,8 +364,27 @@ class BaseSession(SessionInterface):
     self._extend_lock = threading.Lock()
     self._target = target
 
+    # Counts the bytes of fed values that were copied into new ndarrays, and
+    # the bytes that were passed through to the runtime without a copy.
+    self._feed_stats_lock = threading.Lock()
+    self._feed_bytes_copied = 0
+    self._feed_bytes_passed_through = 0
+
+    self._run_async_pool = _RunAsyncPool(run_async_threads,
+                                         max_pending_async_runs)
+
+    # The timings of the most recent steps run with a `run_metadata`.
+    self._step_times = _StepTimeHistogram(self._STEP_TIME_WINDOW)
+
     self._session = None
 
+    if run_async_threads < 1:
+      raise ValueError('run_async_threads must be at least 1: %r'
+                       % (run_async_threads,))
+    if max_pending_async_runs < 1:
+      raise ValueError('max_pending_async_runs must be at least 1: %r'
+                       % (max_pending_async_runs,))
+
     try:
       opts = tf_session.TF_NewSessionOptions(target=target, config=config)
       status = tf_session.TF_NewStatus()
@@ -87,6 +406,10 @@ class BaseSession(SessionInterface):
       RuntimeError: If an error occurs while closing the session.
     """
     with self._extend_lock:
+      # Steps started by `run_async()` that have not begun to run yet fail
+      # because the session is closed. This does not wait for the workers,
+      # which may be waiting on `self._extend_lock`.
+      self._run_async_pool.close()
       if self._opened and not self._closed:
         self._closed = True
         try:
@@ -128,6 +451,58 @@ class BaseSession(SessionInterface):
   def sess_str(self):
     return self._target
 
+  @property
+  def feed_stats(self):
+    """Statistics about the conversion of fed values in this session.
+
+    A fed value is copied when it is not already a C-contiguous numpy
+    ndarray with the same element type as the fed tensor (for example, when
+    it is a Python list, a strided view, or an array of a different dtype).
+    Otherwise it is passed through to the runtime without a copy.
+
+    Returns:
+      A `FeedStats` tuple `(bytes_copied, bytes_passed_through)` containing
+      the total sizes of the values fed to this session since it was created.
+    """
+    with self._feed_stats_lock:
+      return FeedStats(self._feed_bytes_copied,
+                       self._feed_bytes_passed_through)
+
+  # The number of most recent timed steps summarized by `step_time_summary()`.
+  _STEP_TIME_WINDOW = 100
+
+  def step_time_summary(self, tag_prefix='session'):
+    """Returns a summary of the timings of recent steps in this session.
+
+    Only the steps run with a `run_metadata` argument are timed. The
+    statistics are computed over the most recent timed steps, and can be
+    written to an event file with `SummaryWriter.add_summary()`:
+
+    ```python
+    run_metadata = tf.RunMetadata()
+    for step in xrange(num_steps):
+      sess.run(train_op, run_metadata=run_metadata)
+      if step % 100 == 0:
+        writer.add_summary(sess.step_time_summary(), step)
+    ```
+
+    Args:
+      tag_prefix: (Optional.) A string that is prepended to the tag of each
+        summary value.
+
+    Returns:
+      A `Summary` protocol buffer containing a scalar value for the mean,
+      median, 90th percentile and maximum of each phase of a step (as
+      described in `RunMetadata`).
+    """
+    return self._step_times.summary(tag_prefix)
+
+  def _record_feed_bytes(self, bytes_copied, bytes_passed_through):
+    """Adds the sizes of the values fed in one step to `self.feed_stats`."""
+    with self._feed_stats_lock:
+      self._feed_bytes_copied += bytes_copied
+      self._feed_bytes_passed_through += bytes_passed_through
+
   def as_default(self):
     """Returns a context manager that makes this object the default session.
 
@@ -206,7 +581,7 @@ class BaseSession(SessionInterface):
        lambda feed, feed_val: [(feed, feed_val)])]
   # pylint: enable=g-long-lambda
 
-  def run(self, fetches, feed_dict=None):
+  def run(self, fetches, feed_dict=None, run_metadata=None):
     """Runs the operations and evaluates the tensors in `fetches`.
 
     This method runs one "step" of TensorFlow computation, by
@@ -250,6 +625,10 @@ class BaseSession(SessionInterface):
         (described above).
       feed_dict: A dictionary that maps graph elements to values
         (described above).
+      run_metadata: (Optional.) A [`RunMetadata`](#RunMetadata) object. If
+        specified, it is filled in with the wall time of each phase of the
+        step, and the timings are added to the statistics reported by
+        [`step_time_summary()`](#Session.step_time_summary).
 
     Returns:
       Either a single value if `fetches` is a single graph element, or
@@ -263,19 +642,8 @@ class BaseSession(SessionInterface):
         `Tensor` that doesn't exist.
 
     """
-    def _fetch_fn(fetch):
-      for tensor_type, fetch_fn, _ in BaseSession._REGISTERED_EXPANSIONS:
-        if isinstance(fetch, tensor_type):
-          return fetch_fn(fetch)
-      raise TypeError('Fetch argument %r has invalid type %r'
-                      % (fetch, type(fetch)))
-
-    def _feed_fn(feed, feed_val):
-      for tensor_type, _, feed_fn in BaseSession._REGISTERED_EXPANSIONS:
-        if isinstance(feed, tensor_type):
-          return feed_fn(feed, feed_val)
-      raise TypeError('Feed argument %r has invalid type %r'
-                      % (feed, type(feed)))
+    if run_metadata is not None:
+      start_time = time.time()
 
     # Check session.
     if self._closed:
@@ -285,13 +653,227 @@ class BaseSession(SessionInterface):
     is_list_fetch = isinstance(fetches, (list, tuple))
     if not is_list_fetch:
       fetches = [fetches]
+    target_list, unique_fetch_targets, fetch_info = self._process_fetches(
+        fetches)
+
+    # Create request.
+    feed_dict_string = {}
+
+    # Validate and process feed_dict.
+    if feed_dict:
+      bytes_copied = 0
+      bytes_passed_through = 0
+      for feed, feed_val in feed_dict.iteritems():
+        for subfeed, subfeed_val in _feed_fn(feed, feed_val):
+          feed_spec = self._process_feed(subfeed)
+          np_val = _convert_feed_value(feed_spec, subfeed_val)
+          if np_val is subfeed_val:
+            bytes_passed_through += np_val.nbytes
+          else:
+            bytes_copied += np_val.nbytes
+          feed_dict_string[feed_spec[0]] = np_val
+      self._record_feed_bytes(bytes_copied, bytes_passed_through)
+
+    # Run request and get response.
+    if run_metadata is not None:
+      run_metadata.feed_conversion_secs = time.time() - start_time
+    results = self._do_run(target_list, unique_fetch_targets, feed_dict_string,
+                           run_metadata=run_metadata)
+    if run_metadata is not None:
+      contraction_start_time = time.time()
+
+    # User may have fetched the same tensor multiple times, but we
+    # only fetch them from the runtime once.  Furthermore, they may
+    # be wrapped as a tuple of tensors.  Here we map the results back
+    # to what the client asked for.
+    fetched_results = dict(zip(unique_fetch_targets, results))
+    ret = []
+    for fetch_names, fetch_contraction_fn in fetch_info:
+      if fetch_names:
+        fetched_vals = [fetched_results[name] for name in fetch_names]
+        ret.append(fetch_contraction_fn(fetched_vals))
+      else:
+        ret.append(None)
+
+    if run_metadata is not None:
+      end_time = time.time()
+      run_metadata.fetch_contraction_secs = end_time - contraction_start_time
+      run_metadata.total_secs = end_time - start_time
+      self._step_times.add(run_metadata)
+
+    if is_list_fetch:
+      return ret
+    else:
+      return ret[0]
+
+  def run_async(self, fetches, feed_dict=None):
+    """Starts running `fetches` and returns a future for the result.
+
+    The step is run by a bounded pool of worker threads owned by this
+    session, so the caller can prepare the feeds for the next step while
+    this one executes. The size of the pool, and the number of steps that
+    may wait for a worker, are set by the `run_async_threads` and
+    `max_pending_async_runs` arguments of the constructor. With the default
+    single worker, steps run in the order in which they were started. If
+    too many steps are pending, this method blocks until a worker becomes
+    free.
+
+    The arguments are the same as for [`run()`](#Session.run). The values
+    in `feed_dict` may be read while the step runs, so they must not be
+    modified in place until the step has finished.
+
+    The returned future has the following methods:
+
+    * `result(timeout=None)`: Waits for the step to finish and returns what
+      `run()` would have returned, or raises the exception that `run()`
+      would have raised.
+    * `exception(timeout=None)`: Waits for the step to finish and returns
+      the exception that it raised, or None.
+    * `done()`: Returns True if the step has finished.
+
+    If `timeout` expires, `result()` and `exception()` raise
+    `tf.errors.DeadlineExceededError`.
+
+    Args:
+      fetches: A single graph element, or a list of graph elements
+        (described in `run()`).
+      feed_dict: A dictionary that maps graph elements to values
+        (described in `run()`).
+
+    Returns:
+      A future for the result of the step.
+
+    Raises:
+      RuntimeError: If this `Session` has been closed.
+    """
+    if self._closed:
+      raise RuntimeError('Attempted to use a closed Session.')
+    return self._run_async_pool.submit(self.run, (fetches, feed_dict))
+
+  def make_callable(self, fetches, feed_list=None):
+    """Returns a Python callable that runs a particular step.
+
+    The returned callable will take `len(feed_list)` arguments whose types
+    must be compatible feed values for the respective elements of `feed_list`.
+    For example, if element `i` of `feed_list` is a `tf.Tensor`, the `i`th
+    argument to the returned callable must be a numpy ndarray (or something
+    convertible to an ndarray) with matching element type and shape. See
+    [`Session.run()`](#Session.run) for details of the allowable feed key and
+    value types.
+
+    The returned callable will have the same return type as
+    `tf.Session.run(fetches, ...)`. For example, if `fetches` is a `tf.Tensor`,
+    the callable will return a numpy ndarray; if `fetches` is a
+    `tf.Operation`, it will return `None`.
+
+    The fetches and feeds are validated and converted to tensor names once,
+    when `make_callable()` is called, so repeatedly invoking the returned
+    callable is cheaper than repeatedly calling `run()` with the same
+    arguments.
+
+    Args:
+      fetches: A single graph element, or a list of graph elements
+        (described in `Session.run()`).
+      feed_list: (Optional.) A list of graph elements that will be fed
+        (described in `Session.run()`).
+
+    Returns:
+      A function that when called will execute the step defined by
+      `feed_list` and `fetches` in this session.
+
+    Raises:
+      TypeError: If `fetches` or `feed_list` cannot be interpreted
+        as arguments to `Session.run()`.
+      ValueError: If `fetches` or `feed_list` refer to a `Tensor` that
+        doesn't exist.
+    """
+    is_list_fetch = isinstance(fetches, (list, tuple))
+    if not is_list_fetch:
+      fetches = [fetches]
+    target_list, unique_fetch_targets, fetch_info = self._process_fetches(
+        fetches)
+    # Map each fetch to the positions of its subfetches in the results.
+    fetch_positions = dict((name, i)
+                           for i, name in enumerate(unique_fetch_targets))
+    fetch_plan = [([fetch_positions[name] for name in fetch_names],
+                   fetch_contraction_fn)
+                  for fetch_names, fetch_contraction_fn in fetch_info]
+
+    if feed_list is None:
+      feed_list = []
+    feed_fns = [_find_expansion(feed, 2, 'Feed') for feed in feed_list]
+    # Maps each subfeed key to its feed spec, as returned by
+    # `self._process_feed()`. The subfeeds of a feed can only be enumerated
+    # given a value, so each spec is computed on first use and reused by
+    # subsequent calls.
+    feed_specs = {}
+
+    def _callable(*feed_args):
+      """Runs the step defined by `fetches` and `feed_list`."""
+      if self._closed:
+        raise RuntimeError('Attempted to use a closed Session.')
+      if len(feed_args) != len(feed_list):
+        raise ValueError('Expected %d feed values, got %d.'
+                         % (len(feed_list), len(feed_args)))
+      feed_dict_string = {}
+      bytes_copied = 0
+      bytes_passed_through = 0
+      for feed, feed_fn, feed_val in zip(feed_list, feed_fns, feed_args):
+        for subfeed, subfeed_val in feed_fn(feed, feed_val):
+          feed_spec = feed_specs.get(subfeed)
+          if feed_spec is None:
+            feed_spec = self._process_feed(subfeed)
+            feed_specs[subfeed] = feed_spec
+          np_val = _convert_feed_value(feed_spec, subfeed_val)
+          if np_val is subfeed_val:
+            bytes_passed_through += np_val.nbytes
+          else:
+            bytes_copied += np_val.nbytes
+          feed_dict_string[feed_spec[0]] = np_val
+      if feed_list:
+        self._record_feed_bytes(bytes_copied, bytes_passed_through)
+
+      results = self._do_run(target_list, unique_fetch_targets,
+                             feed_dict_string)
+
+      ret = []
+      for positions, fetch_contraction_fn in fetch_plan:
+        if positions:
+          ret.append(fetch_contraction_fn([results[i] for i in positions]))
+        else:
+          ret.append(None)
+      if is_list_fetch:
+        return ret
+      else:
+        return ret[0]
+
+    return _callable
+
+  def _process_fetches(self, fetches):
+    """Validates `fetches` and converts them to tensor and operation names.
+
+    Args:
+      fetches: A list of graph elements (described in `run()`).
+
+    Returns:
+      A tuple `(target_list, unique_fetch_targets, fetch_info)`, where
+      `target_list` is the list of names of operations to run,
+      `unique_fetch_targets` is the list of distinct names of tensors to
+      fetch, and `fetch_info` contains, for each fetch, a pair of the
+      names of its subfetches and the function that contracts their values.
 
+    Raises:
+      TypeError: If a fetch has an inappropriate type.
+      ValueError: If a fetch is invalid or refers to a `Tensor` that
+        doesn't exist.
+    """
     unique_fetch_targets = set()
     target_list = []
 
     fetch_info = []
     for fetch in fetches:
-      subfetches, fetch_contraction_fn = _fetch_fn(fetch)
+      subfetches, fetch_contraction_fn = _find_expansion(fetch, 1, 'Fetch')(
+          fetch)
       subfetch_names = []
       for subfetch in subfetches:
         try:
@@ -314,58 +896,41 @@ class BaseSession(SessionInterface):
       unique_fetch_targets.update(subfetch_names)
       fetch_info.append((subfetch_names, fetch_contraction_fn))
 
-    unique_fetch_targets = list(unique_fetch_targets)
-
-    # Create request.
-    feed_dict_string = {}
+    return target_list, list(unique_fetch_targets), fetch_info
 
-    # Validate and process feed_dict.
-    if feed_dict:
-      for feed, feed_val in feed_dict.iteritems():
-        for subfeed, subfeed_val in _feed_fn(feed, feed_val):
-          try:
-            subfeed_t = self.graph.as_graph_element(subfeed, allow_tensor=True,
-                                                    allow_operation=False)
-          except Exception as e:
-            e.message = ('Cannot interpret feed_dict key as Tensor: '
-                         + e.message)
-            e.args = (e.message,)
-            raise e
-          np_val = np.array(subfeed_val, dtype=subfeed_t.dtype.as_numpy_dtype)
-          if subfeed_t.op.type == 'Placeholder':
-            if not subfeed_t.get_shape().is_compatible_with(np_val.shape):
-              raise ValueError(
-                  'Cannot feed value of shape %r for Tensor %r, '
-                  'which has shape %r'
-                  % (np_val.shape, subfeed_t.name,
-                     tuple(subfeed_t.get_shape().dims)))
-          feed_dict_string[str(subfeed_t.name)] = np_val
+  def _process_feed(self, subfeed):
+    """Validates a feed key and returns the information needed to feed it.
 
-    # Run request and get response.
-    results = self._do_run(target_list, unique_fetch_targets, feed_dict_string)
+    Args:
+      subfeed: A `Tensor`, or the name of a tensor, to be fed.
 
-    # User may have fetched the same tensor multiple times, but we
-    # only fetch them from the runtime once.  Furthermore, they may
-    # be wrapped as a tuple of tensors.  Here we map the results back
-    # to what the client asked for.
-    fetched_results = dict(zip(unique_fetch_targets, results))
-    ret = []
-    for fetch_names, fetch_contraction_fn in fetch_info:
-      if fetch_names:
-        fetched_vals = [fetched_results[name] for name in fetch_names]
-        ret.append(fetch_contraction_fn(fetched_vals))
-      else:
-        ret.append(None)
+    Returns:
+      A tuple `(name, np_dtype, shape)`, where `name` is the name of the fed
+      tensor, `np_dtype` is the numpy type to which fed values are converted,
+      and `shape` is the `TensorShape` with which fed values must be
+      compatible, or None if the fed tensor is not a placeholder.
 
-    if is_list_fetch:
-      return ret
+    Raises:
+      Exception: If `subfeed` cannot be interpreted as a `Tensor`.
+    """
+    try:
+      subfeed_t = self.graph.as_graph_element(subfeed, allow_tensor=True,
+                                              allow_operation=False)
+    except Exception as e:
+      e.message = ('Cannot interpret feed_dict key as Tensor: '
+                   + e.message)
+      e.args = (e.message,)
+      raise e
+    if subfeed_t.op.type == 'Placeholder':
+      shape = subfeed_t.get_shape()
     else:
-      return ret[0]
+      shape = None
+    return (str(subfeed_t.name), subfeed_t.dtype.as_numpy_dtype, shape)
 
   # Captures the name of a node in an error status.
   _NODEDEF_NAME_RE = re.compile(r'\[\[Node: ([^ ]*?) =')
 
-  def _do_run(self, target_list, fetch_list, feed_dict):
+  def _do_run(self, target_list, fetch_list, feed_dict, run_metadata=None):
     """Runs a step based on the given fetches and feeds.
 
     Args:
@@ -374,6 +939,8 @@ class BaseSession(SessionInterface):
       fetch_list: A list of strings corresponding to names of tensors to be
         fetched and operations to be run.
       feed_dict: A dictionary that maps tensor names to numpy ndarrays.
+      run_metadata: (Optional.) A `RunMetadata` object in which to record the
+        time spent extending the graph and running the step.
 
     Returns:
       A list of numpy ndarrays, corresponding to the elements of
@@ -382,16 +949,19 @@ class BaseSession(SessionInterface):
       will be returned for that element.
     """
     try:
+      if run_metadata is not None:
+        start_time = time.time()
       # Ensure any changes to the graph are reflected in the runtime.
       with self._extend_lock:
         if self._graph.version > self._current_version:
-          graph_def = self._graph.as_graph_def(
+          # pylint: disable=protected-access
+          graph_def_string = self._graph._as_serialized_graph_def(
               from_version=self._current_version)
+          # pylint: enable=protected-access
 
           try:
             status = tf_session.TF_NewStatus()
-            tf_session.TF_ExtendGraph(
-                self._session, graph_def.SerializeToString(), status)
+            tf_session.TF_ExtendGraph(self._session, graph_def_string, status)
             if tf_session.TF_GetCode(status) != 0:
               raise RuntimeError(tf_session.TF_Message(status))
             self._opened = True
@@ -400,8 +970,19 @@ class BaseSession(SessionInterface):
 
           self._current_version = self._graph.version
 
-      return tf_session.TF_Run(self._session, feed_dict, fetch_list,
-                               target_list)
+          if run_metadata is not None:
+            run_metadata.extend_graph_secs = time.time() - start_time
+        elif run_metadata is not None:
+          run_metadata.extend_graph_secs = 0.0
+
+      if run_metadata is None:
+        return tf_session.TF_Run(self._session, feed_dict, fetch_list,
+                                 target_list)
+      run_start_time = time.time()
+      results = tf_session.TF_Run(self._session, feed_dict, fetch_list,
+                                  target_list)
+      run_metadata.run_secs = time.time() - run_start_time
+      return results
 
     except tf_session.StatusNotOK as e:
       e_type, e_value, e_traceback = sys.exc_info()
@@ -476,15 +1057,20 @@ class Session(BaseSession):
 
   @@__init__
   @@run
+  @@run_async
+  @@make_callable
   @@close
 
   @@graph
+  @@feed_stats
+  @@step_time_summary
 
   @@as_default
 
   """
 
-  def __init__(self, target='', graph=None, config=None):
+  def __init__(self, target='', graph=None, config=None, run_async_threads=1,
+               max_pending_async_runs=1):
     """Creates a new TensorFlow session.
 
     If no `graph` argument is specified when constructing the session,
@@ -502,9 +1088,18 @@ class Session(BaseSession):
       graph: (Optional.) The `Graph` to be launched (described above).
       config: (Optional.) A [`ConfigProto`](https://tensorflow.googlesource.com/tensorflow/+/master/tensorflow/core/framework/config.proto)
         protocol buffer with configuration options for the session.
+      run_async_threads: (Optional.) The number of threads that run the
+        steps started by [`run_async()`](#Session.run_async).
+      max_pending_async_runs: (Optional.) The number of started steps that
+        may wait for a free thread before `run_async()` blocks.
 
+    Raises:
+      ValueError: If `run_async_threads` or `max_pending_async_runs` is less
+        than 1.
     """
-    super(Session, self).__init__(target, graph, config=config)
+    super(Session, self).__init__(
+        target, graph, config=config, run_async_threads=run_async_threads,
+        max_pending_async_runs=max_pending_async_runs)
     self._context_managers = [self.graph.as_default(), self.as_default()]
 
   def __enter__(self):
@@ -9,6 +9,7 @@ import numpy as np
 from tensorflow.core.framework import config_pb2
 from tensorflow.core.lib.core import error_codes_pb2
 from tensorflow.python.client import session
+from tensorflow.python.framework import errors
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import tensor_util
 from tensorflow.python.framework import test_util
@@ -16,6 +17,7 @@ from tensorflow.python.framework import types
 from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import constant_op
 from tensorflow.python.ops import control_flow_ops
+from tensorflow.python.ops import data_flow_ops
 from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import state_ops
 from tensorflow.python.ops import variables
@@ -401,6 +403,167 @@ class SessionTest(test_util.TensorFlowTestCase):
       y = s.run(2 * x, feed_dict={x: [1, 1]})
       assert (y == 2 * np.ones(2)).all()
 
+  def testMakeCallable(self):
+    with session.Session() as s:
+      x = array_ops.placeholder(types.float32, shape=[2])
+      y = array_ops.placeholder(types.float32, shape=[2])
+      z = math_ops.add(x, y)
+      v = variables.Variable(0.0)
+      inc = state_ops.assign_add(v, 1.0)
+      s.run(v.initializer)
+
+      single_fetch = s.make_callable(z, [x, y])
+      for i in xrange(3):
+        z_val = single_fetch(np.ones(2) * i, [1.0, 2.0])
+        self.assertAllEqual([i + 1.0, i + 2.0], z_val)
+
+      list_fetch = s.make_callable([z, inc.op, z.name], [y, x.name])
+      z_val, inc_val, z_name_val = list_fetch([1.0, 1.0], [2.0, 3.0])
+      self.assertAllEqual([3.0, 4.0], z_val)
+      self.assertEqual(None, inc_val)
+      self.assertAllEqual([3.0, 4.0], z_name_val)
+      self.assertAllEqual(1.0, v.eval())
+
+      with self.assertRaisesRegexp(ValueError, 'Expected 2 feed values'):
+        single_fetch(np.ones(2))
+      with self.assertRaisesRegexp(ValueError, 'Cannot feed value of shape'):
+        single_fetch(np.ones(3), np.ones(3))
+
+  def testFeedStats(self):
+    with session.Session() as s:
+      x = array_ops.placeholder(types.float32, shape=[2, 2])
+      y = array_ops.identity(x)
+      self.assertEqual((0, 0), tuple(s.feed_stats))
+
+      contiguous = np.ones([2, 2], dtype=np.float32)
+      self.assertAllEqual(contiguous, s.run(y, {x: contiguous}))
+      self.assertEqual(session.FeedStats(0, 16), s.feed_stats)
+
+      # Lists, strided views and arrays of the wrong type are copied.
+      s.run(y, {x: [[1.0, 2.0], [3.0, 4.0]]})
+      self.assertEqual(session.FeedStats(16, 16), s.feed_stats)
+      strided = np.ones([2, 4], dtype=np.float32)[:, ::2]
+      self.assertAllEqual(strided, s.run(y, {x: strided}))
+      self.assertEqual(session.FeedStats(32, 16), s.feed_stats)
+      s.run(y, {x: np.ones([2, 2], dtype=np.float64)})
+      self.assertEqual(session.FeedStats(48, 16), s.feed_stats)
+
+      s.make_callable(y, [x])(contiguous)
+      self.assertEqual(session.FeedStats(48, 32), s.feed_stats)
+
+  def testMakeCallableSparseTensor(self):
+    with session.Session() as s:
+      indices = np.array([[3, 2, 0], [4, 5, 1]]).astype(np.int64)
+      values = np.array([1.0, 2.0]).astype(np.float32)
+      shape = np.array([7, 9, 2]).astype(np.int64)
+      sp = ops.SparseTensor(
+          array_ops.placeholder(dtype=np.int64, shape=(2, 3)),
+          array_ops.placeholder(dtype=np.float32, shape=(2,)),
+          array_ops.placeholder(dtype=np.int64, shape=(3,)),)
+      sp2 = ops.SparseTensor(array_ops.identity(sp.indices),
+                             array_ops.identity(sp.values),
+                             array_ops.identity(sp.shape))
+      run_step = s.make_callable(sp2, [sp])
+      sp2_out = run_step(ops.SparseTensorValue(indices, values, shape))
+      self.assertAllEqual(sp2_out.indices, indices)
+      self.assertAllEqual(sp2_out.values, values)
+      self.assertAllEqual(sp2_out.shape, shape)
+
+  def testMakeCallableAfterClose(self):
+    s = session.Session()
+    c = constant_op.constant(5.0)
+    run_step = s.make_callable(c)
+    self.assertAllEqual(5.0, run_step())
+    s.close()
+    with self.assertRaisesRegexp(RuntimeError, 'closed Session'):
+      run_step()
+
+  def testRunAsync(self):
+    with session.Session() as s:
+      v = variables.Variable(0.0)
+      inc = state_ops.assign_add(v, 1.0)
+      x = array_ops.placeholder(types.float32, shape=[2])
+      y = math_ops.mul(x, 2.0)
+      s.run(v.initializer)
+
+      futures = [s.run_async(inc) for _ in xrange(10)]
+      # Steps run in the order in which they were started.
+      self.assertAllEqual(range(1, 11), [f.result() for f in futures])
+      self.assertTrue(all(f.done() for f in futures))
+
+      future = s.run_async([y, inc.op], {x: [1.0, 2.0]})
+      y_val, inc_val = future.result()
+      self.assertAllEqual([2.0, 4.0], y_val)
+      self.assertEqual(None, inc_val)
+      self.assertEqual(None, future.exception())
+
+      future = s.run_async(y, {x: [1.0, 2.0, 3.0]})
+      self.assertTrue(isinstance(future.exception(), ValueError))
+      with self.assertRaisesRegexp(ValueError, 'Cannot feed value of shape'):
+        future.result()
+
+  def testRunAsyncTimeout(self):
+    with session.Session() as s:
+      q = data_flow_ops.FIFOQueue(1, [types.float32])
+      future = s.run_async(q.dequeue())
+      with self.assertRaises(errors.DeadlineExceededError):
+        future.result(timeout=0.1)
+      self.assertFalse(future.done())
+      s.run(q.enqueue(7.0))
+      self.assertEqual(7.0, future.result())
+
+  def testRunAsyncConcurrently(self):
+    with session.Session(run_async_threads=2) as s:
+      q = data_flow_ops.FIFOQueue(1, [types.float32])
+      dequeued = s.run_async(q.dequeue())
+      # The second step runs while the first one waits for it.
+      s.run_async(q.enqueue(7.0)).result(timeout=10)
+      self.assertEqual(7.0, dequeued.result(timeout=10))
+    with self.assertRaises(ValueError):
+      session.Session(run_async_threads=0)
+    with self.assertRaises(ValueError):
+      session.Session(max_pending_async_runs=0)
+
+  def testRunAsyncAfterClose(self):
+    s = session.Session()
+    c = constant_op.constant(5.0)
+    self.assertAllEqual(5.0, s.run_async(c).result())
+    s.close()
+    with self.assertRaisesRegexp(RuntimeError, 'closed Session'):
+      s.run_async(c)
+
+  def testRunMetadata(self):
+    with session.Session() as s:
+      x = array_ops.placeholder(types.float32, shape=[2])
+      y = math_ops.mul(x, 2.0)
+      self.assertProtoEquals(
+          'value { tag: "session/num_steps" simple_value: 0.0 }',
+          s.step_time_summary())
+
+      run_metadata = session.RunMetadata()
+      y_val = s.run(y, {x: [1.0, 2.0]}, run_metadata=run_metadata)
+      self.assertAllEqual([2.0, 4.0], y_val)
+      self.assertGreater(run_metadata.extend_graph_secs, 0.0)
+      self.assertGreater(run_metadata.run_secs, 0.0)
+      self.assertGreaterEqual(run_metadata.total_secs, run_metadata.run_secs)
+
+      # The graph does not need to be extended again.
+      s.run(y, {x: [1.0, 2.0]}, run_metadata=run_metadata)
+      self.assertEqual(0.0, run_metadata.extend_graph_secs)
+      # Steps without a run_metadata are not timed.
+      s.run(y, {x: [1.0, 2.0]})
+
+      summary = s.step_time_summary(tag_prefix='timing')
+      values = dict((v.tag, v.simple_value) for v in summary.value)
+      self.assertEqual(2, values['timing/num_steps'])
+      for phase in ['feed_conversion_secs', 'extend_graph_secs', 'run_secs',
+                    'fetch_contraction_secs', 'total_secs']:
+        for stat in ['mean', 'p50', 'p90', 'max']:
+          self.assertIn('timing/%s/%s' % (phase, stat), values)
+      # The median of two timings is the lower one.
+      self.assertEqual(0.0, values['timing/extend_graph_secs/p50'])
+      self.assertGreater(values['timing/extend_graph_secs/max'], 0.0)
+
   def testGraphDef(self):
     with session.Session() as sess:
       self.assertProtoEquals('', sess.graph_def)
@@ -66,6 +66,9 @@ class OpError(Exception):
       output = ["%s\nCaused by op %r, defined at:\n"
                 % (self.message, self._op.name,)]
       curr_traceback_list = traceback.format_list(self._op.traceback)
+      if not curr_traceback_list:
+        output.append("  (The call stack was not recorded. See "
+                      "Graph.set_traceback_mode().)\n")
       output.extend(curr_traceback_list)
       original_op = self._op._original_op
       while original_op is not None:
@@ -1,5 +1,6 @@
 """Classes and functions used to construct graphs."""
 # pylint: disable=g-bad-name
+import bisect
 import collections
 import contextlib
 import copy
@@ -42,7 +43,7 @@ def _convert_stack(stack):
 
 
 # pylint: disable=line-too-long
-def _extract_stack():
+def _extract_stack(include_globals=True):
   """A lightweight re-implementation of traceback.extract_stack.
 
   NOTE(mrry): traceback.extract_stack eagerly retrieves the line of code for
@@ -51,6 +52,12 @@ def _extract_stack():
     should apply _convert_stack to the result to obtain a traceback that can
     be formatted etc. using traceback methods.
 
+  Args:
+    include_globals: If False, the frame_globals element of each tuple is
+      None. The globals are only needed to retrieve the code of modules that
+      were loaded by an import hook, and holding them keeps those modules
+      alive.
+
   Returns:
     A list of 4-tuples (filename, lineno, name, frame_globals) corresponding to
     the call stack of the current thread.
@@ -66,13 +73,20 @@ def _extract_stack():
     co = f.f_code
     filename = co.co_filename
     name = co.co_name
-    frame_globals = f.f_globals
+    frame_globals = f.f_globals if include_globals else None
     ret.append((filename, lineno, name, frame_globals))
     f = f.f_back
   ret.reverse()
   return ret
 
 
+# The shape of a tensor whose shape has not been set.
+_UNKNOWN_SHAPE = tensor_shape.unknown_shape()
+
+# The consumers of a tensor that has not been consumed.
+_NO_CONSUMERS = ()
+
+
 class Tensor(object):
   """Represents a value produced by an `Operation`.
 
@@ -125,6 +139,11 @@ class Tensor(object):
 
   """
 
+  # NOTE: Large graphs contain millions of tensors, so this class uses
+  #   __slots__ instead of a per-instance __dict__.
+  __slots__ = ["_op", "_value_index", "_dtype", "_shape", "_consumers",
+               "__weakref__"]
+
   # List of Python operators that we allow to override.
   OVERLOADABLE_OPERATORS = {
       # Binary.
@@ -161,10 +180,13 @@ class Tensor(object):
     self._op = op
     self._value_index = value_index
     self._dtype = types.as_dtype(dtype)
-    self._shape = tensor_shape.unknown_shape()
+    # Unknown shapes are never modified in place, so they can be shared.
+    self._shape = _UNKNOWN_SHAPE
     # List of operations that use this Tensor as input.  We maintain this list
-    # to easily navigate a computation graph.
-    self._consumers = []
+    # to easily navigate a computation graph. Many tensors are never
+    # consumed, so the list is only allocated when the first consumer is
+    # added.
+    self._consumers = _NO_CONSUMERS
 
   @property
   def op(self):
@@ -287,6 +309,8 @@ class Tensor(object):
     Returns:
       A list of `Operation`s.
     """
+    if self._consumers is _NO_CONSUMERS:
+      return []
     return self._consumers
 
   def _add_consumer(self, consumer):
@@ -300,7 +324,24 @@ class Tensor(object):
     """
     if not isinstance(consumer, Operation):
       raise TypeError("Consumer must be an Operation: %s" % consumer)
-    self._consumers.append(consumer)
+    if self._consumers is _NO_CONSUMERS:
+      self._consumers = [consumer]
+    else:
+      self._consumers.append(consumer)
+
+  def _remove_consumer(self, consumer):
+    """Removes one occurrence of `consumer` from the consumers of this tensor.
+
+    Args:
+      consumer: an Operation that consumes this tensor.
+
+    Raises:
+      ValueError: if `consumer` does not consume this tensor.
+    """
+    if self._consumers is _NO_CONSUMERS:
+      raise ValueError("%s is not a consumer of %s" % (consumer.name,
+                                                       self.name))
+    self._consumers.remove(consumer)
 
   def _as_node_def_input(self):
     """Return a value to use for the NodeDef "input" attribute.
@@ -896,6 +937,13 @@ class Operation(object):
   @@traceback
   """
 
+  # NOTE: Large graphs contain millions of operations, so this class
+  #   uses __slots__ instead of a per-instance __dict__.
+  __slots__ = ["_node_def", "_graph", "_inputs", "_outputs", "_input_types",
+               "_control_inputs", "_original_op", "_op_def", "_traceback",
+               "_node_def_string", "_control_flow_context", "_id_value",
+               "__weakref__"]
+
   def __init__(self, node_def, g, inputs=None, output_types=None,
                control_inputs=None, input_types=None, original_op=None,
                op_def=None):
@@ -958,7 +1006,6 @@ class Operation(object):
       a._add_consumer(self)  # pylint: disable=protected-access
     if output_types is None:
       output_types = []
-    self._output_types = output_types
     self._outputs = [Tensor(self, i, output_types[i])
                      for i in xrange(len(output_types))]
     if input_types is None:
@@ -985,7 +1032,15 @@ class Operation(object):
 
     self._original_op = original_op
     self._op_def = op_def
-    self._traceback = _extract_stack()
+    traceback_mode = g._op_traceback_mode()
+    if traceback_mode == "none":
+      self._traceback = _NO_TRACEBACK
+    else:
+      self._traceback = _extract_stack(
+          include_globals=(traceback_mode == "full"))
+    # Cached result of self._node_def.SerializeToString(), or None if the
+    # NodeDef has changed since it was last serialized.
+    self._node_def_string = None
     # Add this op to the current control flow context:
     self._control_flow_context = g._get_control_flow_context()
     if g._get_control_flow_context() is not None:
@@ -1038,6 +1093,7 @@ class Operation(object):
       device: string or device..  The device to set.
     """
     self._node_def.device = _device_string(device)
+    self._node_def_string = None
 
   def _add_input(self, tensor, dtype=None):
     """Add a new input to this operation.
@@ -1096,7 +1152,9 @@ class Operation(object):
             "Cannot convert a tensor of type %s to an input of type %s"
             % (tensor.dtype.name, dtype.name))
 
-    self._inputs[index].consumers().remove(self)
+    # pylint: disable=protected-access
+    self._inputs[index]._remove_consumer(self)
+    # pylint: enable=protected-access
     self._inputs[index] = tensor
     self._input_types[index] = dtype
     tensor._add_consumer(self)  # pylint: disable=protected-access
@@ -1125,6 +1183,21 @@ class Operation(object):
     if self._control_inputs:
       self._node_def.input.extend(["^%s" % op.name for op in
                                    self._control_inputs])
+    self._node_def_string = None
+
+  def _serialized_node_def(self):
+    """Returns the serialized `NodeDef` of this op, caching the result.
+
+    NOTE: The cache is invalidated by the methods of this class that
+      modify the `NodeDef`. Callers that modify `self.node_def` in place
+      must not rely on the cached value.
+
+    Returns:
+      A string containing the serialized `NodeDef` proto.
+    """
+    if self._node_def_string is None:
+      self._node_def_string = self._node_def.SerializeToString()
+    return self._node_def_string
 
   def __str__(self):
     return str(self._node_def)
@@ -1213,7 +1286,12 @@ class Operation(object):
 
   @property
   def traceback(self):
-    """Returns the call stack from when this operation was constructed."""
+    """Returns the call stack from when this operation was constructed.
+
+    The call stack is empty if the graph was configured not to record it
+    for this operation (see
+    [`Graph.set_traceback_mode()`](#Graph.set_traceback_mode)).
+    """
     return _convert_stack(self._traceback)
 
   def get_attr(self, name):
@@ -1423,6 +1501,153 @@ def set_shapes_for_outputs(op):
     output.set_shape(s)
 
 
+def _encode_varint(value):
+  """Returns the protocol buffer varint encoding of a non-negative `value`."""
+  pieces = []
+  bits = value & 0x7f
+  value >>= 7
+  while value:
+    pieces.append(chr(0x80 | bits))
+    bits = value & 0x7f
+    value >>= 7
+  pieces.append(chr(bits))
+  return "".join(pieces)
+
+
+# The traceback of an op that did not record its call stack.
+_NO_TRACEBACK = ()
+
+
+# The wire-format tag of the (length-delimited) `GraphDef.node` field.
+_GRAPH_DEF_NODE_TAG = chr((1 << 3) | 2)
+
+
+# The items of a collection that does not exist.
+_NO_VALUES = ()
+
+
+class _Collection(list):
+  """The list of the items of a collection, which counts its modifications.
+
+  `get_collection()` returns this list itself, and callers such as
+  variable_scope modify it in place, so a `_CollectionIndex` compares
+  `version` with the version it indexed to know whether it is current.
+  """
+
+  def __init__(self, *args):
+    list.__init__(self, *args)
+    self.version = 0
+
+
+def _CountsModifications(method):
+  """Wraps a list method so that it increments `_Collection.version`."""
+  def Wrapper(self, *args, **kwargs):
+    self.version += 1
+    return method(self, *args, **kwargs)
+  Wrapper.__name__ = method.__name__
+  Wrapper.__doc__ = method.__doc__
+  return Wrapper
+
+for _method_name in ["__setitem__", "__delitem__", "__setslice__",
+                     "__delslice__", "__iadd__", "__imul__", "append",
+                     "extend", "insert", "pop", "remove", "reverse", "sort"]:
+  setattr(_Collection, _method_name,
+          _CountsModifications(getattr(list, _method_name)))
+del _method_name
+
+
+class _CollectionIndex(object):
+  """An index of the items in a collection, sorted by name."""
+
+  def __init__(self, items):
+    """Creates an index of the given collection.
+
+    Args:
+      items: The `_Collection` of the items in a collection.
+    """
+    # Sorted names of the items whose name is a string, and the positions of
+    # those items in the collection.
+    self._names = []
+    self._positions = []
+    # Positions of the items whose name is not a string.
+    self._other_positions = []
+    # The version of the collection that the index describes.
+    self.version = items.version
+    for position, item in enumerate(items):
+      self.add(position, item)
+
+  def add(self, position, item):
+    """Adds `item`, at the given `position` in the collection, to the index."""
+    if not hasattr(item, "name"):
+      return
+    name = item.name
+    if isinstance(name, basestring):
+      # Items with the same name are kept in collection order.
+      i = bisect.bisect_right(self._names, name)
+      self._names.insert(i, name)
+      self._positions.insert(i, position)
+    else:
+      self._other_positions.append(position)
+
+  def positions_with_prefix(self, items, prefix):
+    """Returns the positions of the items whose name begins with `prefix`.
+
+    Args:
+      items: The `_Collection` of the items in the indexed collection, which
+        must not have been modified since `version`.
+      prefix: A string.
+
+    Returns:
+      A sorted list of positions.
+    """
+    names = self._names
+    ret = []
+    i = bisect.bisect_left(names, prefix)
+    while i < len(names) and names[i].startswith(prefix):
+      ret.append(self._positions[i])
+      i += 1
+    for position in self._other_positions:
+      if items[position].name.startswith(prefix):
+        ret.append(position)
+    ret.sort()
+    return ret
+
+
+class _CollectionView(object):
+  """Immutable view of the items of a collection."""
+
+  def __init__(self, collections, name, positions=None):
+    """Creates a view of a collection, or of `items[i] for i in positions`.
+
+    The collection is looked up by `name` in `collections` on every access,
+    so the view reflects a collection that is created after the view.
+    """
+    self._collections = collections
+    self._name = name
+    self._positions = positions
+
+  @property
+  def _items(self):
+    return self._collections.get(self._name, _NO_VALUES)
+
+  def __iter__(self):
+    if self._positions is None:
+      return iter(self._items)
+    return (self._items[i] for i in self._positions)
+
+  def __len__(self):
+    if self._positions is None:
+      return len(self._items)
+    return len(self._positions)
+
+  def __getitem__(self, i):
+    if self._positions is None:
+      return self._items[i]
+    if isinstance(i, slice):
+      return [self._items[position] for position in self._positions[i]]
+    return self._items[self._positions[i]]
+
+
 class Graph(object):
   """A TensorFlow computation, represented as a dataflow graph.
 
@@ -1465,6 +1690,7 @@ class Graph(object):
   @@as_graph_def
   @@finalize
   @@finalized
+  @@set_traceback_mode
 
   @@control_dependencies
   @@device
@@ -1480,6 +1706,7 @@ class Graph(object):
 
   @@add_to_collection
   @@get_collection
+  @@get_collection_view
 
   @@as_graph_element
   @@get_operation_by_name
@@ -1498,6 +1725,11 @@ class Graph(object):
   def __init__(self):
     """Creates a new, empty Graph."""
     self._nodes_by_id = dict()
+    # Append-only log of the ops in this graph, sorted by op id, and the
+    # corresponding ids. Used to compute the ops added since a given version
+    # in time proportional to the number of new ops.
+    self._ops_by_id_log = []
+    self._op_ids_log = []
     self._next_node_id = [dict()]
     self._next_id_counter = 0
     self._nodes_by_name = dict()
@@ -1518,6 +1750,11 @@ class Graph(object):
     self._control_dependencies_stack = []
     # Arbritrary collections of objects.
     self._collections = {}
+    # Maps the name of a collection to the _CollectionIndex of the names of
+    # its items. Each index is built by the first scoped lookup in that
+    # collection, kept up to date by add_to_collection(), and rebuilt if the
+    # collection is modified in any other way.
+    self._collection_indices = {}
     # The graph-level random seed
     self._seed = None
     # A map from op type to the kernel label that should be used.
@@ -1528,6 +1765,10 @@ class Graph(object):
     # True if the graph is considered "finalized".  In that case no
     # new operations can be added.
     self._finalized = False
+    # How the construction tracebacks of new ops are recorded. See
+    # set_traceback_mode().
+    self._traceback_mode = "full"
+    self._traceback_sample_interval = 1
 
   def _check_not_finalized(self):
     """Check if the graph is finalized.
@@ -1560,6 +1801,10 @@ class Graph(object):
                        "is already used" % op.name)
     self._nodes_by_id[op._id] = op
     self._nodes_by_name[op.name] = op
+    # Ops are almost always added in id order, in which case this appends.
+    index = bisect.bisect(self._op_ids_log, op._id)
+    self._op_ids_log.insert(index, op._id)
+    self._ops_by_id_log.insert(index, op)
 
   @property
   def version(self):
@@ -1589,6 +1834,59 @@ class Graph(object):
     """
     self._finalized = True
 
+  def set_traceback_mode(self, mode, sample_interval=1):
+    """Sets how new operations record the call stack of their construction.
+
+    By default, every `Operation` records the call stack from which it was
+    created, which is returned by
+    [`Operation.traceback`](#Operation.traceback) and included in the
+    message of errors raised when the operation fails. Walking the call
+    stack for every operation can take a large share of the time to build
+    a large graph, and the recorded stacks use a lot of memory.
+
+    The `mode` argument must be one of the following:
+
+    * `"full"`: (Default.) Record the call stack, and the globals of each
+      stack frame, which are needed to retrieve the source lines of modules
+      that were loaded by an import hook.
+    * `"compact"`: Record the file name, line number and function name of
+      each stack frame. The source lines are retrieved when
+      `Operation.traceback` is accessed.
+    * `"none"`: Do not record the call stack.
+
+    This setting only applies to operations that are created after it is
+    changed. The traceback of an operation that did not record its call
+    stack is empty.
+
+    Args:
+      mode: A string; one of `"full"`, `"compact"` or `"none"`.
+      sample_interval: (Optional.) An integer. If greater than 1, only one
+        in every `sample_interval` new operations records its call stack.
+
+    Raises:
+      ValueError: If `mode` or `sample_interval` is invalid.
+    """
+    if mode not in ("full", "compact", "none"):
+      raise ValueError("Invalid traceback mode: %r. Must be one of \"full\", "
+                       "\"compact\" or \"none\"." % (mode,))
+    if sample_interval < 1:
+      raise ValueError("sample_interval must be at least 1: %r"
+                       % (sample_interval,))
+    self._traceback_mode = mode
+    self._traceback_sample_interval = sample_interval
+
+  def _op_traceback_mode(self):
+    """Returns how the next op in this graph should record its traceback.
+
+    Returns:
+      One of `"full"`, `"compact"` or `"none"`. This is `"none"` for the
+      ops that are skipped by the sample interval.
+    """
+    if self._traceback_sample_interval > 1 and (
+        self._next_id_counter % self._traceback_sample_interval):
+      return "none"
+    return self._traceback_mode
+
   def _get_control_flow_context(self):
     """Returns the current control flow context.
 
@@ -1625,15 +1923,61 @@ class Graph(object):
     """
     graph = graph_pb2.GraphDef()
     bytesize = 0
-    for op_id in sorted(self._nodes_by_id):
-      op = self._nodes_by_id[op_id]
-      if from_version is None or op_id > from_version:
-        graph.node.extend([op.node_def])
-        bytesize += op.node_def.ByteSize()
-        if bytesize >= (1 << 31) or bytesize < 0:
-          raise ValueError("GraphDef cannot be larger than 2GB.")
+    for op in self._ops_since_version(from_version):
+      graph.node.extend([op.node_def])
+      bytesize += op.node_def.ByteSize()
+      if bytesize >= (1 << 31) or bytesize < 0:
+        raise ValueError("GraphDef cannot be larger than 2GB.")
     return graph
 
+  def _as_serialized_graph_def(self, from_version=None):
+    """Returns a serialized `GraphDef` of this graph, as a string.
+
+    This is equivalent to `self.as_graph_def(from_version).SerializeToString()`,
+    but reuses the cached serialization of each `NodeDef` instead of building
+    and serializing a new `GraphDef` proto.
+
+    Args:
+      from_version: Optional.  If this is set, the `GraphDef` contains only
+        the nodes that were added to this graph since its `version` property
+        had the given value.
+
+    Returns:
+      A string containing a serialized
+      [`GraphDef`](https://tensorflow.googlesource.com/tensorflow/+/master/tensorflow/core/framework/graph.proto)
+      protocol buffer.
+
+    Raises:
+      ValueError: If the `GraphDef` would be larger than 2GB.
+    """
+    pieces = []
+    bytesize = 0
+    for op in self._ops_since_version(from_version):
+      node_def_string = op._serialized_node_def()
+      header = _GRAPH_DEF_NODE_TAG + _encode_varint(len(node_def_string))
+      pieces.append(header)
+      pieces.append(node_def_string)
+      bytesize += len(header) + len(node_def_string)
+      if bytesize >= (1 << 31):
+        raise ValueError("GraphDef cannot be larger than 2GB.")
+    return "".join(pieces)
+
+  def _ops_since_version(self, from_version=None):
+    """Returns the ops added since `version` had the value `from_version`.
+
+    The cost of this method is proportional to the number of ops returned.
+
+    Args:
+      from_version: Optional.  If None, all ops in the graph are returned.
+
+    Returns:
+      A list of `Operation` objects, sorted by id.
+    """
+    if from_version is None:
+      return list(self._ops_by_id_log)
+    start = bisect.bisect(self._op_ids_log, from_version)
+    return self._ops_by_id_log[start:]
+
   # Helper functions to create operations.
   def create_op(self, op_type, inputs, dtypes,
                 input_types=None, name=None, attrs=None, op_def=None,
@@ -1944,13 +2288,21 @@ class Graph(object):
     """
     self._check_not_finalized()
     if name not in self._collections:
-      self._collections[name] = [value]
-    else:
-      self._collections[name].append(value)
+      self._collections[name] = _Collection()
+    items = self._collections[name]
+    index = self._collection_indices.get(name)
+    items.append(value)
+    if index is not None and index.version == items.version - 1:
+      index.add(len(items) - 1, value)
+      index.version = items.version
 
   def get_collection(self, name, scope=None):
     """Returns a list of values in the collection with the given `name`.
 
+    Scoped lookups use an index of the names of the values in the
+    collection, so their cost is logarithmic in the size of the collection
+    (plus the number of values returned).
+
     Args:
       key: The key for the collection. For example, the `GraphKeys` class
         contains many standard names for collections.
@@ -1966,11 +2318,52 @@ class Graph(object):
     if scope is None:
       return self._collections.get(name, list())
     else:
-      c = []
-      for item in self._collections.get(name, list()):
-        if hasattr(item, 'name') and item.name.startswith(scope):
-          c.append(item)
-      return c
+      items = self._collections.get(name, list())
+      return [items[i] for i in self._collection_positions(name, scope)]
+
+  def get_collection_view(self, name, scope=None):
+    """Returns a read-only view of the collection with the given `name`.
+
+    Unlike [`get_collection()`](#Graph.get_collection), this method never
+    copies the values in the collection. Without a `scope`, the view
+    reflects values that are added to the collection after it was created.
+
+    Args:
+      name: The key for the collection. For example, the `GraphKeys` class
+        contains many standard names for collections.
+      scope: (Optional.) If supplied, the view only contains the items
+        whose name begins with this string, at the time of the call.
+
+    Returns:
+      An immutable sequence of the values in the collection, in the order
+      under which they were collected.
+    """
+    if scope is None:
+      return _CollectionView(self._collections, name)
+    else:
+      return _CollectionView(self._collections, name,
+                             self._collection_positions(name, scope))
+
+  def _collection_positions(self, name, scope):
+    """Returns the positions of the items with the given scope in a collection.
+
+    Args:
+      name: The key for the collection.
+      scope: A string. The prefix of the names of the items to find.
+
+    Returns:
+      A sorted list of the positions in the collection of the items whose
+      name begins with `scope`.
+    """
+    items = self._collections.get(name)
+    if not items:
+      return []
+    index = self._collection_indices.get(name)
+    if index is None or index.version != items.version:
+      # The list returned by get_collection() may have been modified in place.
+      index = _CollectionIndex(items)
+      self._collection_indices[name] = index
+    return index.positions_with_prefix(items, scope)
 
   @contextlib.contextmanager
   def _original_op(self, op):
@@ -1,6 +1,7 @@
 """Tests for tensorflow.python.framework.ops."""
 import tensorflow.python.platform
 
+from tensorflow.core.framework import graph_pb2
 from tensorflow.python.framework import device as pydev
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import tensor_shape
@@ -85,6 +86,23 @@ class OperationTest(test_util.TensorFlowTestCase):
 
     self.assertProtoEquals("op:'noop' name:'myop'", op.node_def)
 
+  def testCompactRepresentation(self):
+    g = ops.Graph()
+    op1 = ops.Operation(ops._NodeDef("noop", "myop1"), g, [], [types.float32])
+    float_t, = op1.values()
+    self.assertFalse(hasattr(op1, "__dict__"))
+    self.assertFalse(hasattr(float_t, "__dict__"))
+    self.assertEquals([], float_t.consumers())
+
+    op2 = ops.Operation(ops._NodeDef("reop", "myop2"), g, [float_t], [])
+    self.assertEquals([op2], float_t.consumers())
+    op3 = ops.Operation(ops._NodeDef("noop", "myop3"), g, [], [types.float32])
+    op2._update_input(0, op3.outputs[0])
+    self.assertEquals([], float_t.consumers())
+    self.assertEquals([op2], op3.outputs[0].consumers())
+    self.assertProtoEquals("op:'reop' name:'myop2' input:'myop3'",
+                           op2.node_def)
+
   def testNoOutputs(self):
     g = ops.Graph()
     op1 = ops.Operation(
@@ -542,6 +560,65 @@ class CollectionTest(test_util.TensorFlowTestCase):
     self.assertEquals([27, blank1, blank2], g.get_collection("blah"))
     self.assertEquals([blank1], g.get_collection("blah", "prefix"))
 
+  def testScopedLookup(self):
+    g = ops.Graph()
+    b1 = ObjectWithName("b/1")
+    a1 = ObjectWithName("a/1")
+    g.add_to_collection("blah", b1)
+    g.add_to_collection("blah", a1)
+    g.add_to_collection("blah", 27)
+    self.assertEquals([b1], g.get_collection("blah", "b/"))
+    # Values added after the first scoped lookup are indexed.
+    b2 = ObjectWithName("b/2")
+    ab = ObjectWithName("ab")
+    g.add_to_collection("blah", ab)
+    g.add_to_collection("blah", b2)
+    g.add_to_collection("blah", ObjectWithName("c"))
+    self.assertEquals([b1, b2], g.get_collection("blah", "b/"))
+    self.assertEquals([a1, ab], g.get_collection("blah", "a"))
+    self.assertEquals([], g.get_collection("blah", "d"))
+    # Modifying the collection in place is reflected in scoped lookups.
+    d = ObjectWithName("d")
+    g.get_collection("blah")[0] = d
+    self.assertEquals([b2], g.get_collection("blah", "b/"))
+    self.assertEquals([d], g.get_collection("blah", "d"))
+    del g.get_collection("blah")[-3:]
+    self.assertEquals([], g.get_collection("blah", "b/"))
+    # Including by items without a name.
+    g.get_collection("blah")[0] = 12
+    self.assertEquals([], g.get_collection("blah", "d"))
+    g.get_collection("blah").append(d)
+    self.assertEquals([d], g.get_collection("blah", "d"))
+
+  def testGetCollectionView(self):
+    g = ops.Graph()
+    blank1 = ObjectWithName("prefix/foo")
+    blank2 = ObjectWithName("junk/foo")
+    g.add_to_collection("blah", 27)
+    g.add_to_collection("blah", blank1)
+    view = g.get_collection_view("blah")
+    scoped_view = g.get_collection_view("blah", "prefix")
+    g.add_to_collection("blah", blank2)
+    self.assertEquals([27, blank1, blank2], list(view))
+    self.assertEquals(3, len(view))
+    self.assertEquals(blank2, view[-1])
+    self.assertEquals([blank1], list(scoped_view))
+    self.assertEquals(blank1, scoped_view[0])
+    self.assertEquals(0, len(g.get_collection_view("nothing")))
+    self.assertEquals([], list(g.get_collection_view("nothing", "prefix")))
+    with self.assertRaises(TypeError):
+      view[0] = 12
+
+  def testGetCollectionViewBeforeTheFirstAdd(self):
+    g = ops.Graph()
+    view = g.get_collection_view("blah")
+    self.assertEquals([], list(view))
+    g.add_to_collection("blah", 27)
+    g.add_to_collection("blah", 28)
+    self.assertEquals([27, 28], list(view))
+    self.assertEquals(2, len(view))
+    self.assertEquals(28, view[-1])
+
   def testDefaulGraph(self):
     with ops.Graph().as_default():
       ops.add_to_collection("key", 90)
@@ -789,6 +866,65 @@ class GraphTest(test_util.TensorFlowTestCase):
     self.assertRaises(ValueError, ops.assert_same_graph, [sparse, a, c])
     self.assertRaises(ValueError, ops.assert_same_graph, [sparse, a, c], g1)
 
+  def testAsGraphDefFromVersion(self):
+    g = ops.Graph()
+    g.create_op("a", [], [types.float32], name="a")
+    version = g.version
+    b = g.create_op("b", [], [types.float32], name="b")
+    g.create_op("c", [b.outputs[0]], [types.float32], name="c")
+    self.assertEqual(["a", "b", "c"],
+                     [n.name for n in g.as_graph_def().node])
+    self.assertEqual(["b", "c"],
+                     [n.name for n in g.as_graph_def(version).node])
+    self.assertEqual([], list(g.as_graph_def(g.version).node))
+
+  def testAsSerializedGraphDef(self):
+    g = ops.Graph()
+    a = g.create_op("a", [], [types.float32], name="a")
+    version = g.version
+    b = g.create_op("b", [a.outputs[0]], [types.float32], name="b")
+    self.assertEqual(g.as_graph_def().SerializeToString(),
+                     g._as_serialized_graph_def())
+    self.assertEqual(g.as_graph_def(version).SerializeToString(),
+                     g._as_serialized_graph_def(version))
+    # Modifying an op after it has been serialized invalidates the cache.
+    b._set_device("/cpu:0")
+    b._add_control_input(a)
+    graph_def = graph_pb2.GraphDef()
+    graph_def.ParseFromString(g._as_serialized_graph_def(version))
+    self.assertProtoEquals(
+        "node { name: 'b' op: 'b' input: 'a' input: '^a' device: '/cpu:0' }",
+        graph_def)
+
+  def testTracebackMode(self):
+    g = ops.Graph()
+    full = g.create_op("a", [], [types.float32])
+    # The innermost frames are the op constructor and its callers.
+    self.assertEqual(["testTracebackMode", "create_op", "__init__"],
+                     [frame[2] for frame in full.traceback[-3:]])
+    self.assertIsNotNone(full._traceback[-1][3])
+
+    g.set_traceback_mode("compact")
+    compact = g.create_op("a", [], [types.float32])
+    self.assertIsNone(compact._traceback[-1][3])
+    self.assertEqual("testTracebackMode", compact.traceback[-3][2])
+    self.assertEqual(
+        'compact = g.create_op("a", [], [types.float32])',
+        compact.traceback[-3][3])
+
+    g.set_traceback_mode("none")
+    self.assertEqual([], g.create_op("a", [], [types.float32]).traceback)
+
+    g.set_traceback_mode("compact", sample_interval=3)
+    recorded = [bool(g.create_op("a", [], [types.float32]).traceback)
+                for _ in xrange(6)]
+    self.assertEqual(2, sum(recorded))
+
+    with self.assertRaises(ValueError):
+      g.set_traceback_mode("partial")
+    with self.assertRaises(ValueError):
+      g.set_traceback_mode("full", sample_interval=0)
+
 ops.RegisterShape("KernelLabel")(common_shapes.scalar_shape)
 
 
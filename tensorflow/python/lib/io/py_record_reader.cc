@@ -1,7 +1,15 @@
 #include "tensorflow/python/lib/io/py_record_reader.h"
 
+#include <string.h>
+#include <algorithm>
+#include <memory>
+
+#include "tensorflow/core/lib/core/coding.h"
+#include "tensorflow/core/lib/core/errors.h"
 #include "tensorflow/core/lib/core/stringpiece.h"
+#include "tensorflow/core/lib/hash/crc32c.h"
 #include "tensorflow/core/lib/io/record_reader.h"
+#include "tensorflow/core/lib/io/zlib_file.h"
 #include "tensorflow/core/platform/port.h"
 #include "tensorflow/core/public/env.h"
 
@@ -11,18 +19,89 @@ class RandomAccessFile;
 
 namespace io {
 
+namespace {
+
+// The size of the blocks that BufferedRandomAccessFile reads.
+const size_t kBufferSize = 256 << 10;
+
+// The sizes of the fields that frame each record.
+const size_t kHeaderSize = sizeof(uint64) + sizeof(uint32);
+const size_t kFooterSize = sizeof(uint32);
+
+// A RandomAccessFile that reads another one in large blocks, so that reading
+// consecutive small records makes few calls to the underlying file.  Bytes
+// past the end of the file when a block was read are read again, so the file
+// may be appended to.  Not safe for concurrent use by multiple threads.
+class BufferedRandomAccessFile : public RandomAccessFile {
+ public:
+  // Takes ownership of "file".
+  explicit BufferedRandomAccessFile(RandomAccessFile* file)
+      : file_(file), buffer_offset_(0) {}
+
+  Status Read(uint64 offset, size_t n, StringPiece* result,
+              char* scratch) const override {
+    if (n > kBufferSize / 2) {
+      return file_->Read(offset, n, result, scratch);
+    }
+    if (offset < buffer_offset_ ||
+        offset + n > buffer_offset_ + buffer_.size()) {
+      buffer_.resize(kBufferSize);
+      StringPiece data;
+      Status s = file_->Read(offset, kBufferSize, &data, &buffer_[0]);
+      if (!s.ok() && !errors::IsOutOfRange(s)) {
+        buffer_.clear();
+        return s;
+      }
+      if (data.data() != buffer_.data()) {
+        memmove(&buffer_[0], data.data(), data.size());
+      }
+      buffer_.resize(data.size());
+      buffer_offset_ = offset;
+    }
+    const size_t start = offset - buffer_offset_;
+    const size_t available = std::min(n, buffer_.size() - start);
+    *result = StringPiece(buffer_.data() + start, available);
+    if (available < n) {
+      return errors::OutOfRange("Read less bytes than requested");
+    }
+    return Status::OK();
+  }
+
+ private:
+  std::unique_ptr<RandomAccessFile> file_;
+  mutable string buffer_;
+  mutable uint64 buffer_offset_;
+
+  TF_DISALLOW_COPY_AND_ASSIGN(BufferedRandomAccessFile);
+};
+
+}  // namespace
+
 PyRecordReader::PyRecordReader() {}
 
 PyRecordReader* PyRecordReader::New(const string& filename,
-                                    uint64 start_offset) {
+                                    uint64 start_offset,
+                                    const string& compression_type) {
+  ZlibFormat format;
+  if (!compression_type.empty() &&
+      !ParseZlibFormat(compression_type, &format).ok()) {
+    return nullptr;
+  }
   RandomAccessFile* file;
   Status s = Env::Default()->NewRandomAccessFile(filename, &file);
   if (!s.ok()) {
     return nullptr;
   }
   PyRecordReader* reader = new PyRecordReader;
+  reader->filename_ = filename;
   reader->offset_ = start_offset;
-  reader->file_ = file;
+  reader->compressed_ = !compression_type.empty();
+  if (reader->compressed_) {
+    // ZlibInputFile already reads the file in large blocks.
+    reader->file_ = new ZlibInputFile(file, format);
+  } else {
+    reader->file_ = new BufferedRandomAccessFile(file);
+  }
   reader->reader_ = new RecordReader(reader->file_);
   return reader;
 }
@@ -38,6 +117,59 @@ bool PyRecordReader::GetNext() {
   return s.ok();
 }
 
+void PyRecordReader::GetNextBatch(int max_records, uint64 max_bytes,
+                                  uint64 end_offset, string* batch,
+                                  string* ends) {
+  batch->clear();
+  ends->clear();
+  if (reader_ == nullptr) return;
+  for (int i = 0; i < max_records && batch->size() < max_bytes &&
+                  offset_ < end_offset;
+       ++i) {
+    Status s = reader_->ReadRecord(&offset_, &record_);
+    if (!s.ok()) break;
+    batch->append(record_);
+    core::PutFixed64(ends, batch->size());
+  }
+}
+
+bool PyRecordReader::SeekToNextRecord(uint64 offset) {
+  if (reader_ == nullptr || compressed_) return false;
+  uint64 file_size;
+  if (!Env::Default()->GetFileSize(filename_, &file_size).ok()) {
+    offset_ = offset;
+    return false;
+  }
+  string scratch(kHeaderSize, '\0');
+  for (uint64 candidate = offset; candidate + kHeaderSize <= file_size;
+       ++candidate) {
+    // Most candidates are rejected by the checksum of the length, without
+    // reading the record.
+    StringPiece header;
+    if (!file_->Read(candidate, kHeaderSize, &header, &scratch[0]).ok()) {
+      break;
+    }
+    const uint64 length = core::DecodeFixed64(header.data());
+    const uint32 masked_crc = core::DecodeFixed32(header.data() +
+                                                  sizeof(uint64));
+    const uint64 remaining = file_size - candidate - kHeaderSize;
+    if (crc32c::Unmask(masked_crc) !=
+            crc32c::Value(header.data(), sizeof(uint64)) ||
+        remaining < kFooterSize || length > remaining - kFooterSize) {
+      continue;
+    }
+    // Also check the checksum of the data, so that the chance of taking bytes
+    // inside a record for the start of a record is negligible.
+    uint64 record_offset = candidate;
+    if (reader_->ReadRecord(&record_offset, &record_).ok()) {
+      offset_ = candidate;
+      return true;
+    }
+  }
+  offset_ = std::max(offset, file_size);
+  return false;
+}
+
 void PyRecordReader::Close() {
   delete reader_;
   delete file_;
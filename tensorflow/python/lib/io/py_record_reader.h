@@ -18,7 +18,10 @@ class RecordReader;
 // by multiple threads.
 class PyRecordReader {
  public:
-  static PyRecordReader* New(const string& filename, uint64 start_offset);
+  // Returns nullptr if the file cannot be opened, or if "compression_type" is
+  // not empty, "ZLIB" or "GZIP".
+  static PyRecordReader* New(const string& filename, uint64 start_offset,
+                             const string& compression_type);
   ~PyRecordReader();
 
   // Attempt to get the next record at "current_offset()".  If
@@ -31,13 +34,37 @@ class PyRecordReader {
   // Return the current offset in the file.
   uint64 offset() const { return offset_; }
 
+  // Attempt to get up to "max_records" records, starting at
+  // "current_offset()", that start before "end_offset".  The records are
+  // concatenated in "*batch", and the end of each record in "*batch" is
+  // stored in "*ends" as a little-endian fixed64.  No more records are read
+  // once "*batch" holds at least "max_bytes" bytes.  Otherwise, fewer than
+  // "max_records" records are read only at "end_offset", at the end of the
+  // file, or at a truncated or corrupted record.
+  void GetNextBatch(int max_records, uint64 max_bytes, uint64 end_offset,
+                    string* batch, string* ends);
+
+  // Continue reading from "offset", which must be the offset of a record, as
+  // returned by "offset()".
+  void Seek(uint64 offset) { offset_ = offset; }
+
+  // Seek to the first record that starts at or after "offset", which may be
+  // any byte offset in the file.  Records are recognized by their checksums,
+  // so that several readers can split a file by byte ranges.  Returns false
+  // if there is no such record, in which case reading continues from the end
+  // of the file, or from "offset" if that is beyond it.  Compressed files
+  // cannot be split, so for them this always returns false.
+  bool SeekToNextRecord(uint64 offset);
+
   // Close the underlying file and release its resources.
   void Close();
 
  private:
   PyRecordReader();
 
+  string filename_;
   uint64 offset_;
+  bool compressed_;
   RandomAccessFile* file_;    // Owned
   io::RecordReader* reader_;  // Owned
   string record_;
@@ -1,4 +1,6 @@
 %nothread tensorflow::io::PyRecordReader::GetNext;
+%nothread tensorflow::io::PyRecordReader::GetNextBatch;
+%nothread tensorflow::io::PyRecordReader::SeekToNextRecord;
 
 %include "tensorflow/python/platform/base.i"
 
@@ -18,6 +20,25 @@
   Py_END_ALLOW_THREADS
 }
 
+%feature("except") tensorflow::io::PyRecordReader::GetNextBatch {
+  // Let other threads run while we read
+  Py_BEGIN_ALLOW_THREADS
+  $action
+  Py_END_ALLOW_THREADS
+}
+
+%feature("except") tensorflow::io::PyRecordReader::SeekToNextRecord {
+  // Let other threads run while we scan
+  Py_BEGIN_ALLOW_THREADS
+  $action
+  Py_END_ALLOW_THREADS
+}
+
+// GetNextBatch returns the batch and the ends of its records as a list of two
+// strings.
+%apply string* OUTPUT { string* batch };
+%apply string* OUTPUT { string* ends };
+
 %{
 #include "tensorflow/python/lib/io/py_record_reader.h"
 %}
@@ -29,6 +50,9 @@
 %unignore tensorflow::io::PyRecordReader;
 %unignore tensorflow::io::PyRecordReader::~PyRecordReader;
 %unignore tensorflow::io::PyRecordReader::GetNext;
+%unignore tensorflow::io::PyRecordReader::GetNextBatch;
+%unignore tensorflow::io::PyRecordReader::Seek;
+%unignore tensorflow::io::PyRecordReader::SeekToNextRecord;
 %unignore tensorflow::io::PyRecordReader::offset;
 %unignore tensorflow::io::PyRecordReader::record;
 %unignore tensorflow::io::PyRecordReader::Close;
@@ -3,6 +3,7 @@
 #include "tensorflow/core/lib/core/stringpiece.h"
 #include "tensorflow/core/platform/port.h"
 #include "tensorflow/core/lib/io/record_writer.h"
+#include "tensorflow/core/lib/io/zlib_file.h"
 #include "tensorflow/core/public/env.h"
 
 namespace tensorflow {
@@ -10,12 +11,21 @@ namespace io {
 
 PyRecordWriter::PyRecordWriter() {}
 
-PyRecordWriter* PyRecordWriter::New(const string& filename) {
+PyRecordWriter* PyRecordWriter::New(const string& filename,
+                                    const string& compression_type) {
+  ZlibFormat format;
+  if (!compression_type.empty() &&
+      !ParseZlibFormat(compression_type, &format).ok()) {
+    return nullptr;
+  }
   WritableFile* file;
   Status s = Env::Default()->NewWritableFile(filename, &file);
   if (!s.ok()) {
     return nullptr;
   }
+  if (!compression_type.empty()) {
+    file = new ZlibOutputFile(file, format);
+  }
   PyRecordWriter* writer = new PyRecordWriter;
   writer->file_ = file;
   writer->writer_ = new RecordWriter(writer->file_);
@@ -33,6 +43,12 @@ bool PyRecordWriter::WriteRecord(::tensorflow::StringPiece record) {
   return s.ok();
 }
 
+bool PyRecordWriter::Flush() {
+  if (file_ == nullptr) return false;
+  Status s = file_->Flush();
+  return s.ok();
+}
+
 void PyRecordWriter::Close() {
   delete writer_;
   delete file_;
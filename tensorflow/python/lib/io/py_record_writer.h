@@ -18,10 +18,15 @@ class RecordWriter;
 // by multiple threads.
 class PyRecordWriter {
  public:
-  static PyRecordWriter* New(const string& filename);
+  // Returns nullptr if the file cannot be created, or if "compression_type"
+  // is not empty, "ZLIB" or "GZIP".
+  static PyRecordWriter* New(const string& filename,
+                             const string& compression_type);
   ~PyRecordWriter();
 
   bool WriteRecord(::tensorflow::StringPiece record);
+  // Flush the records written so far to the file, so that they can be read.
+  bool Flush();
   void Close();
 
  private:
@@ -1,4 +1,5 @@
 %nothread tensorflow::io::PyRecordWriter::WriteRecord;
+%nothread tensorflow::io::PyRecordWriter::Flush;
 
 %include "tensorflow/python/platform/base.i"
 %include "tensorflow/python/lib/core/strings.i"
@@ -19,6 +20,13 @@
   Py_END_ALLOW_THREADS
 }
 
+%feature("except") tensorflow::io::PyRecordWriter::Flush {
+  // Let other threads run while we write
+  Py_BEGIN_ALLOW_THREADS
+  $action
+  Py_END_ALLOW_THREADS
+}
+
 %{
 #include "tensorflow/python/lib/io/py_record_writer.h"
 %}
@@ -30,6 +38,7 @@
 %unignore tensorflow::io::PyRecordWriter;
 %unignore tensorflow::io::PyRecordWriter::~PyRecordWriter;
 %unignore tensorflow::io::PyRecordWriter::WriteRecord;
+%unignore tensorflow::io::PyRecordWriter::Flush;
 %unignore tensorflow::io::PyRecordWriter::Close;
 %unignore tensorflow::io::PyRecordWriter::New;
 
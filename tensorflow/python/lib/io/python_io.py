@@ -6,6 +6,9 @@ suitable if fast sharding or other non-sequential access is desired.
 
 @@TFRecordWriter
 @@tf_record_iterator
+@@TFRecordBatchReader
+@@ShardedTFRecordWriter
+@@TFRecordCompressionType
 
 - - -
 
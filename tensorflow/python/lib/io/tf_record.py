@@ -1,13 +1,43 @@
 """For reading and writing TFRecords files."""
 
+import itertools
+import Queue
+import struct
+import sys
+import threading
+
+import numpy as np
+
 from tensorflow.python import pywrap_tensorflow
 
+# How many records, and bytes of records, `tf_record_iterator` reads at once.
+_ITERATOR_BATCH_RECORDS = 1024
+_ITERATOR_BATCH_BYTES = 16 << 20
+
+# An offset beyond the end of any file.
+_MAX_OFFSET = 2**64 - 1
+
+# The bytes that frame each record in a TFRecords file.
+_RECORD_OVERHEAD_BYTES = 16
+
+
+class TFRecordCompressionType(object):
+  """The compression types of TFRecords files.
+
+  A compressed file holds a TFRecords file compressed in the zlib or gzip
+  format, and can only be read with the same compression type.
+  """
+  NONE = ""
+  ZLIB = "ZLIB"
+  GZIP = "GZIP"
+
 
-def tf_record_iterator(path):
+def tf_record_iterator(path, compression_type=None):
   """An iterator that read the records from a TFRecords file.
 
   Args:
     path: The path to the TFRecords file.
+    compression_type: The `TFRecordCompressionType` of the file (optional).
 
   Yields:
     Strings.
@@ -15,12 +45,165 @@ def tf_record_iterator(path):
   Raises:
     IOError: If `path` cannot be opened for reading.
   """
-  reader = pywrap_tensorflow.PyRecordReader_New(path, 0)
-  if reader is None:
-    raise IOError("Could not open %s." % path)
-  while reader.GetNext():
-    yield reader.record()
-  reader.Close()
+  reader = TFRecordBatchReader(path, compression_type=compression_type)
+  while True:
+    records = reader.read_batch(_ITERATOR_BATCH_RECORDS,
+                                max_bytes=_ITERATOR_BATCH_BYTES)
+    if not records:
+      break
+    for record in records:
+      yield record
+  reader.close()
+
+
+class TFRecordBatchReader(object):
+  """A class to read batches of records from a TFRecords file.
+
+  Reading a batch makes one call to the C++ reader, which reads the file in
+  large blocks and lets other Python threads run while it reads. This is much
+  faster than reading the records one at a time.
+
+  The reader can continue from an offset that it returned earlier, and can
+  find the first record after any byte offset, so that several workers can
+  split a file by byte ranges. Each record is read by the worker whose range
+  it starts in:
+
+  ```python
+  size = os.path.getsize(path)
+  start, end = size * i // num_workers, size * (i + 1) // num_workers
+  with TFRecordBatchReader(path) as reader:
+    reader.seek_to_next_record(start)
+    records = reader.read_batch(end_offset=end)
+    while records:
+      ...
+      records = reader.read_batch(end_offset=end)
+  ```
+
+  Compressed files are read the same way, but offsets are offsets in the
+  uncompressed records, and they cannot be split by byte ranges. Seeking back
+  in a compressed file decompresses it again from its start.
+
+  This class implements `__enter__` and `__exit__`, and can be used
+  in `with` blocks like a normal file.
+
+  @@__init__
+  @@read_batch
+  @@read_batch_buffer
+  @@offset
+  @@seek
+  @@seek_to_next_record
+  @@close
+  """
+
+  def __init__(self, path, start_offset=0, compression_type=None):
+    """Opens file `path` and creates a `TFRecordBatchReader` reading it.
+
+    Args:
+      path: The path to the TFRecords file.
+      start_offset: The offset of the first record to read, as returned by
+        `offset()`.
+      compression_type: The `TFRecordCompressionType` of the file (optional).
+
+    Raises:
+      IOError: If `path` cannot be opened for reading.
+      ValueError: If `compression_type` is not a `TFRecordCompressionType`.
+    """
+    _check_compression_type(compression_type)
+    self._compressed = bool(compression_type)
+    self._reader = pywrap_tensorflow.PyRecordReader_New(
+        path, start_offset, compression_type or "")
+    if self._reader is None:
+      raise IOError("Could not open %s." % path)
+
+  def __enter__(self):
+    """Enter a `with` block."""
+    return self
+
+  def __exit__(self, unused_type, unused_value, unused_traceback):
+    """Exit a `with` block, closing the file."""
+    self.close()
+
+  def read_batch(self, max_records=1024, max_bytes=None, end_offset=None):
+    """Reads the next records.
+
+    Args:
+      max_records: The maximum number of records to read.
+      max_bytes: If not None, no more records are read once the records read
+        add up to at least this many bytes.
+      end_offset: If not None, only records that start before this offset are
+        read.
+
+    Returns:
+      A list of up to `max_records` strings. Fewer records are returned only
+      because of `max_bytes` or `end_offset`, or at the end of the file, or of
+      its complete and uncorrupted records. An empty list means that there are
+      no more records to read, for now.
+    """
+    batch, ends = self._read_batch(max_records, max_bytes, end_offset)
+    ends = struct.unpack("<%dQ" % (len(ends) // 8), ends)
+    return [batch[start:end] for start, end in zip((0,) + ends[:-1], ends)]
+
+  def read_batch_buffer(self, max_records=1024, max_bytes=None,
+                        end_offset=None):
+    """Reads the next records, concatenated in one string.
+
+    This avoids creating a Python string for each record.
+
+    Args:
+      max_records: The maximum number of records to read.
+      max_bytes: As for `read_batch`.
+      end_offset: As for `read_batch`.
+
+    Returns:
+      A `(buffer, ends)` tuple. `buffer` is a string that concatenates the
+      records that `read_batch` would return, and `ends` is a uint64 numpy
+      array of the offset in `buffer` of the end of each record.
+    """
+    batch, ends = self._read_batch(max_records, max_bytes, end_offset)
+    return batch, np.frombuffer(ends, dtype=np.dtype("<u8"))
+
+  def offset(self):
+    """Returns the offset of the next record to read."""
+    return self._reader.offset()
+
+  def seek(self, offset):
+    """Continues reading from `offset`, which was returned by `offset()`.
+
+    Args:
+      offset: The offset of the next record to read.
+    """
+    self._reader.Seek(offset)
+
+  def seek_to_next_record(self, offset):
+    """Continues reading from the first record that starts at or after `offset`.
+
+    Records are recognized by the checksums that frame them, so this scans
+    the file from `offset`, which may be any byte offset.
+
+    Args:
+      offset: The byte offset to start scanning from.
+
+    Returns:
+      True if a record was found. Otherwise, reading continues from the end of
+      the file.
+
+    Raises:
+      ValueError: If the file is compressed.
+    """
+    if self._compressed:
+      raise ValueError("Cannot scan for records in a compressed file.")
+    return self._reader.SeekToNextRecord(offset)
+
+  def close(self):
+    """Close the file."""
+    self._reader.Close()
+
+  def _read_batch(self, max_records, max_bytes, end_offset):
+    """Returns the strings `(batch, ends)` read by the C++ reader."""
+    return self._reader.GetNextBatch(
+        max_records,
+        _MAX_OFFSET if max_bytes is None else max_bytes,
+        _MAX_OFFSET if end_offset is None else end_offset)
 
 
 class TFRecordWriter(object):
@@ -31,19 +214,25 @@ class TFRecordWriter(object):
 
   @@__init__
   @@write
+  @@flush
   @@close
   """
   # TODO(josh11b): Support appending?
-  def __init__(self, path):
+  def __init__(self, path, compression_type=None):
     """Opens file `path` and creates a `TFRecordWriter` writing to it.
 
     Args:
       path: The path to the TFRecords file.
+      compression_type: The `TFRecordCompressionType` to compress the file
+        with (optional).
 
     Raises:
       IOError: If `path` cannot be opened for writing.
+      ValueError: If `compression_type` is not a `TFRecordCompressionType`.
     """
-    self._writer = pywrap_tensorflow.PyRecordWriter_New(path)
+    _check_compression_type(compression_type)
+    self._writer = pywrap_tensorflow.PyRecordWriter_New(
+        path, compression_type or "")
     if self._writer is None:
       raise IOError("Could not write to %s." % path)
 
@@ -63,6 +252,235 @@ class TFRecordWriter(object):
     """
     self._writer.WriteRecord(record)
 
+  def flush(self):
+    """Flush the records written so far to the file, so they can be read."""
+    self._writer.Flush()
+
   def close(self):
     """Close the file."""
     self._writer.Close()
+
+
+class ShardedTFRecordWriter(object):
+  """A class to write records to several TFRecords files in parallel.
+
+  Each shard is written by its own background thread, which also compresses
+  the records if asked to, so that one Python thread can produce records much
+  faster than a single `TFRecordWriter` can write them. Records are assigned
+  to shards round-robin, or by the hash of a key, so that all the records
+  with the same key go to the same shard, in the order they were written.
+
+  Shard `i` of `n` is written to files named `path-0000i-of-0000n-0000p`. The
+  part number `p` is 0, unless `max_shard_bytes` is given, in which case a
+  shard rolls over to its next part once a part holds that many bytes of
+  uncompressed records. Use `paths()` to list the files written.
+
+  This class implements `__enter__` and `__exit__`, and can be used
+  in `with` blocks like a normal file.
+
+  @@__init__
+  @@write
+  @@flush
+  @@close
+  @@paths
+  """
+
+  def __init__(self, path, num_shards, max_shard_bytes=None,
+               compression_type=None, max_queue=100):
+    """Creates a `ShardedTFRecordWriter` and starts its threads.
+
+    Args:
+      path: The prefix of the paths of the TFRecords files.
+      num_shards: The number of shards, and of threads writing them.
+      max_shard_bytes: If not None, a shard rolls over to a new file once the
+        current one holds at least this many bytes of uncompressed records.
+      compression_type: The `TFRecordCompressionType` to compress the files
+        with (optional).
+      max_queue: The maximum number of records pending for each shard before
+        `write` blocks.
+
+    Raises:
+      ValueError: If `num_shards` is less than 1, or `compression_type` is not
+        a `TFRecordCompressionType`.
+    """
+    if num_shards < 1:
+      raise ValueError("num_shards must be at least 1, was %s" % num_shards)
+    _check_compression_type(compression_type)
+    self._next_shard = itertools.count()
+    self._closed = False
+    self._threads = [
+        _ShardWriterThread(path, shard, num_shards, max_shard_bytes,
+                           compression_type, max_queue)
+        for shard in xrange(num_shards)]
+    for thread in self._threads:
+      thread.start()
+
+  def __enter__(self):
+    """Enter a `with` block."""
+    return self
+
+  def __exit__(self, unused_type, unused_value, unused_traceback):
+    """Exit a `with` block, closing the files."""
+    self.close()
+
+  def write(self, record, key=None):
+    """Queues a string record to be written to one of the shards.
+
+    Args:
+      record: str
+      key: If not None, the record is written to the shard that `hash(key)`
+        picks. Otherwise, shards are picked round-robin.
+
+    Raises:
+      IOError: If a shard could not be written.
+      ValueError: If the writer is closed.
+    """
+    if self._closed:
+      raise ValueError("Write to a closed ShardedTFRecordWriter.")
+    if key is None:
+      shard = next(self._next_shard) % len(self._threads)
+    else:
+      shard = hash(key) % len(self._threads)
+    thread = self._threads[shard]
+    thread.raise_error()
+    thread.queue.put(record)
+
+  def flush(self):
+    """Waits for the queued records to be written, and flushes the files.
+
+    Raises:
+      IOError: If a shard could not be written.
+    """
+    if self._closed:
+      return
+    for thread in self._threads:
+      thread.queue.put(_FLUSH)
+    self._join_queues()
+
+  def close(self):
+    """Writes the queued records, closes the files and stops the threads.
+
+    Raises:
+      IOError: If a shard could not be written.
+    """
+    if self._closed:
+      return
+    self._closed = True
+    for thread in self._threads:
+      thread.queue.put(_CLOSE)
+    for thread in self._threads:
+      thread.join()
+    self._join_queues()
+
+  def paths(self):
+    """Returns the paths of the files written so far, in order."""
+    paths = []
+    for thread in self._threads:
+      paths.extend(thread.paths())
+    return sorted(paths)
+
+  def _join_queues(self):
+    """Waits for the queued records, and raises the first error found."""
+    for thread in self._threads:
+      thread.queue.join()
+    for thread in self._threads:
+      thread.raise_error()
+
+
+# Queued for a _ShardWriterThread to flush or close its file.
+_FLUSH = object()
+_CLOSE = object()
+
+
+class _ShardWriterThread(threading.Thread):
+  """Thread that writes the records queued for one shard."""
+
+  def __init__(self, path, shard, num_shards, max_shard_bytes,
+               compression_type, max_queue):
+    """Creates a _ShardWriterThread.
+
+    Args:
+      path: The prefix of the paths of the files.
+      shard: The index of the shard.
+      num_shards: The number of shards.
+      max_shard_bytes: The size at which files roll over, or None.
+      compression_type: The `TFRecordCompressionType` of the files.
+      max_queue: The maximum number of records queued.
+    """
+    threading.Thread.__init__(self)
+    self.daemon = True
+    self.queue = Queue.Queue(max_queue)
+    self._path_prefix = "%s-%05d-of-%05d" % (path, shard, num_shards)
+    self._max_shard_bytes = max_shard_bytes
+    self._compression_type = compression_type
+    # Protects _paths and _exc_info.
+    self._lock = threading.Lock()
+    self._paths = []
+    # The exc_info of the first error, which stops the writes to the shard.
+    self._exc_info = None
+    self._writer = None
+    self._written_bytes = 0
+
+  def paths(self):
+    """Returns the paths of the files written so far."""
+    with self._lock:
+      return list(self._paths)
+
+  def raise_error(self):
+    """Raises the first error that the thread met, if any."""
+    with self._lock:
+      exc_info = self._exc_info
+    if exc_info:
+      raise exc_info[0], exc_info[1], exc_info[2]
+
+  def run(self):
+    while True:
+      item = self.queue.get()
+      try:
+        # After an error, only close the file.
+        if self._exc_info is None or item is _CLOSE:
+          self._process(item)
+      except Exception:  # pylint: disable=broad-except
+        with self._lock:
+          if self._exc_info is None:
+            self._exc_info = sys.exc_info()
+      finally:
+        self.queue.task_done()
+      if item is _CLOSE:
+        break
+
+  def _process(self, item):
+    """Writes a record, or flushes or closes the current file."""
+    if item is _FLUSH:
+      if self._writer:
+        self._writer.flush()
+    elif item is _CLOSE:
+      if self._writer:
+        self._writer.close()
+        self._writer = None
+    else:
+      if self._writer is None or (
+          self._max_shard_bytes is not None and
+          self._written_bytes >= self._max_shard_bytes):
+        self._roll_over()
+      self._writer.write(item)
+      self._written_bytes += len(item) + _RECORD_OVERHEAD_BYTES
+
+  def _roll_over(self):
+    """Closes the current file, if any, and starts the next one."""
+    if self._writer:
+      self._writer.close()
+      self._writer = None
+    path = "%s-%05d" % (self._path_prefix, len(self._paths))
+    self._writer = TFRecordWriter(path, self._compression_type)
+    self._written_bytes = 0
+    with self._lock:
+      self._paths.append(path)
+
+
+def _check_compression_type(compression_type):
+  """Raises a ValueError if `compression_type` is not supported."""
+  if compression_type not in (None, TFRecordCompressionType.NONE,
+                              TFRecordCompressionType.ZLIB,
+                              TFRecordCompressionType.GZIP):
+    raise ValueError("Unsupported compression type: %r" % compression_type)
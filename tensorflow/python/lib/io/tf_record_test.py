@@ -0,0 +1,191 @@
+"""Tests for tf_record."""
+import os.path
+import zlib
+
+from tensorflow.python.framework import test_util
+from tensorflow.python.lib.io import tf_record
+from tensorflow.python.platform import googletest
+
+
+class TFRecordBatchReaderTest(test_util.TensorFlowTestCase):
+
+  def setUp(self):
+    super(TFRecordBatchReaderTest, self).setUp()
+    self._path = os.path.join(self.get_temp_dir(), "records")
+    self._records = ["record %d " % i * (i % 7) for i in xrange(100)]
+    writer = tf_record.TFRecordWriter(self._path)
+    for record in self._records:
+      writer.write(record)
+    writer.close()
+
+  def testIterator(self):
+    self.assertEqual(self._records,
+                     list(tf_record.tf_record_iterator(self._path)))
+
+  def testReadBatch(self):
+    with tf_record.TFRecordBatchReader(self._path) as reader:
+      self.assertEqual(self._records[:30], reader.read_batch(30))
+      self.assertEqual(self._records[30:], reader.read_batch(100))
+      self.assertEqual([], reader.read_batch(100))
+
+  def testReadBatchBuffer(self):
+    with tf_record.TFRecordBatchReader(self._path) as reader:
+      buf, ends = reader.read_batch_buffer(10)
+    self.assertEqual("".join(self._records[:10]), buf)
+    self.assertEqual(10, len(ends))
+    starts = [0] + list(ends[:-1])
+    self.assertEqual(self._records[:10],
+                     [buf[start:end] for start, end in zip(starts, ends)])
+
+  def testMaxBytes(self):
+    with tf_record.TFRecordBatchReader(self._path) as reader:
+      # Stops after the record that reaches max_bytes.
+      self.assertEqual(self._records[:3], reader.read_batch(100, max_bytes=10))
+
+  def testOffsetAndSeek(self):
+    with tf_record.TFRecordBatchReader(self._path) as reader:
+      reader.read_batch(40)
+      offset = reader.offset()
+      self.assertEqual(self._records[40:50], reader.read_batch(10))
+      reader.seek(offset)
+      self.assertEqual(self._records[40:50], reader.read_batch(10))
+    with tf_record.TFRecordBatchReader(self._path, offset) as reader:
+      self.assertEqual(self._records[40:], reader.read_batch(100))
+
+  def testSplitByByteRanges(self):
+    size = os.path.getsize(self._path)
+    for num_workers in [1, 2, 3, 7, size]:
+      records = []
+      for i in xrange(num_workers):
+        start, end = size * i // num_workers, size * (i + 1) // num_workers
+        with tf_record.TFRecordBatchReader(self._path) as reader:
+          found = reader.seek_to_next_record(start)
+          batch = reader.read_batch(7, end_offset=end)
+          if not found:
+            self.assertEqual([], batch)
+          while batch:
+            records.extend(batch)
+            batch = reader.read_batch(7, end_offset=end)
+      self.assertEqual(self._records, records)
+
+  def testSeekToNextRecordPastLastRecord(self):
+    with tf_record.TFRecordBatchReader(self._path) as reader:
+      self.assertFalse(
+          reader.seek_to_next_record(os.path.getsize(self._path) - 1))
+      self.assertEqual([], reader.read_batch(10))
+
+
+class CompressedTFRecordTest(test_util.TensorFlowTestCase):
+
+  def setUp(self):
+    super(CompressedTFRecordTest, self).setUp()
+    self._records = ["record %d " % i * (i % 7) for i in xrange(100)]
+
+  def _Write(self, compression_type):
+    path = os.path.join(self.get_temp_dir(), "records" + compression_type)
+    writer = tf_record.TFRecordWriter(path, compression_type)
+    for record in self._records:
+      writer.write(record)
+    writer.close()
+    return path
+
+  def testRoundTrip(self):
+    for compression_type in [tf_record.TFRecordCompressionType.ZLIB,
+                             tf_record.TFRecordCompressionType.GZIP]:
+      path = self._Write(compression_type)
+      self.assertEqual(
+          self._records,
+          list(tf_record.tf_record_iterator(path, compression_type)))
+
+  def testZlibFormat(self):
+    path = self._Write(tf_record.TFRecordCompressionType.ZLIB)
+    uncompressed_path = self._Write(tf_record.TFRecordCompressionType.NONE)
+    with open(path, "rb") as f, open(uncompressed_path, "rb") as g:
+      self.assertEqual(g.read(), zlib.decompress(f.read()))
+
+  def testSeek(self):
+    path = self._Write(tf_record.TFRecordCompressionType.GZIP)
+    with tf_record.TFRecordBatchReader(
+        path, compression_type=tf_record.TFRecordCompressionType.GZIP) as r:
+      r.read_batch(40)
+      offset = r.offset()
+      self.assertEqual(self._records[40:50], r.read_batch(10))
+      r.seek(offset)
+      self.assertEqual(self._records[40:50], r.read_batch(10))
+      r.seek(0)
+      self.assertEqual(self._records, r.read_batch(100))
+      with self.assertRaises(ValueError):
+        r.seek_to_next_record(0)
+
+  def testUnsupportedCompressionType(self):
+    with self.assertRaises(ValueError):
+      tf_record.TFRecordWriter(os.path.join(self.get_temp_dir(), "bz2"), "BZ2")
+
+
+class ShardedTFRecordWriterTest(test_util.TensorFlowTestCase):
+
+  def setUp(self):
+    super(ShardedTFRecordWriterTest, self).setUp()
+    self._path = os.path.join(self.get_temp_dir(), "sharded")
+
+  def _ReadShards(self, writer, compression_type=None):
+    return [list(tf_record.tf_record_iterator(path, compression_type))
+            for path in writer.paths()]
+
+  def testRoundRobin(self):
+    with tf_record.ShardedTFRecordWriter(self._path, 3) as writer:
+      for i in xrange(10):
+        writer.write(str(i))
+    self.assertEqual([self._path + "-00000-of-00003-00000",
+                      self._path + "-00001-of-00003-00000",
+                      self._path + "-00002-of-00003-00000"], writer.paths())
+    self.assertEqual([["0", "3", "6", "9"], ["1", "4", "7"], ["2", "5", "8"]],
+                     self._ReadShards(writer))
+
+  def testKeys(self):
+    with tf_record.ShardedTFRecordWriter(self._path, 4) as writer:
+      for i in xrange(100):
+        writer.write("%d" % i, key=i % 10)
+    for shard, records in enumerate(self._ReadShards(writer)):
+      # All the records with a key are in its shard, in order.
+      self.assertEqual(sorted(records, key=int), records)
+      for record in records:
+        self.assertEqual(shard, hash(int(record) % 10) % 4)
+
+  def testRollover(self):
+    compression_type = tf_record.TFRecordCompressionType.ZLIB
+    with tf_record.ShardedTFRecordWriter(
+        self._path, 2, max_shard_bytes=100,
+        compression_type=compression_type) as writer:
+      for i in xrange(20):
+        writer.write("x" * 40, key=0)
+        writer.write("y" * 40, key=1)
+    # Parts roll over after two records of 40 bytes and 16 bytes of framing.
+    self.assertEqual(20, len(writer.paths()))
+    self.assertEqual(self._path + "-00001-of-00002-00009", writer.paths()[-1])
+    self.assertEqual([["x" * 40] * 2] * 10 + [["y" * 40] * 2] * 10,
+                     self._ReadShards(writer, compression_type))
+
+  def testFlush(self):
+    writer = tf_record.ShardedTFRecordWriter(self._path, 2)
+    writer.write("a")
+    writer.write("b")
+    writer.flush()
+    self.assertEqual([["a"], ["b"]], self._ReadShards(writer))
+    writer.close()
+    writer.close()
+    with self.assertRaises(ValueError):
+      writer.write("c")
+
+  def testWriteError(self):
+    writer = tf_record.ShardedTFRecordWriter(
+        os.path.join(self.get_temp_dir(), "missing", "sharded"), 1)
+    writer.write("a")
+    with self.assertRaises(IOError):
+      writer.flush()
+    with self.assertRaises(IOError):
+      writer.close()
+
+
+if __name__ == "__main__":
+  googletest.main()
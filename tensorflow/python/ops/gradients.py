@@ -1,6 +1,7 @@
 """Implements the graph generation for computation of gradients."""
 
 import collections
+import math
 import warnings
 
 import tensorflow.python.platform
@@ -75,29 +76,55 @@ def _IndexedSlicesToTensor(value, dtype=None, name=None):
 ops.register_tensor_conversion_function(ops.IndexedSlices, _IndexedSlicesToTensor)
 
 
-def _MarkReachedOps(from_ops, reached_ops):
+def _MarkReachedOps(from_ops, reached_ops, within_ops=None):
   """Mark all ops reached from "from_ops".
 
+  Ops that are already marked are not searched again.
+
   Args:
     from_ops: list of Operations.
-    reached_ops: list of booleans, indexed by operation id.
+    reached_ops: set of operation ids, to which the reached ops are added.
+    within_ops: optional set of operation ids. If not None, only these ops
+      are searched.
   """
   queue = collections.deque()
   queue.extend(from_ops)
   while queue:
     op = queue.popleft()
-    if not reached_ops[op._id]:
-      reached_ops[op._id] = True
+    if op._id not in reached_ops and (within_ops is None or
+                                      op._id in within_ops):
+      reached_ops.add(op._id)
       for output in op.outputs:
         queue.extend(output.consumers())
 
 
+def _MarkInputOps(to_ops):
+  """Returns the ids of "to_ops" and of all the ops that they depend on.
+
+  Args:
+    to_ops: list of Operations.
+
+  Returns:
+    A set of operation ids.
+  """
+  input_ops = set()
+  queue = collections.deque()
+  queue.extend(to_ops)
+  while queue:
+    op = queue.popleft()
+    if op._id not in input_ops:
+      input_ops.add(op._id)
+      for inp in op.inputs:
+        queue.append(inp.op)
+  return input_ops
+
+
 def _GatherInputs(to_ops, reached_ops):
   """List all inputs of to_ops that are in reached_ops.
 
   Args:
     to_ops: list of Operations.
-    reached_ops: list of booleans, indexed by operation id.
+    reached_ops: set of operation ids.
 
   Returns:
     The list of all inputs of to_ops that are in reached_ops.
@@ -109,10 +136,10 @@ def _GatherInputs(to_ops, reached_ops):
   while queue:
     op = queue.popleft()
     # We are interested in this op.
-    if reached_ops[op._id]:
+    if op._id in reached_ops:
       inputs.append(op)
-      # Clear the boolean so we won't add the inputs again.
-      reached_ops[op._id] = False
+      # Remove the id so we won't add the inputs again.
+      reached_ops.remove(op._id)
       for inp in op.inputs:
         queue.append(inp.op)
   return inputs
@@ -135,54 +162,58 @@ def _GetGradsDevice(op, colocate_gradients_with_ops):
     return op.graph.get_default_device()
 
 
-def _PendingCount(graph, to_ops, from_ops):
+def _PendingCount(to_ops, from_ops):
   """Initialize the pending count for ops between two lists of Operations.
 
   'pending_count[op._id]' indicates the number of backprop inputs
   to this operation.
 
+  The cost is proportional to the number of ops that to_ops depend on, rather
+  than to the size of the graph, so that building the gradients of one tower
+  or bucket of a large model is cheap.
+
   Args:
-    graph: a Graph.
     to_ops: list of Operations.
     from_ops: list of Operations.
 
   Returns:
-    A tuple containing: (1) a list of integers indexed by operation id,
+    A tuple containing: (1) a defaultdict of integers keyed by operation id,
     indicating the number of backprop inputs to this operation, and (2)
     a boolean which is True if any of the ops in between from_ops and to_ops
     contain control flow loops.
   """
-  # Mark reachable ops from from_ops.
-  reached_ops = [False] * (graph._last_id + 1)
-  for op in to_ops:
-    reached_ops[op._id] = True
-  _MarkReachedOps(from_ops, reached_ops)
+  # Mark reachable ops from from_ops. Only the ops that to_ops depend on can
+  # be between from_ops and to_ops, so the search is limited to them, rather
+  # than reaching e.g. the ops of every tower that uses the same variables.
+  reached_ops = set(op._id for op in to_ops)
+  _MarkReachedOps(from_ops, reached_ops, _MarkInputOps(to_ops))
 
   # Mark between ops.
-  between_ops = [False] * (graph._last_id + 1)
+  between_ops = set()
   between_op_list = []
   queue = collections.deque()
   queue.extend(to_ops)
   while queue:
     op = queue.popleft()
     # We are interested in this op.
-    if reached_ops[op._id]:
-      between_ops[op._id] = True
+    if op._id in reached_ops:
+      between_ops.add(op._id)
       between_op_list.append(op)
-      # Clear the boolean so we won't add the inputs again.
-      reached_ops[op._id] = False
+      # Remove the id so we won't add the inputs again.
+      reached_ops.remove(op._id)
       for inp in op.inputs:
         queue.append(inp.op)
 
-  # Initialize pending count for between ops.
-  pending_count = [0] * (graph._last_id + 1)
+  # Initialize pending count for between ops. Ops that are not between have
+  # a count of 0, which goes negative as their consumers are processed.
+  pending_count = collections.defaultdict(int)
   has_control_flow = False
   for op in between_op_list:
     for x in op.inputs:
-      if between_ops[x.op._id]:
+      if x.op._id in between_ops:
         pending_count[x.op._id] += 1
     for x in op.control_inputs:
-      if between_ops[x._id]:
+      if x._id in between_ops:
         pending_count[x._id] += 1
     if op.type == "Exit":
       has_control_flow = True
@@ -264,7 +295,7 @@ def _StopOps(from_ops, pending_count):
 
   Args:
     from_ops: list of Operations.
-    pending_count: List of integers, indexed by operation id.
+    pending_count: defaultdict of integers, keyed by operation id.
 
   Returns:
     The set of operations.
@@ -281,10 +312,234 @@ def _StopOps(from_ops, pending_count):
   return stop_ops
 
 
+def _IsRecomputable(op):
+  """Whether the outputs of op can be recomputed by a copy of it."""
+  # pylint: disable=protected-access
+  return (len(op.inputs) > 0 and op.op_def is not None and
+          not op.op_def.is_stateful and
+          op._get_control_flow_context() is None)
+  # pylint: enable=protected-access
+
+
+def _AutoCheckpoints(between_ops, recomputable):
+  """Picks checkpoints about every sqrt(N) of the N recomputable ops.
+
+  Only the outputs of recomputable ops that are the only tensors passed from
+  the ops before them to the ops after them, like the state of an unrolled RNN
+  between two timesteps, are picked: recomputing the tensors after any other
+  tensor would need tensors from before it too.
+
+  Args:
+    between_ops: The list of ops between the xs and the ys, sorted by id,
+      which is a topological order.
+    recomputable: The set of ids of the ops whose outputs can be recomputed.
+
+  Returns:
+    A list of `Tensor`s.
+  """
+  position = dict((op._id, i) for i, op in enumerate(between_ops))
+  # The outputs of recomputable ops that are used by later ops, by the
+  # position of their op, and the number of them that are last used at each
+  # position.
+  opened = [[] for _ in between_ops]
+  num_closed = collections.defaultdict(int)
+  for i, op in enumerate(between_ops):
+    if op._id in recomputable:
+      for t in op.outputs:
+        last_use = max([position.get(c._id, -1) for c in t.consumers()] +
+                       [-1])
+        if last_use > i:
+          opened[i].append(t)
+          num_closed[last_use] += 1
+
+  stride = int(math.ceil(math.sqrt(len(recomputable))))
+  checkpoints = []
+  num_open = 0
+  num_since_checkpoint = 0
+  for i, op in enumerate(between_ops):
+    num_open += len(opened[i]) - num_closed[i]
+    if op._id in recomputable:
+      num_since_checkpoint += 1
+    if (num_open == 1 and len(opened[i]) == 1 and
+        num_since_checkpoint >= stride):
+      checkpoints.append(opened[i][0])
+      num_since_checkpoint = 0
+  return checkpoints
+
+
+class _RecomputedTensors(object):
+  """The inputs or outputs of an op, recomputed when they are accessed."""
+
+  def __init__(self, tensors, recompute):
+    self._tensors = tensors
+    self._recompute = recompute
+
+  def __len__(self):
+    return len(self._tensors)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [self._recompute(t) for t in self._tensors[index]]
+    return self._recompute(self._tensors[index])
+
+  def __iter__(self):
+    return (self._recompute(t) for t in self._tensors)
+
+
+class _RecomputedOpWrapper(object):
+  """An op whose inputs and outputs are recomputed for its gradient function.
+
+  All the other attributes are the ones of the op.
+  """
+
+  def __init__(self, op, recompute):
+    self._op = op
+    self._inputs = _RecomputedTensors(list(op.inputs), recompute)
+    self._outputs = _RecomputedTensors(op.outputs, recompute)
+
+  @property
+  def inputs(self):
+    return self._inputs
+
+  @property
+  def outputs(self):
+    return self._outputs
+
+  @property
+  def op(self):
+    return self._op
+
+  def __getattr__(self, name):
+    return getattr(self._op, name)
+
+
+class _Recomputer(object):
+  """Recomputes the forward tensors between checkpoints for backprop.
+
+  The gradient functions get the forward tensors that are not checkpoints
+  from copies of the forward ops, which only run once the backward pass
+  reaches the ops that need them. The forward tensors themselves are then
+  only used by the forward pass, so they can be freed as soon as it has used
+  them, and only the tensors between two checkpoints are alive at once.
+  """
+
+  def __init__(self, graph, to_ops, from_ops, pending_count, checkpoints,
+               scope):
+    """Prepares to recompute the ops between from_ops and to_ops.
+
+    Args:
+      graph: The Graph of the ops.
+      to_ops: list of Operations.
+      from_ops: list of Operations, whose outputs are never recomputed.
+      pending_count: The pending count of `_PendingCount(to_ops, from_ops)`,
+        before backprop updates it.
+      checkpoints: A list of `Tensor`s that are not recomputed, or "auto".
+      scope: The name scope of the gradients, ending in "/".
+    """
+    self._graph = graph
+    # The ops between from_ops and to_ops are to_ops, and the inputs of the
+    # ops between them.
+    between_ids = set(op._id for op in to_ops)
+    between_ids.update(op_id for op_id, count in pending_count.iteritems()
+                       if count > 0)
+    # pylint: disable=protected-access
+    between_ops = [graph._nodes_by_id[op_id] for op_id in sorted(between_ids)]
+    # pylint: enable=protected-access
+    from_ids = set(op._id for op in from_ops)
+    self._recomputable = set(op._id for op in between_ops
+                             if op._id not in from_ids and _IsRecomputable(op))
+    if checkpoints == "auto":
+      checkpoints = _AutoCheckpoints(between_ops, self._recomputable)
+      if not checkpoints:
+        # Everything would be recomputed at the start of backprop.
+        logging.warning("Found no checkpoints between %s and %s, so the "
+                        "gradients will not recompute any tensor.",
+                        [op.name for op in from_ops],
+                        [op.name for op in to_ops])
+        self._recomputable = set()
+    self._checkpoints = set(_AsList(checkpoints))
+    self._scope = scope + "recompute/"
+    # The copies of the ops, keyed by the id of the op.
+    self._copies = {}
+
+  def Wrap(self, op, out_grads):
+    """Returns the op to pass to the gradient function of op.
+
+    Args:
+      op: An Operation.
+      out_grads: The gradients of the outputs of op. The recomputed tensors
+        that op needs are only computed once they are available.
+
+    Returns:
+      An object like op, whose inputs and outputs are recomputed.
+    """
+    gates = []
+    for grad in out_grads:
+      if isinstance(grad, ops.IndexedSlices):
+        gates.append(grad.values.op)
+      elif grad:
+        gates.append(grad.op)
+    return _RecomputedOpWrapper(op, lambda t: self._Recompute(t, gates))
+
+  def _NeedsRecompute(self, t):
+    return t.op._id in self._recomputable and t not in self._checkpoints
+
+  def _Get(self, t):
+    """Returns the copy of t if it is recomputed, and t otherwise."""
+    if self._NeedsRecompute(t):
+      return self._copies[t.op._id].outputs[t.value_index]
+    return t
+
+  def _Recompute(self, t, gates):
+    """Returns the copy of t, after gates if it is not recomputed yet."""
+    if self._NeedsRecompute(t) and t.op._id not in self._copies:
+      with ops.name_scope(self._scope):
+        # Copy the ops that t depends on since the checkpoints, inputs first.
+        stack = [t.op]
+        while stack:
+          op = stack[-1]
+          if op._id in self._copies:
+            stack.pop()
+            continue
+          missing = [x.op for x in op.inputs if self._NeedsRecompute(x) and
+                     x.op._id not in self._copies]
+          if missing:
+            stack.extend(missing)
+          else:
+            stack.pop()
+            self._copies[op._id] = self._Copy(op, gates)
+    return self._Get(t)
+
+  def _Copy(self, op, gates):
+    """Copies op, with the copies of its inputs."""
+    inputs = [self._Get(x) for x in op.inputs]
+    attrs = dict((key, op.node_def.attr[key]) for key in op.node_def.attr)
+    # pylint: disable=protected-access
+    with self._graph._original_op(op):
+      copy = self._graph.create_op(
+          op.type, inputs, [t.dtype for t in op.outputs],
+          input_types=op._input_dtypes, name=op.name, attrs=attrs,
+          op_def=op.op_def)
+    copy._set_device(op.device)
+    for control_input in op.control_inputs:
+      copy._add_control_input(control_input)
+    if not any(self._NeedsRecompute(x) for x in op.inputs):
+      # The first ops of a segment wait for the backward pass to reach it, so
+      # that the segment is not recomputed right after the forward pass.
+      for gate in gates:
+        copy._add_control_input(gate)
+    # pylint: enable=protected-access
+    for t, copied_t in zip(op.outputs, copy.outputs):
+      copied_t.set_shape(t.get_shape())
+    return copy
+
+
 def gradients(ys, xs, grad_ys=None, name="gradients",
               colocate_gradients_with_ops=False,
               gate_gradients=False,
-              aggregation_method=None):
+              aggregation_method=None,
+              aggregation_fan_in=None,
+              checkpoints=None):
   """Constructs symbolic partial derivatives of `ys` w.r.t. x in `xs`.
 
   `ys` and `xs` are each a `Tensor` or a list of tensors.  `grad_ys`
@@ -317,6 +572,19 @@ def gradients(ys, xs, grad_ys=None, name="gradients",
       for an operations.  This avoids some race conditions.
     aggregation_method: Specifies the method used to combine gradient terms.
       Accepted values are constants defined in the class `AggregationMethod`.
+    aggregation_fan_in: Optional. The maximum number of gradient terms that
+      each sum adds with the `EXPERIMENTAL_BALANCED_TREE` and
+      `EXPERIMENTAL_DEDUPE_INDEXED_SLICES` aggregation methods. Must be at
+      least 2, defaults to 8.
+    checkpoints: Optional. A list of tensors between `xs` and `ys` to keep for
+      the backward pass, or "auto". If set, the other forward tensors that
+      the gradient functions use are recomputed from the checkpoints when the
+      backward pass reaches them, so that they can be freed as soon as the
+      forward pass has used them: this trades compute for memory. "auto"
+      picks checkpoints about every sqrt(N) of the N ops between `xs` and
+      `ys`, among the tensors that are the only ones passed from the ops
+      before them to the ops after them, like the state of an unrolled RNN.
+      Ops that are stateful, like random ops, are never recomputed.
 
   Returns:
     A list of `sum(dy/dx)` for each x in `xs`.
@@ -324,7 +592,8 @@ def gradients(ys, xs, grad_ys=None, name="gradients",
   Raises:
     LookupError: if one of the operations between `x` and `y` does not
       have a registered gradient function.
-    ValueError: if the arguments are invalid.
+    ValueError: if the arguments are invalid, or if `checkpoints` is set and
+      there are control flow loops between `xs` and `ys`.
 
   """
   ys = _AsList(ys)
@@ -333,7 +602,7 @@ def gradients(ys, xs, grad_ys=None, name="gradients",
     grad_ys = [None] * len(ys)
   else:
     grad_ys = _AsList(grad_ys)
-  with ops.op_scope(ys + xs + grad_ys, name, "gradients"):
+  with ops.op_scope(ys + xs + grad_ys, name, "gradients") as grad_scope:
     ys = ops.convert_n_to_tensor_or_indexed_slices(ys, name="y")
     xs = ops.convert_n_to_tensor_or_indexed_slices(xs, name="x")
     grad_ys = _DefaultGradYs(grad_ys, ys, colocate_gradients_with_ops)
@@ -349,8 +618,14 @@ def gradients(ys, xs, grad_ys=None, name="gradients",
     # to the xs.
     to_ops = [t.op for t in ys]
     from_ops = [t.op for t in xs]
-    pending_count, has_control_flow = _PendingCount(
-        ops.get_default_graph(), to_ops, from_ops)
+    pending_count, has_control_flow = _PendingCount(to_ops, from_ops)
+    recomputer = None
+    if checkpoints is not None:
+      if has_control_flow:
+        raise ValueError("checkpoints are not supported for gradients through "
+                         "control flow loops")
+      recomputer = _Recomputer(ops.get_default_graph(), to_ops, from_ops,
+                               pending_count, checkpoints, grad_scope)
 
     # Iterate over the collected ops.
     #
@@ -382,7 +657,7 @@ def gradients(ys, xs, grad_ys=None, name="gradients",
         if has_control_flow:
           control_flow_ops.EnterGradWhileContext(op)
         out_grads = _AggregatedGrads(grads, op, has_control_flow,
-                                     aggregation_method)
+                                     aggregation_method, aggregation_fan_in)
         grad_fn = None
         if any(out_grads) and op._id not in stop_ops:
           # A grad_fn must be defined, either as a function or as None
@@ -411,6 +686,8 @@ def gradients(ys, xs, grad_ys=None, name="gradients",
               op_wrapper = op
               if has_control_flow:
                 op_wrapper = control_flow_ops.MakeWrapper(op)
+              elif recomputer:
+                op_wrapper = recomputer.Wrap(op, out_grads)
               in_grads = _AsList(grad_fn(op_wrapper, *out_grads))
               _VerifyGeneratedGradients(in_grads, op)
               if gate_gradients and len(in_grads) > 1:
@@ -510,15 +787,77 @@ class AggregationMethod(object):
      operation using the "AddN" op. It has the property that all
      gradients must be ready before any aggregation is performed.
   *  `DEFAULT`: The system-chosen default aggregation method.
+
+  The following methods are experimental:
+
+  *  `EXPERIMENTAL_TREE`: The gradient terms are summed one after the
+     other, so that each one can be released as soon as it was added.
+  *  `EXPERIMENTAL_ACCUMULATE_N`: The gradient terms are summed with the
+     "AccumulateN" op when their shape is known, and as with
+     `EXPERIMENTAL_TREE` otherwise.
+  *  `EXPERIMENTAL_BALANCED_TREE`: The gradient terms are summed by a
+     balanced tree of "AddN" ops, each of which adds at most
+     `aggregation_fan_in` terms that were computed one after the other. A
+     larger fan-in makes the tree shallower, but keeps more terms alive until
+     they are added.
+  *  `EXPERIMENTAL_DEDUPE_INDEXED_SLICES`: Like `EXPERIMENTAL_BALANCED_TREE`,
+     but the sum of `IndexedSlices` gradient terms also adds the slices with
+     the same index, so that it contains each index at most once.
   """
   ADD_N = 0
   DEFAULT = ADD_N
   # The following are experimental and may not be supported in future releases.
   EXPERIMENTAL_TREE = 1
   EXPERIMENTAL_ACCUMULATE_N = 2
+  EXPERIMENTAL_BALANCED_TREE = 3
+  EXPERIMENTAL_DEDUPE_INDEXED_SLICES = 4
+
+
+# The default maximum number of gradient terms that each sum of the
+# EXPERIMENTAL_BALANCED_TREE aggregation method adds.
+_DEFAULT_AGGREGATION_FAN_IN = 8
 
 
-def _AggregatedGrads(grads, op, has_control_flow, aggregation_method=None):
+def _BalancedAddN(inputs, fan_in):
+  """Sums `inputs` with a balanced tree of AddN ops.
+
+  Each AddN adds at most `fan_in` consecutive inputs, or partial sums of
+  them. Consecutive gradient terms are usually computed one after the other,
+  so each AddN of the first level can run, and release its inputs, as soon as
+  its own inputs are ready.
+
+  Args:
+    inputs: A list of at least one `Tensor`.
+    fan_in: The maximum number of inputs of each AddN, at least 2.
+
+  Returns:
+    A `Tensor`, the sum of `inputs`.
+  """
+  while len(inputs) > 1:
+    inputs = [math_ops.add_n(inputs[i:i + fan_in]) if i + 1 < len(inputs)
+              else inputs[i]
+              for i in xrange(0, len(inputs), fan_in)]
+  return inputs[0]
+
+
+def _DedupeIndexedSlices(value):
+  """Sums the slices of the IndexedSlices `value` that have the same index.
+
+  Args:
+    value: An `IndexedSlices`.
+
+  Returns:
+    An `IndexedSlices` with the same dense value as `value`, in which each
+    index appears at most once.
+  """
+  unique_indices, new_index_positions = array_ops.unique(value.indices)
+  summed_values = math_ops.unsorted_segment_sum(
+      value.values, new_index_positions, array_ops.size(unique_indices))
+  return ops.IndexedSlices(summed_values, unique_indices, value.dense_shape)
+
+
+def _AggregatedGrads(grads, op, has_control_flow, aggregation_method=None,
+                     aggregation_fan_in=None):
   """Get the aggregated gradients for op.
 
   Args:
@@ -527,6 +866,9 @@ def _AggregatedGrads(grads, op, has_control_flow, aggregation_method=None):
     has_control_flow: True iff the graph contains control flow ops.
     aggregation_method: Specifies the method used to combine gradient terms.
       Accepted values are constants defined in the class `AggregationMethod`.
+    aggregation_fan_in: The maximum number of gradient terms that each sum of
+      the `EXPERIMENTAL_BALANCED_TREE` and `EXPERIMENTAL_DEDUPE_INDEXED_SLICES`
+      methods adds, or None for the default.
 
   Returns:
     A list of gradients, one per each output of `op`. If the gradients
@@ -540,10 +882,18 @@ def _AggregatedGrads(grads, op, has_control_flow, aggregation_method=None):
   """
   if aggregation_method is None:
     aggregation_method = AggregationMethod.DEFAULT
-  if aggregation_method not in [AggregationMethod.ADD_N,
-                                AggregationMethod.EXPERIMENTAL_TREE,
-                                AggregationMethod.EXPERIMENTAL_ACCUMULATE_N]:
+  if aggregation_method not in [
+      AggregationMethod.ADD_N,
+      AggregationMethod.EXPERIMENTAL_TREE,
+      AggregationMethod.EXPERIMENTAL_ACCUMULATE_N,
+      AggregationMethod.EXPERIMENTAL_BALANCED_TREE,
+      AggregationMethod.EXPERIMENTAL_DEDUPE_INDEXED_SLICES]:
     raise ValueError("Invalid aggregation_method specified.")
+  if aggregation_fan_in is None:
+    aggregation_fan_in = _DEFAULT_AGGREGATION_FAN_IN
+  if aggregation_fan_in < 2:
+    raise ValueError("aggregation_fan_in must be at least 2, got %s" %
+                     aggregation_fan_in)
   out_grads = _GetGrads(grads, op)
   for i, out_grad in enumerate(out_grads):
     if has_control_flow:
@@ -590,6 +940,15 @@ def _AggregatedGrads(grads, op, has_control_flow, aggregation_method=None):
             for grad in out_grad[1:]:
               running_sum = math_ops.add_n([running_sum, grad])
             out_grads[i] = running_sum
+        elif aggregation_method in [
+            AggregationMethod.EXPERIMENTAL_BALANCED_TREE,
+            AggregationMethod.EXPERIMENTAL_DEDUPE_INDEXED_SLICES]:
+          # Unlike a single AddN, this does not keep all the gradients alive
+          # until the last one is computed, and unlike the pairwise sums
+          # above, its depth is only logarithmic in the number of gradients.
+          used = "balanced_tree"
+          with ops.name_scope(op.name + "_gradient_sum"):
+            out_grads[i] = _BalancedAddN(out_grad, aggregation_fan_in)
         else:
           used = "add_n"
           out_grads[i] = math_ops.add_n(out_grad)
@@ -604,6 +963,12 @@ def _AggregatedGrads(grads, op, has_control_flow, aggregation_method=None):
             array_ops.concat(0, [x.values for x in out_grad]),
             array_ops.concat(0, [x.indices for x in out_grad]),
             out_grad[0].dense_shape)
+        if (aggregation_method ==
+            AggregationMethod.EXPERIMENTAL_DEDUPE_INDEXED_SLICES):
+          # An index used by many lookups, like the embedding of a frequent
+          # word, would otherwise appear once per lookup in the gradient.
+          with ops.name_scope(op.name + "_gradient_sum"):
+            out_grads[i] = _DedupeIndexedSlices(out_grads[i])
     else:
       out_grads[i] = []
   return out_grads
@@ -40,13 +40,10 @@ def _OpsBetween(graph, to_ops, from_ops):
     TODO(touts): Think about returning an empty list if from_ops are not
     reachable from to_ops.  Presently it returns to_ops in that case.
   """
-  # List of booleans, indexed by operation id, indicating if
-  # an op is reached from the output of "input_ops".
-  reached_ops = [False] * (graph._last_id + 1)
+  # Set of the ids of the ops reached from the output of "input_ops".
   # We only care to reach up to "output_ops" so we mark the
   # output ops as reached to avoid recursing past them.
-  for op in to_ops:
-    reached_ops[op._id] = True
+  reached_ops = set(op._id for op in to_ops)
   gradients._MarkReachedOps(from_ops, reached_ops)
   between_ops = gradients._GatherInputs(to_ops, reached_ops)
   between_ops.sort(lambda x, y: y._id - x._id)
@@ -112,6 +109,19 @@ class GradientsTest(test_util.TensorFlowTestCase):
     self._assertOpListEqual([t6.op, t5.op, t4.op, t3.op, t2.op],
                             _OpsBetween(g, [t6.op], [t2.op, t5.op]))
 
+  def testPendingCountIgnoresUnrelatedOps(self):
+    with ops.Graph().as_default():
+      x = constant(1.0)
+      y1 = math_ops.square(math_ops.square(x))
+      # Another tower that uses x, which y1 does not depend on.
+      y2 = math_ops.square(math_ops.square(x))
+    pending_count, has_control_flow = gradients._PendingCount([y1.op],
+                                                              [x.op])
+    self.assertFalse(has_control_flow)
+    self.assertEqual({x.op._id: 1, y1.op.inputs[0].op._id: 1},
+                     dict(pending_count))
+    self.assertNotIn(y2.op.inputs[0].op._id, pending_count)
+
   def testGradients(self):
     with ops.Graph().as_default():
       inp = constant(1.0, shape=[32, 100], name="in")
@@ -222,6 +232,85 @@ class GradientsTest(test_util.TensorFlowTestCase):
       self.assertEqual(20.0, grads[0].eval())
       self.assertEqual(10.0, grads[1].eval())
 
+  def testAggregationMethodBalancedTree(self):
+    with self.test_session():
+      x = constant(1.0)
+      y = x * 2.0
+      z = y + y + y + y + y + y + y + y + y + y
+      grads = gradients.gradients(
+          z,
+          [x, y],
+          aggregation_method=
+          gradients.AggregationMethod.EXPERIMENTAL_BALANCED_TREE,
+          aggregation_fan_in=3)
+      self.assertTrue(all([x for x in grads]))
+      self.assertEqual(20.0, grads[0].eval())
+      self.assertEqual(10.0, grads[1].eval())
+      add_n_ops = [op for op in ops.get_default_graph().get_operations()
+                   if op.type == "AddN"]
+      # The 10 terms are summed by 3 sums of 3 terms, whose results are summed
+      # together, and then with the last term.
+      self.assertEqual(3 + 1 + 1, len(add_n_ops))
+      self.assertTrue(all([len(op.inputs) <= 3 for op in add_n_ops]))
+
+  def testAggregationFanInTooSmall(self):
+    with ops.Graph().as_default():
+      x = constant(1.0)
+      with self.assertRaisesRegexp(ValueError, "at least 2"):
+        gradients.gradients(
+            x + x, x,
+            aggregation_method=
+            gradients.AggregationMethod.EXPERIMENTAL_BALANCED_TREE,
+            aggregation_fan_in=1)
+
+  def testAggregationMethodDedupeIndexedSlices(self):
+    with self.test_session():
+      params = constant([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+      y = array_ops.gather(params, [0, 2]) + array_ops.gather(params, [2, 2])
+      grad = gradients.gradients(
+          y,
+          params,
+          aggregation_method=
+          gradients.AggregationMethod.EXPERIMENTAL_DEDUPE_INDEXED_SLICES)[0]
+      self.assertTrue(isinstance(grad, ops.IndexedSlices))
+      self.assertAllEqual([0, 2], grad.indices.eval())
+      self.assertAllClose([[1.0, 1.0], [3.0, 3.0]], grad.values.eval())
+
+  def testCheckpoints(self):
+    with self.test_session():
+      x = constant([0.1, 0.2, 0.3])
+      hs = [x]
+      for _ in xrange(8):
+        hs.append(math_ops.tanh(hs[-1]))
+      y = math_ops.reduce_sum(hs[-1])
+      expected = gradients.gradients(y, x)[0]
+      grad = gradients.gradients(y, x, name="checkpointed",
+                                 checkpoints=[hs[4]])[0]
+      self.assertAllClose(expected.eval(), grad.eval())
+      # The gradient ops only use the forward tensors that are checkpoints,
+      # and recomputed copies of the others.
+      forward = set(hs[1:])
+      for op in ops.get_default_graph().get_operations():
+        if (op.name.startswith("checkpointed/") and
+            not op.name.startswith("checkpointed/recompute/")):
+          for t in op.inputs:
+            self.assertTrue(t not in forward or t is hs[4], op.name)
+
+  def testAutoCheckpoints(self):
+    with self.test_session():
+      x = constant([0.1, 0.2, 0.3])
+      h = x
+      for _ in xrange(16):
+        h = math_ops.tanh(h)
+      y = math_ops.reduce_sum(h)
+      expected = gradients.gradients(y, x)[0]
+      grad = gradients.gradients(y, x, name="checkpointed",
+                                 checkpoints="auto")[0]
+      self.assertAllClose(expected.eval(), grad.eval())
+      self.assertTrue(any(
+          op.name.startswith("checkpointed/recompute/")
+          for op in ops.get_default_graph().get_operations()))
+
   def testNoGradientForStringOutputs(self):
     with ops.Graph().as_default() as g:
       @ops.RegisterGradient("TestOp")
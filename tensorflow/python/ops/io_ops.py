@@ -460,13 +460,17 @@ class TFRecordReader(ReaderBase):
   """
   # TODO(josh11b): Support serializing and restoring state.
 
-  def __init__(self, name=None):
+  def __init__(self, name=None, compression_type=None):
     """Create a TFRecordReader.
 
     Args:
       name: A name for the operation (optional).
+      compression_type: The compression of the files, from
+        `tf.python_io.TFRecordCompressionType`, such as those written by a
+        `TFRecordWriter` with the same `compression_type` (optional).
     """
-    rr = gen_io_ops._tf_record_reader(name=name)
+    rr = gen_io_ops._tf_record_reader(name=name,
+                                      compression_type=compression_type or "")
     super(TFRecordReader, self).__init__(rr)
 
 
@@ -292,6 +292,25 @@ def IsDirectory(path):   # pylint: disable=invalid-name
   return os.path.isdir(path)
 
 
+@_func_error_wrapper
+def ModificationTime(path):   # pylint: disable=invalid-name
+  """Returns the time at which "path" was last modified.
+
+  The modification time of a directory changes whenever an entry is added to,
+  removed from, or renamed in the directory.
+
+  Args:
+    path: The path of a file or directory.
+
+  Returns:
+    The modification time, in (fractional) seconds since the epoch.
+
+  Raises:
+    GOSError: If "path" does not exist.
+  """
+  return os.stat(path).st_mtime
+
+
 @_func_error_wrapper
 def Glob(glob):   # pylint: disable=invalid-name
   """Return a list of filenames matching the glob "glob"."""
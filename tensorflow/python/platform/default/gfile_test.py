@@ -113,6 +113,17 @@ class FunctionTests(_BaseTest, googletest.TestCase):
       pass
     self.assertTrue(gfile.Exists(self.tmp + "test_exists"))
 
+  def testModificationTime(self):
+    gfile.MkDir(self.tmp + "test_mtime")
+    os.utime(self.tmp + "test_mtime", (1000, 1000))
+    self.assertEqual(1000, gfile.ModificationTime(self.tmp + "test_mtime"))
+    with gfile.GFile(self.tmp + "test_mtime/file", "w"):
+      pass
+    self.assertNotEqual(1000, gfile.ModificationTime(self.tmp + "test_mtime"))
+    self.assertRaises(
+        gfile.GOSError,
+        lambda: gfile.ModificationTime(self.tmp + "file_doesnt_exist"))
+
   def testMkDirsGlobAndRmDirs(self):
     self.assertFalse(gfile.Exists(self.tmp + "test_dir"))
     gfile.MkDir(self.tmp + "test_dir")
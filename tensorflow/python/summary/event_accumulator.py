@@ -1,8 +1,16 @@
 """Takes a generator of values, and accumulates them for a frontend."""
 
 import collections
+import itertools
+import json
+import os
 import threading
+import time
+import zipfile
 
+import numpy as np
+
+from tensorflow.core.framework import graph_pb2
 from tensorflow.python.platform import gfile
 from tensorflow.python.platform import logging
 from tensorflow.python.summary.impl import directory_watcher
@@ -13,6 +21,157 @@ namedtuple = collections.namedtuple
 ScalarEvent = namedtuple('ScalarEvent',
                          ['wall_time', 'step', 'value'])
 
+
+class ScalarEvents(object):
+  """A sequence of `ScalarEvent`s, stored as parallel typed arrays.
+
+  The wall times, steps and values are kept in float64, int64 and float32
+  arrays, which take a small fraction of the memory of a list of
+  `ScalarEvent`s. Indexing and iterating produce `ScalarEvent`s, and the
+  container supports the list operations that reservoir sampling needs.
+
+  Readers that process many events at once should use the `wall_times`,
+  `steps` and `values` arrays instead of iterating over the events.
+
+  Appending or popping an event moves the contents of the arrays, so the
+  container must not be read while it is modified. `Snapshot()` returns a
+  copy of the columns.
+  """
+
+  _INITIAL_CAPACITY = 16
+
+  def __init__(self, events=()):
+    """Creates a `ScalarEvents` holding `events`.
+
+    Args:
+      events: An iterable of `ScalarEvent`s, or of `(wall_time, step, value)`
+        tuples.
+    """
+    self._size = 0
+    self._wall_times = np.empty(0, dtype=np.float64)
+    self._steps = np.empty(0, dtype=np.int64)
+    self._values = np.empty(0, dtype=np.float32)
+    for event in events:
+      self.append(event)
+
+  @property
+  def wall_times(self):
+    """The wall times of the events, as a float64 array.
+
+    Like the other array properties, this is a view of the current contents,
+    which must not be modified.
+    """
+    return self._wall_times[:self._size]
+
+  @property
+  def steps(self):
+    """The steps of the events, as an int64 array."""
+    return self._steps[:self._size]
+
+  @property
+  def values(self):
+    """The values of the events, as a float32 array."""
+    return self._values[:self._size]
+
+  def Snapshot(self):
+    """Returns copies of the wall times, steps and values arrays.
+
+    The copies are not affected by later changes to the container.
+    """
+    return (self.wall_times.copy(), self.steps.copy(), self.values.copy())
+
+  def __len__(self):
+    return self._size
+
+  def __iter__(self):
+    for i in xrange(self._size):
+      yield self._Event(i)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      events = ScalarEvents()
+      events.__setstate__(
+          (self.wall_times[index], self.steps[index], self.values[index]))
+      return events
+    return self._Event(self._Index(index))
+
+  def __setitem__(self, index, event):
+    if isinstance(index, slice):
+      if index != slice(None):
+        raise IndexError('ScalarEvents only supports assigning to [:]')
+      if isinstance(event, ScalarEvents):
+        # Copy, so that the two containers do not share arrays.
+        self.__setstate__(event.__getstate__())
+      else:
+        self._size = 0
+        for e in event:
+          self.append(e)
+      return
+    self._Set(self._Index(index), event)
+
+  def append(self, event):
+    """Appends a `ScalarEvent` or `(wall_time, step, value)` tuple."""
+    if self._size == len(self._wall_times):
+      self._Reserve(max(self._INITIAL_CAPACITY, 2 * self._size))
+    self._Set(self._size, event)
+    self._size += 1
+
+  def pop(self, index=-1):
+    """Removes and returns the event at `index`."""
+    index = self._Index(index)
+    event = self._Event(index)
+    # NumPy copies between overlapping slices of an array correctly, so this
+    # shifts the later events down in place, without allocating.
+    for array in self._wall_times, self._steps, self._values:
+      array[index:self._size - 1] = array[index + 1:self._size]
+    self._size -= 1
+    return event
+
+  def __eq__(self, other):
+    try:
+      return len(self) == len(other) and list(self) == list(other)
+    except TypeError:
+      return False
+
+  def __ne__(self, other):
+    return not self == other
+
+  def __repr__(self):
+    return 'ScalarEvents(%r)' % list(self)
+
+  def __getstate__(self):
+    return self.Snapshot()
+
+  def __setstate__(self, state):
+    self._wall_times, self._steps, self._values = [a.copy() for a in state]
+    self._size = len(self._wall_times)
+
+  def _Index(self, index):
+    if index < 0:
+      index += self._size
+    if not 0 <= index < self._size:
+      raise IndexError('ScalarEvents index out of range')
+    return index
+
+  def _Set(self, index, event):
+    wall_time, step, value = event
+    self._wall_times[index] = wall_time
+    self._steps[index] = step
+    self._values[index] = value
+
+  def _Event(self, index):
+    return ScalarEvent(wall_time=float(self._wall_times[index]),
+                       step=int(self._steps[index]),
+                       value=float(self._values[index]))
+
+  def _Reserve(self, capacity):
+    """Grows the arrays to hold `capacity` events."""
+    for name in '_wall_times', '_steps', '_values':
+      array = getattr(self, name)
+      resized = np.empty(capacity, dtype=array.dtype)
+      resized[:self._size] = array[:self._size]
+      setattr(self, name, resized)
+
 CompressedHistogramEvent = namedtuple('CompressedHistogramEvent',
                                       ['wall_time', 'step',
                                        'compressed_histogram_values'])
@@ -51,6 +210,23 @@ DEFAULT_SIZE_GUIDANCE = {
     HISTOGRAMS: 1,
 }
 
+# The maximum number of histograms that `Reload()` compresses in one batch.
+_HISTOGRAM_BATCH_SIZE = 1024
+
+# The source of the generations returned by `EventAccumulator.Generation()`.
+# A counter shared by all accumulators makes generations unique within a
+# process, so an accumulator that replaces another never reuses a generation.
+_GENERATIONS = itertools.count(1)
+
+# Notified whenever the generation of any `EventAccumulator` changes.
+_GENERATION_CHANGED = threading.Condition()
+
+# The version of the file format written by `EventAccumulator.SaveCache()`.
+_CACHE_VERSION = 2
+
+# The minimum time between the cache updates made by `Reload()`.
+_CACHE_SAVE_INTERVAL_SECS = 600
+
 STORE_EVERYTHING_SIZE_GUIDANCE = {
     COMPRESSED_HISTOGRAMS: 0,
     IMAGES: 0,
@@ -64,6 +240,39 @@ def IsTensorFlowEventsFile(path):
   return 'tfevents' in path
 
 
+def WaitForGeneration(generation_fn, generation, timeout=None):
+  """Waits until `generation_fn()` returns something other than `generation`.
+
+  `generation_fn` is called whenever the generation of any `EventAccumulator`
+  changes, so it may combine the generations of several accumulators, as
+  `EventMultiplexer.Generation` does.
+
+  Args:
+    generation_fn: A function that returns a generation, like
+      `EventAccumulator.Generation`.
+    generation: The generation to wait for a change from.
+    timeout: The number of seconds to wait for, or None to wait for as long as
+      it takes.
+
+  Returns:
+    The last value returned by `generation_fn`.
+  """
+  if timeout is not None:
+    deadline = time.time() + timeout
+  with _GENERATION_CHANGED:
+    current = generation_fn()
+    while current == generation:
+      if timeout is None:
+        _GENERATION_CHANGED.wait()
+      else:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+          break
+        _GENERATION_CHANGED.wait(remaining)
+      current = generation_fn()
+  return current
+
+
 class EventAccumulator(object):
   """An `EventAccumulator` takes an event generator, and accumulates the values.
 
@@ -95,8 +304,20 @@ class EventAccumulator(object):
   Histograms and images are very large, so storing all of them is not
   recommended.
 
+  If constructed with a `cache_path`, the `EventAccumulator` periodically saves
+  the data it holds, and the position in the event files that the data
+  reflects, to that file. The first `Reload()` of a new `EventAccumulator` for
+  the same path resumes from the cache, and only loads the events that were
+  written after it was saved.
+
   @@Reload
   @@AutoUpdate
+  @@SaveCache
+  @@OutstandingBytes
+  @@Generation
+  @@TagGenerations
+  @@GraphGeneration
+  @@WaitForChange
   @@Tags
   @@Scalars
   @@Graph
@@ -106,7 +327,8 @@ class EventAccumulator(object):
   """
 
   def __init__(self, path, size_guidance=DEFAULT_SIZE_GUIDANCE,
-               compression_bps=NORMAL_HISTOGRAM_BPS):
+               compression_bps=NORMAL_HISTOGRAM_BPS, cache_path=None,
+               directory_lister=None):
     """Construct the `EventAccumulator`.
 
     Args:
@@ -121,6 +343,12 @@ class EventAccumulator(object):
       compression_bps: Information on how the `EventAccumulator` should compress
         histogram data for the `CompressedHistograms` tag (for details see
         `ProcessCompressedHistogram`).
+      cache_path: If not None, the path of a file in which to cache the
+        accumulated data between runs of the program.
+      directory_lister: If `path` is a directory, the
+        `directory_lister.DirectoryLister` that lists it. It may be shared with
+        other `EventAccumulator`s. If None, the `EventAccumulator` creates its
+        own.
     """
     sizes = {}
     for key in DEFAULT_SIZE_GUIDANCE:
@@ -129,17 +357,28 @@ class EventAccumulator(object):
       else:
         sizes[key] = DEFAULT_SIZE_GUIDANCE[key]
 
-    self._scalars = reservoir.Reservoir(size=sizes[SCALARS])
+    self._scalars = reservoir.Reservoir(size=sizes[SCALARS],
+                                        items_factory=ScalarEvents)
     self._graph = None
     self._histograms = reservoir.Reservoir(size=sizes[HISTOGRAMS])
     self._compressed_histograms = reservoir.Reservoir(
         size=sizes[COMPRESSED_HISTOGRAMS])
     self._images = reservoir.Reservoir(size=sizes[IMAGES])
     self._generator_mutex = threading.Lock()
-    self._generator = _GeneratorFromPath(path)
+    self._generator = _GeneratorFromPath(path, directory_lister)
     self._is_autoupdating = False
     self._activated = False
     self._compression_bps = compression_bps
+    self._path = path
+    self._size_guidance = sizes
+    self._cache_path = cache_path
+    self._cache_checked = False
+    self._cache_save_time = 0
+    self._generation = next(_GENERATIONS)
+    # Maps each tag with data to the generation at which its data last changed.
+    self._tag_generations = {}
+    # The generation at which the graph last changed, or 0 without a graph.
+    self._graph_generation = 0
 
   def Reload(self):
     """Loads all events added since the last call to `Reload`.
@@ -152,25 +391,72 @@ class EventAccumulator(object):
     """
     self._activated = True
     with self._generator_mutex:
-      for event in self._generator.Load():
-        if event.HasField('graph_def'):
-          if self._graph is not None:
-            logging.warn(('Found more than one graph event per run.'
-                          'Overwritting the graph with the newest event'))
-          self._graph = event.graph_def
-        elif event.HasField('summary'):
-          for value in event.summary.value:
-            if value.HasField('simple_value'):
-              self._ProcessScalar(value.tag, event.wall_time, event.step,
-                                  value.simple_value)
-            elif value.HasField('histo'):
-              self._ProcessHistogram(value.tag, event.wall_time, event.step,
-                                     value.histo)
-              self._ProcessCompressedHistogram(value.tag, event.wall_time,
-                                               event.step, value.histo)
-            elif value.HasField('image'):
-              self._ProcessImage(value.tag, event.wall_time, event.step,
-                                 value.image)
+      if self._cache_path and not self._cache_checked:
+        self._cache_checked = True
+        self._RestoreCache()
+      changed_tags = set()
+      graph_changed = False
+      # Histograms are compressed in batches, which is much cheaper than
+      # compressing them one at a time.
+      pending_histograms = []
+      try:
+        for event in self._generator.Load():
+          if event.HasField('graph_def'):
+            if self._graph is not None:
+              logging.warn(('Found more than one graph event per run.'
+                            'Overwritting the graph with the newest event'))
+            self._graph = event.graph_def
+            graph_changed = True
+          elif event.HasField('summary'):
+            for value in event.summary.value:
+              if value.HasField('simple_value'):
+                self._ProcessScalar(value.tag, event.wall_time, event.step,
+                                    value.simple_value)
+                changed_tags.add(value.tag)
+              elif value.HasField('histo'):
+                self._ProcessHistogram(value.tag, event.wall_time, event.step,
+                                       value.histo)
+                pending_histograms.append(
+                    (value.tag, event.wall_time, event.step, value.histo))
+                if len(pending_histograms) >= _HISTOGRAM_BATCH_SIZE:
+                  self._ProcessCompressedHistograms(pending_histograms)
+                  pending_histograms = []
+                changed_tags.add(value.tag)
+              elif value.HasField('image'):
+                self._ProcessImage(value.tag, event.wall_time, event.step,
+                                   value.image)
+                changed_tags.add(value.tag)
+      finally:
+        self._ProcessCompressedHistograms(pending_histograms)
+        if changed_tags or graph_changed:
+          self._NewGeneration(changed_tags, graph_changed)
+      if (self._cache_path and (changed_tags or graph_changed) and
+          time.time() - self._cache_save_time >= _CACHE_SAVE_INTERVAL_SECS):
+        try:
+          self._SaveCache()
+        except (IOError, OSError, ValueError) as e:
+          logging.warning('Failed to save the cache %s: %s',
+                          self._cache_path, e)
+    return self
+
+  def SaveCache(self):
+    """Saves the accumulated data to the cache file.
+
+    `Reload` also saves the cache every so often, when it loads new events.
+
+    Raises:
+      ValueError: If the `EventAccumulator` has no `cache_path`, or its
+        path or tags cannot be encoded.
+      IOError: If the cache cannot be written.
+
+    Returns:
+      The `EventAccumulator`.
+    """
+    if not self._cache_path:
+      raise ValueError('This EventAccumulator was constructed without a '
+                       'cache_path')
+    with self._generator_mutex:
+      self._SaveCache()
     return self
 
   def AutoUpdate(self, interval=60):
@@ -203,6 +489,73 @@ class EventAccumulator(object):
     t.start()
     return self
 
+  def Generation(self, tag=None):
+    """Returns a number that increases whenever the accumulated data changes.
+
+    Generations are unique within a process: no two `EventAccumulator`s ever
+    return the same generation for their data. This makes them suitable for
+    keying caches of data derived from the accumulator.
+
+    Args:
+      tag: If not None, a string tag, whose data the generation is for.
+
+    Returns:
+      An integer generation, which is 0 for a tag without data.
+    """
+    if tag is None:
+      return self._generation
+    return self._tag_generations.get(tag, 0)
+
+  def TagGenerations(self):
+    """Returns the generations of all the tags with data.
+
+    Returns:
+      A `{tag: generation}` dictionary. See `Generation`.
+    """
+    with _GENERATION_CHANGED:
+      return dict(self._tag_generations)
+
+  def GraphGeneration(self):
+    """Returns a number that increases whenever the graph changes.
+
+    Unlike `Generation()`, it does not change when summaries are loaded, so
+    it can key caches of data derived from large graphs.
+
+    Returns:
+      An integer generation, which is 0 if there is no graph. See
+      `Generation`.
+    """
+    return self._graph_generation
+
+  def WaitForChange(self, tag=None, generation=None, timeout=None):
+    """Waits until the generation of the data differs from `generation`.
+
+    This lets clients wait for new data instead of polling for it.
+
+    Args:
+      tag: If not None, a string tag, whose data to wait for.
+      generation: The generation of the data that the caller already has, as
+        returned by `Generation(tag)`.
+      timeout: The number of seconds to wait for, or None to wait for as long
+        as it takes.
+
+    Returns:
+      The generation of the data, which equals `generation` only if the wait
+      timed out.
+    """
+    return WaitForGeneration(lambda: self.Generation(tag), generation, timeout)
+
+  def OutstandingBytes(self):
+    """Estimates how much new data `Reload` would load.
+
+    This does not block while the `EventAccumulator` is loading.
+
+    Returns:
+      The number of bytes written to the event files since `Reload` last
+      started reading them.
+    """
+    return self._generator.OutstandingBytes()
+
   def Tags(self):
     """Return all tags found in the value stream.
 
@@ -230,10 +583,11 @@ class EventAccumulator(object):
       RuntimeError: If the `EventAccumulator` has not been activated.
 
     Returns:
-      An array of `ScalarEvent`s.
+      A `ScalarEvents` sequence of `ScalarEvent`s. It is a copy, taken while
+      no event is being added, so later reloads do not change it.
     """
     self._VerifyActivated()
-    return self._scalars.Items(tag)
+    return self._scalars.Snapshot(tag)
 
   def Graph(self):
     """Return the graph definition, if there is one.
@@ -298,6 +652,149 @@ class EventAccumulator(object):
     self._VerifyActivated()
     return self._images.Items(tag)
 
+  def _Reservoirs(self):
+    """Returns a `{tagType: reservoir}` dictionary of all the reservoirs."""
+    return {SCALARS: self._scalars,
+            HISTOGRAMS: self._histograms,
+            COMPRESSED_HISTOGRAMS: self._compressed_histograms,
+            IMAGES: self._images}
+
+  def _CacheKey(self):
+    """Returns the settings that must match for a cache to be used.
+
+    The key is returned as it reads back from JSON, so that it can be compared
+    with the key in a cache header.
+    """
+    return json.loads(json.dumps({
+        'path': self._path,
+        'size_guidance': self._size_guidance,
+        'compression_bps': list(self._compression_bps)}))
+
+  def _SaveCache(self):
+    """Saves the cache. Must be called with `_generator_mutex` held.
+
+    The cache is an `.npz` file of plain (never object) arrays. Each reservoir
+    bucket is stored as one array per field of its items, with the variable
+    length fields concatenated, and the tags, reservoir counts and position in
+    the event files are stored in a JSON header.
+    """
+    position = self._generator.Position()
+    if position is None:
+      # Nothing has been loaded yet.
+      return
+    arrays = {}
+    tags = {}
+    for tag_type, r in self._Reservoirs().iteritems():
+      to_columns, _ = _CACHE_CODECS[tag_type]
+      tags[tag_type] = []
+      for i, (tag, (items, count, random_state)) in enumerate(
+          sorted(r.GetState().iteritems())):
+        version, internal_state, gauss_next = random_state
+        tags[tag_type].append({'tag': tag, 'count': count,
+                               'random_version': version,
+                               'gauss_next': gauss_next})
+        prefix = '%s/%d/' % (tag_type, i)
+        for name, column in to_columns(items).iteritems():
+          arrays[prefix + name] = column
+        arrays[prefix + 'random_state'] = np.array(internal_state,
+                                                   dtype=np.int64)
+    if self._graph is not None:
+      arrays['graph'] = _BytesToArray(self._graph.SerializeToString())
+    header = {'version': _CACHE_VERSION,
+              'key': self._CacheKey(),
+              'position': position,
+              'tags': tags}
+    arrays['header'] = _BytesToArray(json.dumps(header))
+    # Write to a temporary file first, so that a crash can never leave a
+    # truncated cache behind.
+    temp_path = self._cache_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+      np.savez(f, **arrays)
+    os.rename(temp_path, self._cache_path)
+    self._cache_save_time = time.time()
+    logging.info('Saved the cache %s at %s', self._cache_path, position)
+
+  def _RestoreCache(self):
+    """Restores the cache, if it exists and matches this accumulator.
+
+    Must be called with `_generator_mutex` held, before any events are loaded.
+    """
+    if not os.path.exists(self._cache_path):
+      return
+    try:
+      arrays = _ReadArrays(self._cache_path)
+      header = json.loads(arrays['header'].tobytes())
+      if (not isinstance(header, dict) or
+          header.get('version') != _CACHE_VERSION or
+          header.get('key') != self._CacheKey()):
+        logging.info('Ignoring the out of date cache %s', self._cache_path)
+        return
+      path, offset = header['position']
+      if isinstance(path, unicode):
+        path = path.encode('utf-8')
+      states = {}
+      for tag_type in self._Reservoirs():
+        _, from_columns = _CACHE_CODECS[tag_type]
+        states[tag_type] = {}
+        for i, bucket in enumerate(header['tags'][tag_type]):
+          prefix = '%s/%d/' % (tag_type, i)
+          columns = dict((name[len(prefix):], array)
+                         for name, array in arrays.iteritems()
+                         if name.startswith(prefix))
+          random_state = (bucket['random_version'],
+                          tuple(int(x) for x in columns.pop('random_state')),
+                          bucket['gauss_next'])
+          states[tag_type][bucket['tag']] = (
+              from_columns(columns), bucket['count'], random_state)
+      graph = arrays['graph'].tobytes() if 'graph' in arrays else None
+    # pylint: disable=broad-except
+    except Exception as e:
+      # pylint: enable=broad-except
+      logging.warning('Ignoring the unreadable cache %s: %s',
+                      self._cache_path, e)
+      return
+
+    # The cache is only valid if the events it reflects are still there.
+    if not gfile.Exists(path):
+      logging.info('Ignoring the cache %s because %s no longer exists',
+                   self._cache_path, path)
+      return
+    with gfile.GFile(path, 'r') as f:
+      if f.Size() < offset:
+        logging.info('Ignoring the cache %s because %s has been truncated',
+                     self._cache_path, path)
+        return
+
+    self._generator.Seek(path, offset)
+    for tag_type, r in self._Reservoirs().iteritems():
+      r.SetState(states[tag_type])
+    if graph is not None:
+      self._graph = graph_pb2.GraphDef()
+      self._graph.ParseFromString(graph)
+    # The cache is up to date, so do not save it again until there is new data.
+    self._cache_save_time = time.time()
+    self._NewGeneration(
+        itertools.chain.from_iterable(
+            r.Keys() for r in self._Reservoirs().itervalues()),
+        graph_changed=self._graph is not None)
+    logging.info('Restored the cache %s at %s', self._cache_path,
+                 (path, offset))
+
+  def _NewGeneration(self, changed_tags, graph_changed=False):
+    """Starts a new generation, and wakes up the callers of `WaitForChange`.
+
+    Args:
+      changed_tags: An iterable of the tags whose data changed.
+      graph_changed: Whether the graph changed.
+    """
+    with _GENERATION_CHANGED:
+      self._generation = next(_GENERATIONS)
+      for tag in changed_tags:
+        self._tag_generations[tag] = self._generation
+      if graph_changed:
+        self._graph_generation = self._generation
+      _GENERATION_CHANGED.notify_all()
+
   def _VerifyActivated(self):
     if not self._activated:
       raise RuntimeError('Accumulator must be activated before it may be used.')
@@ -385,31 +882,27 @@ class EventAccumulator(object):
       step: Number of steps that have passed
       histo: proto2 histogram Object
     """
-    def _CumulativeSum(arr):
-      return [sum(arr[:i+1]) for i in range(len(arr))]
-
-    # Convert from proto repeated field into a Python list.
-    bucket = list(histo.bucket)
-    bucket_limit = list(histo.bucket_limit)
-
-    bucket_total = sum(bucket)
-    fraction_weights = [float(10000*x)/bucket_total for x in bucket]
-    cumsum_weights = _CumulativeSum(fraction_weights)
-
-    percentiles = [
-        self._Percentile(bps, bucket_limit, cumsum_weights, histo.min,
-                         histo.max, histo.num) for bps in self._compression_bps
-    ]
-
-    compressed_histogram_values = [CompressedHistogramValue(
-        basis_point=bps,
-        value=value) for bps, value in zip(self._compression_bps, percentiles)]
-    histogram_event = CompressedHistogramEvent(
-        wall_time=wall_time,
-        step=step,
-        compressed_histogram_values=compressed_histogram_values)
+    self._ProcessCompressedHistograms([(tag, wall_time, step, histo)])
+
+  def _ProcessCompressedHistograms(self, histograms):
+    """Processes a batch of histograms like `_ProcessCompressedHistogram`.
 
-    self._compressed_histograms.AddItem(tag, histogram_event)
+    Args:
+      histograms: A list of `(tag, wall_time, step, histo)` tuples.
+    """
+    if not histograms:
+      return
+    values = _CompressHistograms([histo for _, _, _, histo in histograms],
+                                 self._compression_bps)
+    for (tag, wall_time, step, _), percentiles in zip(histograms, values):
+      compressed_histogram_values = [
+          CompressedHistogramValue(basis_point=bps, value=value)
+          for bps, value in zip(self._compression_bps, percentiles)]
+      histogram_event = CompressedHistogramEvent(
+          wall_time=wall_time,
+          step=step,
+          compressed_histogram_values=compressed_histogram_values)
+      self._compressed_histograms.AddItem(tag, histogram_event)
 
   def _ProcessImage(self, tag, wall_time, step, image):
     """Processes an image by adding it to accumulated state."""
@@ -423,11 +916,323 @@ class EventAccumulator(object):
     self._images.AddItem(tag, event)
 
 
-def _GeneratorFromPath(path):
+def _CompressHistograms(histos, compression_bps):
+  """Estimates the histogram weights at each basis point, for many histograms.
+
+  This computes the same values as calling `EventAccumulator._Percentile` for
+  each histogram and basis point, but does the work for all of them with a
+  handful of NumPy operations. The histograms are packed into a matrix with
+  one (zero-padded) row per histogram, and the bucket that each basis point
+  falls into is found by searching the basis points for the cumulative bucket
+  weights, which (unlike searching each row) needs only one `searchsorted`
+  call.
+
+  Args:
+    histos: A list of proto2 histogram objects.
+    compression_bps: A sequence of basis points at which to estimate the
+      weights.
+
+  Returns:
+    A list containing, for each histogram, a list of the estimated weights at
+    each of `compression_bps`.
+  """
+  num_histos = len(histos)
+  num_bps = len(compression_bps)
+  lengths = np.array([len(histo.bucket) for histo in histos], dtype=np.int64)
+  histo_min = np.array([histo.min for histo in histos], dtype=np.float64)
+  histo_max = np.array([histo.max for histo in histos], dtype=np.float64)
+  histo_num = np.array([histo.num for histo in histos], dtype=np.float64)
+
+  # Pack the buckets into matrices. The padding has no weight, so the padded
+  # cumulative weights repeat the last cumulative weight of each row.
+  max_length = max(1, lengths.max())
+  in_histo = np.arange(max_length) < lengths[:, np.newaxis]
+  bucket = np.zeros([num_histos, max_length])
+  bucket[in_histo] = np.fromiter(
+      itertools.chain.from_iterable(histo.bucket for histo in histos),
+      dtype=np.float64, count=lengths.sum())
+  bucket_limit = np.zeros([num_histos, max_length])
+  bucket_limit[in_histo] = np.fromiter(
+      itertools.chain.from_iterable(histo.bucket_limit for histo in histos),
+      dtype=np.float64, count=lengths.sum())
+
+  # NOTE: np.cumsum() adds the values in order, so these are bitwise identical
+  # to the sums that `_Percentile` expects (whereas np.sum() is pairwise).
+  bucket_total = np.cumsum(bucket, axis=1)[:, -1]
+  bucket_total[bucket_total == 0] = 1
+  cumsum_weights = np.cumsum(10000 * bucket / bucket_total[:, np.newaxis],
+                             axis=1)
+
+  # `_Percentile` interpolates in the first bucket whose cumulative weight is
+  # at least the basis point, i.e. the bucket at index "number of cumulative
+  # weights less than the basis point". Count those for every basis point at
+  # once: each cumulative weight is less than the basis points from
+  # `searchsorted(bps, weight, side='right')` onwards.
+  bps = np.asarray(compression_bps, dtype=np.float64)
+  bps_order = np.argsort(bps, kind='mergesort')
+  sorted_bps = bps[bps_order]
+  first_greater_bps = np.searchsorted(sorted_bps, cumsum_weights, side='right')
+  counts = np.bincount(
+      (first_greater_bps + (num_bps + 1) * np.arange(num_histos)[:, np.newaxis]
+      ).ravel(), minlength=num_histos * (num_bps + 1))
+  index = np.empty([num_histos, num_bps], dtype=np.int64)
+  index[:, bps_order] = np.cumsum(
+      counts.reshape([num_histos, num_bps + 1]), axis=1)[:, :num_bps]
+
+  # `_Percentile` skips leading empty buckets, which can only be chosen for
+  # basis points that are not positive.
+  first_nonempty = np.sum(cumsum_weights <= 0, axis=1)
+  index = np.where(bps <= 0, first_nonempty[:, np.newaxis], index)
+
+  # Interpolate within the chosen buckets.
+  rows = np.arange(num_histos)[:, np.newaxis]
+  clipped_index = np.minimum(index, max_length - 1)
+  cumsum = cumsum_weights[rows, clipped_index]
+  cumsum_prev = np.where(index > 0, cumsum_weights[rows, clipped_index - 1], 0)
+  lhs = np.where((index > 0) & (cumsum_prev > 0),
+                 bucket_limit[rows, clipped_index - 1],
+                 histo_min[:, np.newaxis])
+  lhs = np.maximum(lhs, histo_min[:, np.newaxis])
+  rhs = np.minimum(bucket_limit[rows, clipped_index], histo_max[:, np.newaxis])
+  found = index < lengths[:, np.newaxis]
+  with np.errstate(divide='ignore', invalid='ignore'):
+    weights = lhs + (bps - cumsum_prev) * (rhs - lhs) / (cumsum - cumsum_prev)
+  # If no bucket was found, `_Percentile` returns the max observed.
+  weights = np.where(found, weights, histo_max[:, np.newaxis])
+  weights = np.where(histo_num[:, np.newaxis] == 0, 0, weights)
+  return weights.tolist()
+
+
+def _BytesToArray(string):
+  """Returns the bytes of `string` as a uint8 array."""
+  return np.frombuffer(string, dtype=np.uint8) if string else np.empty(
+      0, dtype=np.uint8)
+
+
+def _Flatten(sequences, dtype):
+  """Concatenates `sequences` into one array.
+
+  Args:
+    sequences: A list of sequences.
+    dtype: The dtype of the concatenated array.
+
+  Returns:
+    A `(values, lengths)` tuple of the concatenated array and an int64 array
+    of the lengths of `sequences`, which can be passed to `_Split`.
+  """
+  lengths = np.array([len(sequence) for sequence in sequences],
+                     dtype=np.int64)
+  values = np.fromiter(itertools.chain.from_iterable(sequences), dtype=dtype,
+                       count=lengths.sum())
+  return values, lengths
+
+
+def _Split(values, lengths):
+  """Splits an array concatenated by `_Flatten` into a list of arrays."""
+  if np.any(lengths < 0) or lengths.sum() != len(values):
+    raise ValueError('The lengths do not match the values')
+  if not len(lengths):
+    return []
+  return np.split(values, np.cumsum(lengths)[:-1])
+
+
+def _Column(columns, name, dtype, length=None):
+  """Returns the column called `name`, converted to `dtype`.
+
+  Args:
+    columns: A dictionary of the arrays read from a cache.
+    name: The name of the column.
+    dtype: The dtype to convert the column to.
+    length: If not None, the number of values the column must have.
+
+  Returns:
+    The column, as a one dimensional array.
+
+  Raises:
+    KeyError: If there is no such column.
+    ValueError: If the column has the wrong shape.
+  """
+  column = columns[name]
+  if column.ndim != 1 or (length is not None and len(column) != length):
+    raise ValueError('Column %s has shape %s' % (name, column.shape))
+  return column.astype(dtype)
+
+
+def _ScalarColumns(events):
+  return {'wall_time': events.wall_times,
+          'step': events.steps,
+          'value': events.values}
+
+
+def _ScalarsFromColumns(columns):
+  wall_times = _Column(columns, 'wall_time', np.float64)
+  length = len(wall_times)
+  events = ScalarEvents()
+  events.__setstate__((wall_times,
+                       _Column(columns, 'step', np.int64, length),
+                       _Column(columns, 'value', np.float32, length)))
+  return events
+
+
+_HISTOGRAM_VALUE_FIELDS = ('min', 'max', 'num', 'sum', 'sum_squares')
+
+
+def _HistogramColumns(events):
+  values = [event.histogram_value for event in events]
+  columns = {
+      'wall_time': np.array([e.wall_time for e in events], dtype=np.float64),
+      'step': np.array([e.step for e in events], dtype=np.int64)}
+  for field in _HISTOGRAM_VALUE_FIELDS:
+    columns[field] = np.array([getattr(v, field) for v in values],
+                              dtype=np.float64)
+  columns['bucket_limit'], columns['bucket_count'] = _Flatten(
+      [v.bucket_limit for v in values], np.float64)
+  columns['bucket'], _ = _Flatten([v.bucket for v in values], np.float64)
+  return columns
+
+
+def _HistogramsFromColumns(columns):
+  wall_times = _Column(columns, 'wall_time', np.float64).tolist()
+  length = len(wall_times)
+  steps = _Column(columns, 'step', np.int64, length).tolist()
+  mins, maxes, nums, sums, sum_squares = [
+      _Column(columns, field, np.float64, length).tolist()
+      for field in _HISTOGRAM_VALUE_FIELDS]
+  bucket_count = _Column(columns, 'bucket_count', np.int64, length)
+  bucket_limits = _Split(_Column(columns, 'bucket_limit', np.float64),
+                         bucket_count)
+  buckets = _Split(_Column(columns, 'bucket', np.float64), bucket_count)
+  return [HistogramEvent(
+      wall_time=wall_times[i],
+      step=steps[i],
+      histogram_value=HistogramValue(min=mins[i],
+                                     max=maxes[i],
+                                     num=nums[i],
+                                     sum=sums[i],
+                                     sum_squares=sum_squares[i],
+                                     bucket_limit=bucket_limits[i].tolist(),
+                                     bucket=buckets[i].tolist()))
+          for i in xrange(length)]
+
+
+def _CompressedHistogramColumns(events):
+  values = [event.compressed_histogram_values for event in events]
+  columns = {
+      'wall_time': np.array([e.wall_time for e in events], dtype=np.float64),
+      'step': np.array([e.step for e in events], dtype=np.int64)}
+  columns['basis_point'], columns['value_count'] = _Flatten(
+      [[v.basis_point for v in vs] for vs in values], np.int64)
+  columns['value'], _ = _Flatten([[v.value for v in vs] for vs in values],
+                                 np.float64)
+  return columns
+
+
+def _CompressedHistogramsFromColumns(columns):
+  wall_times = _Column(columns, 'wall_time', np.float64).tolist()
+  length = len(wall_times)
+  steps = _Column(columns, 'step', np.int64, length).tolist()
+  value_count = _Column(columns, 'value_count', np.int64, length)
+  basis_points = _Split(_Column(columns, 'basis_point', np.int64), value_count)
+  values = _Split(_Column(columns, 'value', np.float64), value_count)
+  return [CompressedHistogramEvent(
+      wall_time=wall_times[i],
+      step=steps[i],
+      compressed_histogram_values=[
+          CompressedHistogramValue(basis_point=bps, value=value)
+          for bps, value in zip(basis_points[i].tolist(),
+                                values[i].tolist())])
+          for i in xrange(length)]
+
+
+def _ImageColumns(events):
+  columns = {
+      'wall_time': np.array([e.wall_time for e in events], dtype=np.float64),
+      'step': np.array([e.step for e in events], dtype=np.int64),
+      'width': np.array([e.width for e in events], dtype=np.int64),
+      'height': np.array([e.height for e in events], dtype=np.int64),
+      'image_size': np.array([len(e.encoded_image_string) for e in events],
+                             dtype=np.int64)}
+  columns['encoded_image_string'] = _BytesToArray(
+      ''.join(e.encoded_image_string for e in events))
+  return columns
+
+
+def _ImagesFromColumns(columns):
+  wall_times = _Column(columns, 'wall_time', np.float64).tolist()
+  length = len(wall_times)
+  steps = _Column(columns, 'step', np.int64, length).tolist()
+  widths = _Column(columns, 'width', np.int64, length).tolist()
+  heights = _Column(columns, 'height', np.int64, length).tolist()
+  images = _Split(_Column(columns, 'encoded_image_string', np.uint8),
+                  _Column(columns, 'image_size', np.int64, length))
+  return [ImageEvent(wall_time=wall_times[i],
+                     step=steps[i],
+                     encoded_image_string=images[i].tobytes(),
+                     width=widths[i],
+                     height=heights[i])
+          for i in xrange(length)]
+
+
+# For each tagType, the functions that convert the items of a reservoir bucket
+# to a dictionary of columns for the cache, and back.
+_CACHE_CODECS = {
+    SCALARS: (_ScalarColumns, _ScalarsFromColumns),
+    HISTOGRAMS: (_HistogramColumns, _HistogramsFromColumns),
+    COMPRESSED_HISTOGRAMS: (_CompressedHistogramColumns,
+                            _CompressedHistogramsFromColumns),
+    IMAGES: (_ImageColumns, _ImagesFromColumns),
+}
+
+
+def _ReadArrays(path):
+  """Reads the arrays of an `.npz` file written by `np.savez`.
+
+  Unlike `np.load`, this refuses arrays of Python objects, which would be
+  unpickled (and could run arbitrary code).
+
+  Args:
+    path: The path of the `.npz` file.
+
+  Returns:
+    A dictionary from the names of the arrays to the arrays.
+
+  Raises:
+    ValueError: If the file contains an object array, or an array in a
+      format that `np.savez` does not write.
+    IOError: If the file cannot be read.
+    zipfile.BadZipfile: If the file is not an `.npz` file.
+  """
+  arrays = {}
+  with zipfile.ZipFile(path) as z:
+    for name in z.namelist():
+      if not name.endswith('.npy'):
+        raise ValueError('Unexpected file %s' % name)
+      f = z.open(name)
+      try:
+        if np.lib.format.read_magic(f) != (1, 0):
+          raise ValueError('Unsupported format for %s' % name)
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        if dtype.hasobject:
+          raise ValueError('%s is an object array' % name)
+        count = int(np.prod(shape))
+        data = f.read(count * dtype.itemsize)
+      finally:
+        f.close()
+      if len(data) != count * dtype.itemsize:
+        raise ValueError('%s is truncated' % name)
+      array = np.frombuffer(data, dtype=dtype) if count else np.empty(
+          0, dtype=dtype)
+      arrays[name[:-len('.npy')]] = array.reshape(
+          shape, order='F' if fortran_order else 'C').copy()
+  return arrays
+
+
+def _GeneratorFromPath(path, directory_lister=None):
   """Create an event generator for file or directory at given path string."""
   loader_factory = event_file_loader.EventFileLoader
   if gfile.IsDirectory(path):
     return directory_watcher.DirectoryWatcher(path, loader_factory,
-                                              IsTensorFlowEventsFile)
+                                              IsTensorFlowEventsFile,
+                                              directory_lister)
   else:
     return loader_factory(path)
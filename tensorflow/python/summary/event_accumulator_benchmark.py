@@ -0,0 +1,101 @@
+"""Benchmark for loading histogram summaries with an EventAccumulator.
+
+Writes a synthetic event file containing `--num_events` histogram summaries
+of `--num_buckets` buckets each, and reports:
+
+* the time that `EventAccumulator.Reload()` takes to load the file; and
+* the time that compressing the histograms takes, both with the batched
+  implementation used by `Reload()` and one histogram and basis point at a
+  time with `EventAccumulator._Percentile()`.
+
+To run:
+  bazel run -c opt tensorflow/python:event_accumulator_benchmark -- \
+    --num_events=500000
+"""
+import random
+import shutil
+import tempfile
+import time
+
+import tensorflow.python.platform
+
+import tensorflow as tf
+
+from tensorflow.python.summary import event_accumulator as ea
+
+FLAGS = tf.app.flags.FLAGS
+
+tf.app.flags.DEFINE_integer('num_events', 100000,
+                            """Number of histogram events to write.""")
+tf.app.flags.DEFINE_integer('num_buckets', 50,
+                            """Number of buckets in each histogram.""")
+tf.app.flags.DEFINE_integer('num_reference_events', 10000,
+                            """Number of histograms to compress with """
+                            """_Percentile().""")
+
+
+def _RandomHistogram(rng):
+  bucket = [rng.randint(0, 100) for _ in xrange(FLAGS.num_buckets)]
+  bucket[-1] += 1
+  bucket_limit = [-1.0 + 2.0 * (i + 1) / FLAGS.num_buckets
+                  for i in xrange(FLAGS.num_buckets)]
+  return tf.HistogramProto(min=-1.0, max=bucket_limit[-1], num=sum(bucket),
+                           sum=0.0, sum_squares=float(sum(bucket)),
+                           bucket_limit=bucket_limit, bucket=bucket)
+
+
+def _WriteEvents(directory, histos):
+  writer = tf.train.SummaryWriter(directory, max_queue=1000)
+  for step, histo in enumerate(histos):
+    writer.add_summary(
+        tf.Summary(value=[tf.Summary.Value(tag='histo', histo=histo)]), step)
+  writer.close()
+
+
+def _CompressOneAtATime(acc, histos):
+  """Compresses `histos` the way `Reload()` used to, before batching."""
+  for histo in histos:
+    bucket = list(histo.bucket)
+    bucket_limit = list(histo.bucket_limit)
+    bucket_total = sum(bucket)
+    fraction_weights = [float(10000*x)/bucket_total for x in bucket]
+    cumsum_weights = [sum(fraction_weights[:i+1])
+                      for i in xrange(len(fraction_weights))]
+    for bps in ea.NORMAL_HISTOGRAM_BPS:
+      acc._Percentile(bps, bucket_limit, cumsum_weights, histo.min, histo.max,
+                      histo.num)
+
+
+def main(unused_argv):
+  rng = random.Random(0)
+  histos = [_RandomHistogram(rng) for _ in xrange(FLAGS.num_events)]
+  directory = tempfile.mkdtemp()
+  try:
+    _WriteEvents(directory, histos)
+    acc = ea.EventAccumulator(directory)
+    start_time = time.time()
+    acc.Reload()
+    duration = time.time() - start_time
+    print 'Reload() of %d histogram events: %.2f sec' % (FLAGS.num_events,
+                                                         duration)
+  finally:
+    shutil.rmtree(directory)
+
+  start_time = time.time()
+  for i in xrange(0, len(histos), ea._HISTOGRAM_BATCH_SIZE):
+    ea._CompressHistograms(histos[i:i + ea._HISTOGRAM_BATCH_SIZE],
+                           ea.NORMAL_HISTOGRAM_BPS)
+  duration = time.time() - start_time
+  print 'Batched compression: %.2f usec/histogram' % (
+      1e6 * duration / len(histos))
+
+  reference_histos = histos[:FLAGS.num_reference_events]
+  start_time = time.time()
+  _CompressOneAtATime(acc, reference_histos)
+  duration = time.time() - start_time
+  print 'One at a time compression: %.2f usec/histogram' % (
+      1e6 * duration / len(reference_histos))
+
+
+if __name__ == '__main__':
+  tf.app.run()
@@ -1,5 +1,9 @@
+import cPickle
 import os
+import random
+import threading
 
+import numpy as np
 import tensorflow.python.platform
 
 import tensorflow as tf
@@ -81,7 +85,7 @@ class MockingEventAccumulatorTest(EventAccumulatorTest):
     self._real_constructor = ea.EventAccumulator
     self._real_generator = ea._GeneratorFromPath
     def _FakeAccumulatorConstructor(generator, *args, **kwargs):
-      ea._GeneratorFromPath = lambda x: generator
+      ea._GeneratorFromPath = lambda x, y: generator
       return self._real_constructor(generator, *args, **kwargs)
     ea.EventAccumulator = _FakeAccumulatorConstructor
 
@@ -133,6 +137,69 @@ class MockingEventAccumulatorTest(EventAccumulatorTest):
         ea.COMPRESSED_HISTOGRAMS: ['hst1', 'hst2'],
         ea.GRAPH: False})
 
+  def testGeneration(self):
+    gen = _EventGenerator()
+    acc = ea.EventAccumulator(gen)
+    generation = acc.Generation()
+    acc.Reload()
+    self.assertEqual(generation, acc.Generation())
+    gen.AddScalar('sv1')
+    acc.Reload()
+    self.assertGreater(acc.Generation(), generation)
+    generation = acc.Generation()
+    acc.Reload()
+    self.assertEqual(generation, acc.Generation())
+    # Generations are never shared between accumulators.
+    self.assertGreater(ea.EventAccumulator(gen).Generation(), generation)
+
+  def testGraphGeneration(self):
+    gen = _EventGenerator()
+    acc = ea.EventAccumulator(gen)
+    self.assertEqual(0, acc.GraphGeneration())
+    gen.AddEvent(tf.Event(graph_def=tf.GraphDef(
+        node=[tf.NodeDef(name='A', op='Mul')])))
+    acc.Reload()
+    self.assertEqual(acc.Generation(), acc.GraphGeneration())
+    # Loading summaries does not change the generation of the graph.
+    generation = acc.GraphGeneration()
+    gen.AddScalar('sv1')
+    acc.Reload()
+    self.assertGreater(acc.Generation(), generation)
+    self.assertEqual(generation, acc.GraphGeneration())
+
+  def testTagGenerations(self):
+    gen = _EventGenerator()
+    acc = ea.EventAccumulator(gen)
+    self.assertEqual(0, acc.Generation('sv1'))
+    gen.AddScalar('sv1')
+    gen.AddHistogram('hst1')
+    acc.Reload()
+    self.assertEqual(acc.Generation(), acc.Generation('sv1'))
+    self.assertEqual(acc.Generation(), acc.Generation('hst1'))
+    generation = acc.Generation()
+    gen.AddScalar('sv1')
+    gen.AddImage('im1')
+    acc.Reload()
+    self.assertGreater(acc.Generation('sv1'), generation)
+    self.assertEqual(generation, acc.Generation('hst1'))
+    self.assertEqual({'sv1': acc.Generation(),
+                      'hst1': generation,
+                      'im1': acc.Generation()}, acc.TagGenerations())
+
+  def testWaitForChange(self):
+    gen = _EventGenerator()
+    acc = ea.EventAccumulator(gen)
+    generation = acc.Generation()
+    self.assertEqual(generation, acc.WaitForChange(None, generation, 0.01))
+    gen.AddScalar('sv1')
+    reloader = threading.Timer(0.05, acc.Reload)
+    reloader.start()
+    tag_generation = acc.WaitForChange('sv1', 0, timeout=10)
+    reloader.join()
+    self.assertEqual(acc.Generation('sv1'), tag_generation)
+    self.assertGreater(acc.Generation('sv1'), generation)
+    self.assertEqual(acc.Generation(), acc.WaitForChange(None, generation))
+
   def testScalars(self):
     gen = _EventGenerator()
     acc = ea.EventAccumulator(gen)
@@ -143,6 +210,12 @@ class MockingEventAccumulatorTest(EventAccumulatorTest):
     acc.Reload()
     self.assertEqual(acc.Scalars('sv1'), [sv1])
     self.assertEqual(acc.Scalars('sv2'), [sv2])
+    # Reloads do not change the events that were returned.
+    scalars = acc.Scalars('sv1')
+    gen.AddScalar('sv1', wall_time=3, step=14, value=128)
+    acc.Reload()
+    self.assertEqual([sv1], scalars)
+    self.assertEqual(2, len(acc.Scalars('sv1')))
 
   def testHistograms(self):
     gen = _EventGenerator()
@@ -284,6 +357,57 @@ class MockingEventAccumulatorTest(EventAccumulatorTest):
                                           histo_max))
     AssertExpectedForBps(10000, histo_max)
 
+  def testCompressHistogramsMatchesPercentile(self):
+    acc = ea.EventAccumulator(_EventGenerator())
+    compression_bps = (0, 1, 2500, 5000, 7500, 9999, 10000)
+    rng = random.Random(0)
+    histos = []
+    for _ in xrange(100):
+      length = rng.randint(1, 10)
+      bucket = [rng.choice([0, 0, 1, 3, 10]) for _ in xrange(length)]
+      bucket[rng.randrange(length)] += 1
+      bucket_limit = sorted(rng.uniform(-5, 5) for _ in xrange(length))
+      histos.append(tf.HistogramProto(
+          min=bucket_limit[0] - rng.random(), max=bucket_limit[-1],
+          num=sum(bucket), bucket_limit=bucket_limit, bucket=bucket))
+    compressed = ea._CompressHistograms(histos, compression_bps)
+    self.assertEqual(len(histos), len(compressed))
+    for histo, values in zip(histos, compressed):
+      total = sum(histo.bucket)
+      fraction_weights = [float(10000*x)/total for x in histo.bucket]
+      cumsum_weights = [sum(fraction_weights[:i+1])
+                        for i in xrange(len(fraction_weights))]
+      expected = [acc._Percentile(bps, list(histo.bucket_limit),
+                                  cumsum_weights, histo.min, histo.max,
+                                  histo.num)
+                  for bps in compression_bps]
+      self.assertEqual(expected, values)
+
+  def testCompressedHistogramsInBatches(self):
+    gen = _EventGenerator()
+    acc = ea.EventAccumulator(gen, compression_bps=(0, 5000, 10000))
+    for i in xrange(5):
+      gen.AddHistogram('hst', wall_time=i, step=i, hmin=0, hmax=i + 1,
+                       hnum=i + 1, hbucket_limit=[i + 1], hbucket=[i + 1])
+    gen.AddHistogram('empty', hmin=0, hmax=0, hnum=0, hbucket_limit=[],
+                     hbucket=[])
+    old_batch_size = ea._HISTOGRAM_BATCH_SIZE
+    ea._HISTOGRAM_BATCH_SIZE = 2
+    try:
+      acc.Reload()
+    finally:
+      ea._HISTOGRAM_BATCH_SIZE = old_batch_size
+    expected = [ea.CompressedHistogramEvent(
+        wall_time=i, step=i, compressed_histogram_values=[
+            ea.CompressedHistogramValue(0, 0),
+            ea.CompressedHistogramValue(5000, (i + 1) / 2.0),
+            ea.CompressedHistogramValue(10000, i + 1)])
+                for i in xrange(5)]
+    self.assertEqual(expected, acc.CompressedHistograms('hst'))
+    self.assertEqual([0, 0, 0], [
+        v.value for v in
+        acc.CompressedHistograms('empty')[0].compressed_histogram_values])
+
   def testImages(self):
     gen = _EventGenerator()
     acc = ea.EventAccumulator(gen)
@@ -350,6 +474,57 @@ class MockingEventAccumulatorTest(EventAccumulatorTest):
         ea.GRAPH: False})
 
 
+class ScalarEventsTest(tf.test.TestCase):
+
+  def testListOperations(self):
+    events = ea.ScalarEvents()
+    expected = []
+    for i in xrange(100):
+      event = ea.ScalarEvent(wall_time=i + 0.5, step=i, value=i * 0.25)
+      events.append(event)
+      expected.append(event)
+    self.assertEqual(expected[17], events.pop(17))
+    del expected[17]
+    self.assertEqual(expected[-1], events.pop())
+    del expected[-1]
+    events[-1] = expected[-1] = ea.ScalarEvent(wall_time=1, step=2, value=3)
+    self.assertEqual(expected, events)
+    self.assertEqual(expected, list(events))
+    self.assertEqual(len(expected), len(events))
+    self.assertEqual(expected[5], events[5])
+    self.assertEqual(expected[3:9], events[3:9])
+    with self.assertRaises(IndexError):
+      events[len(expected)]  # pylint: disable=pointless-statement
+
+  def testColumns(self):
+    events = ea.ScalarEvents([(1.5, 10, 0.5), (2.5, 20, -0.5)])
+    self.assertAllEqual([1.5, 2.5], events.wall_times)
+    self.assertAllEqual([10, 20], events.steps)
+    self.assertAllEqual([0.5, -0.5], events.values)
+    self.assertEqual(np.float64, events.wall_times.dtype)
+    self.assertEqual(np.int64, events.steps.dtype)
+    self.assertEqual(np.float32, events.values.dtype)
+
+  def testSnapshot(self):
+    events = ea.ScalarEvents([(1.5, 10, 0.5), (2.5, 20, -0.5)])
+    wall_times, steps, values = events.Snapshot()
+    events.pop(0)
+    events.append((3.5, 30, 1.5))
+    self.assertAllEqual([1.5, 2.5], wall_times)
+    self.assertAllEqual([10, 20], steps)
+    self.assertAllEqual([0.5, -0.5], values)
+
+  def testSliceAssignmentAndPickling(self):
+    events = ea.ScalarEvents([(1.5, 10, 0.5), (2.5, 20, -0.5)])
+    copied = ea.ScalarEvents()
+    copied[:] = events
+    events.append((3.5, 30, 1.5))
+    self.assertEqual([(1.5, 10, 0.5), (2.5, 20, -0.5)], copied)
+    copied[:] = [(4.5, 40, 2.5)]
+    self.assertEqual([(4.5, 40, 2.5)], copied)
+    self.assertEqual(events, cPickle.loads(cPickle.dumps(events)))
+
+
 class RealisticEventAccumulatorTest(EventAccumulatorTest):
 
   def setUp(self):
@@ -417,6 +592,61 @@ class RealisticEventAccumulatorTest(EventAccumulatorTest):
       self.assertEqual(i, id_events[i].value)
       self.assertEqual(i*i, sq_events[i].value)
 
+  def testCacheRealistically(self):
+    """Test that an accumulator resumes loading from its cache."""
+    directory = os.path.join(self.get_temp_dir(), 'cache_dir')
+    if gfile.IsDirectory(directory):
+      gfile.DeleteRecursively(directory)
+    gfile.MkDir(directory)
+    cache_path = os.path.join(directory, 'run.cache')
+
+    writer = tf.train.SummaryWriter(directory, max_queue=100)
+    writer.add_graph(tf.GraphDef(node=[tf.NodeDef(name='A', op='Mul')]))
+    for i in xrange(30):
+      writer.add_summary(
+          tf.Summary(value=[tf.Summary.Value(tag='id', simple_value=i)]), i)
+    writer.flush()
+    acc = ea.EventAccumulator(directory, cache_path=cache_path)
+    acc.Reload()
+    self.assertTrue(gfile.Exists(cache_path))
+
+    for i in xrange(30, 40):
+      writer.add_summary(
+          tf.Summary(value=[tf.Summary.Value(tag='id', simple_value=i)]), i)
+    writer.flush()
+
+    processed_scalars = []
+    class _CountingEventAccumulator(ea.EventAccumulator):
+
+      def _ProcessScalar(self, tag, wall_time, step, scalar):
+        processed_scalars.append(step)
+        super(_CountingEventAccumulator, self)._ProcessScalar(
+            tag, wall_time, step, scalar)
+
+    resumed_acc = _CountingEventAccumulator(directory, cache_path=cache_path)
+    resumed_acc.Reload()
+    # Only the events written after the cache was saved are processed.
+    self.assertEqual(range(30, 40), processed_scalars)
+    self.assertEqual(range(40), [e.step for e in resumed_acc.Scalars('id')])
+    self.assertTrue(resumed_acc.Tags()[ea.GRAPH])
+    self.assertEqual('A', resumed_acc.Graph().node[0].name)
+
+    # A cache made with different settings is ignored.
+    del processed_scalars[:]
+    other_acc = _CountingEventAccumulator(
+        directory, size_guidance={ea.SCALARS: 5}, cache_path=cache_path)
+    other_acc.Reload()
+    self.assertEqual(range(40), processed_scalars)
+
+    # A cache holding Python objects, which np.load would unpickle, is ignored.
+    with open(cache_path, 'wb') as f:
+      np.savez(f, header=np.array([{'version': 2}], dtype=object))
+    del processed_scalars[:]
+    other_acc = _CountingEventAccumulator(directory, cache_path=cache_path)
+    other_acc.Reload()
+    self.assertEqual(range(40), processed_scalars)
+    writer.close()
+
 
 if __name__ == '__main__':
   tf.test.main()
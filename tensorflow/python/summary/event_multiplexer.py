@@ -1,11 +1,18 @@
 """Provides an interface for working with multiple event files."""
 
+import collections
+import hashlib
 import os
+import sys
 import threading
 
 from tensorflow.python.platform import gfile
 from tensorflow.python.platform import logging
 from tensorflow.python.summary import event_accumulator
+from tensorflow.python.summary.impl import directory_lister
+
+# The default number of threads that `EventMultiplexer.Reload()` uses.
+DEFAULT_RELOAD_THREADS = 8
 
 
 class EventMultiplexer(object):
@@ -49,7 +56,11 @@ class EventMultiplexer(object):
   @@AddRunsFromDirectory
   @@Reload
   @@AutoUpdate
+  @@Generation
+  @@GraphGeneration
+  @@WaitForChange
   @@Runs
+  @@RunsWithGenerations
   @@Scalars
   @@Graph
   @@Histograms
@@ -58,7 +69,9 @@ class EventMultiplexer(object):
   """
 
   def __init__(self, run_path_map=None,
-               size_guidance=event_accumulator.DEFAULT_SIZE_GUIDANCE):
+               size_guidance=event_accumulator.DEFAULT_SIZE_GUIDANCE,
+               reload_threads=DEFAULT_RELOAD_THREADS, cache_dir=None,
+               use_inotify=False):
     """Constructor for the `EventMultiplexer`.
 
     Args:
@@ -68,7 +81,21 @@ class EventMultiplexer(object):
       size_guidance: A dictionary mapping from `tagType` to the number of items
         to store for each tag of that type. See
         `event_ccumulator.EventAccumulator` for details.
+      reload_threads: The maximum number of runs that `Reload` loads
+        concurrently.
+      cache_dir: If not None, a directory in which the `EventAccumulator`s
+        cache their data, so that they can resume loading their runs where
+        they left off. See `event_accumulator.EventAccumulator`.
+      use_inotify: Whether to use inotify, rather than modification times, to
+        find out which directories of runs changed. This only works for local
+        disks. See `directory_lister.DirectoryLister`.
+
+    Raises:
+      ValueError: If `reload_threads` is less than 1.
     """
+    if reload_threads < 1:
+      raise ValueError('reload_threads must be at least 1, was %s' %
+                       reload_threads)
     self._accumulators_mutex = threading.Lock()
     self._accumulators = {}
     self._paths = {}
@@ -76,6 +103,13 @@ class EventMultiplexer(object):
     self._autoupdate_called = False
     self._autoupdate_interval = None
     self._size_guidance = size_guidance
+    self._reload_threads = reload_threads
+    # Listings of the run directories, and of the directories of runs, are
+    # only refreshed when the directories change.
+    self._directory_lister = directory_lister.DirectoryLister(use_inotify)
+    self._cache_dir = cache_dir
+    if cache_dir is not None and not gfile.IsDirectory(cache_dir):
+      gfile.MakeDirs(cache_dir)
     if run_path_map is not None:
       for (run, path) in run_path_map.iteritems():
         self.AddRun(path, run)
@@ -89,9 +123,11 @@ class EventMultiplexer(object):
       do nothing. If we are watching a different path, replace the event
       accumulator.
 
-    If `AutoUpdate` or `Reload` have been called, it will `AutoUpdate` or
-    `Reload` the newly created accumulators. This maintains the invariant that
-    once the Multiplexer was activated, all of its accumulators are active.
+    If `Reload` has been called, it will `Reload` the newly created
+    accumulators. If `AutoUpdate` has been called, the new accumulators are
+    loaded asynchronously right away, and then by each automatic `Reload`.
+    This maintains the invariant that once the Multiplexer was activated, all
+    of its accumulators are active.
 
     Args:
       path: Path to the event files (or event directory) for given run.
@@ -111,15 +147,18 @@ class EventMultiplexer(object):
           logging.warning('Conflict for name %s: old path %s, new path %s' %
                           (name, self._paths[name], path))
         logging.info('Constructing EventAccumulator for %s', path)
-        accumulator = event_accumulator.EventAccumulator(path,
-                                                         self._size_guidance)
+        accumulator = event_accumulator.EventAccumulator(
+            path, self._size_guidance, cache_path=self._CachePath(path),
+            directory_lister=self._directory_lister)
         self._accumulators[name] = accumulator
         self._paths[name] = path
     if accumulator:
       if self._reload_called:
         accumulator.Reload()
       if self._autoupdate_called:
-        accumulator.AutoUpdate(self._autoupdate_interval)
+        t = threading.Timer(0, _ReloadAndLogErrors, [accumulator])
+        t.daemon = True
+        t.start()
     return self
 
   def AddRunsFromDirectory(self, path, name=None):
@@ -132,7 +171,7 @@ class EventMultiplexer(object):
       run.
 
     If the `EventMultiplexer` is already loaded or autoupdating, this will cause
-    the newly created accumulators to also `Reload()` or `AutoUpdate()`.
+    the newly created accumulators to also be loaded.
 
     Args:
       path: A string path to a directory to load runs from.
@@ -152,9 +191,8 @@ class EventMultiplexer(object):
       return  # Maybe it hasn't been created yet, fail silently to retry later
     if not gfile.IsDirectory(path):
       raise ValueError('Path exists and is not a directory, %s'  % path)
-    paths = gfile.ListDirectory(path)
-    is_directory = lambda x: gfile.IsDirectory(os.path.join(path, x))
-    subdirectories = filter(is_directory, paths)
+    paths = self._directory_lister.ListDirectory(path)
+    subdirectories = self._directory_lister.Subdirectories(path)
     for s in subdirectories:
       if name:
         subname = '/'.join([name, s])
@@ -173,25 +211,143 @@ class EventMultiplexer(object):
     return self
 
   def Reload(self):
-    """Call `Reload` on every `EventAccumulator`."""
+    """Call `Reload` on every `EventAccumulator`.
+
+    Up to `reload_threads` runs are reloaded concurrently. The runs whose event
+    files have grown the most since they were last loaded are reloaded first,
+    so that fresh data shows up as soon as possible.
+
+    Returns:
+      The `EventMultiplexer`.
+    """
     self._reload_called = True
     with self._accumulators_mutex:
       loaders = self._accumulators.values()
 
-    for l in loaders:
-      l.Reload()
+    outstanding_bytes = [_OutstandingBytes(l) for l in loaders]
+    # Runs without new data are still reloaded, in case a file was replaced.
+    pending = collections.deque(
+        l for _, l in sorted(zip(outstanding_bytes, loaders),
+                             key=lambda pair: pair[0], reverse=True))
+    errors = []
+
+    def _ReloadPending():
+      while True:
+        try:
+          l = pending.popleft()
+        except IndexError:
+          return
+        try:
+          l.Reload()
+        except Exception:  # pylint: disable=broad-except
+          errors.append(sys.exc_info())
+
+    num_threads = min(self._reload_threads, len(pending))
+    if num_threads <= 1:
+      _ReloadPending()
+    else:
+      threads = [threading.Thread(target=_ReloadPending)
+                 for _ in xrange(num_threads)]
+      for t in threads:
+        t.daemon = True
+        t.start()
+      for t in threads:
+        t.join()
+    if errors:
+      raise errors[0][0], errors[0][1], errors[0][2]
     return self
 
   def AutoUpdate(self, interval=60):
-    """Call `AutoUpdate(interval)` on every `EventAccumulator`."""
+    """Asynchronously `Reload` all runs, and periodically reload them.
+
+    Each reload loads the runs concurrently, and the runs that have grown the
+    most first, as `Reload` does. Calling this function more than once has no
+    effect.
+
+    Args:
+      interval: How many seconds after each reload to load new events
+        (default 60).
+
+    Returns:
+      The `EventMultiplexer`.
+    """
+    if self._autoupdate_called:
+      return self
     self._autoupdate_interval = interval
     self._autoupdate_called = True
-    with self._accumulators_mutex:
-      loaders = self._accumulators.values()
-    for l in loaders:
-      l.AutoUpdate(interval)
+    def Update():
+      _ReloadAndLogErrors(self)
+      logging.info('EventMultiplexer update triggered')
+      t = threading.Timer(interval, Update)
+      t.daemon = True
+      t.start()
+    # Asynchronously start the update process, so that the multiplexer can
+    # immediately serve data, even if there are very large event files to parse
+    t = threading.Timer(0, Update)
+    t.daemon = True
+    t.start()
     return self
 
+  def Generation(self, run=None, tag=None):
+    """Returns a number that increases whenever the data changes.
+
+    Args:
+      run: A string name of a run, or None.
+      tag: A string tag, or None.
+
+    Raises:
+      KeyError: If the run is not found.
+
+    Returns:
+      The `EventAccumulator.Generation` of `run` and `tag`. If `run` is None,
+      the largest generation of all the runs, which increases whenever the
+      data of any run changes, or a run is added.
+    """
+    if run is not None:
+      return self._GetAccumulator(run).Generation(tag)
+    with self._accumulators_mutex:
+      accumulators = self._accumulators.values()
+    return max([0] + [accumulator.Generation(tag)
+                      for accumulator in accumulators])
+
+  def WaitForChange(self, run, tag, generation, timeout=None):
+    """Waits until the generation of the data differs from `generation`.
+
+    This lets clients, such as long-polling HTTP handlers, wait for new data
+    instead of polling for it.
+
+    Args:
+      run: A string name of a run, or None for all the runs.
+      tag: A string tag, or None for all the tags.
+      generation: The generation of the data that the caller already has, as
+        returned by `Generation(run, tag)`.
+      timeout: The number of seconds to wait for, or None to wait for as long
+        as it takes.
+
+    Raises:
+      KeyError: If the run is not found.
+
+    Returns:
+      The generation of the data, which equals `generation` only if the wait
+      timed out.
+    """
+    return event_accumulator.WaitForGeneration(
+        lambda: self.Generation(run, tag), generation, timeout)
+
+  def GraphGeneration(self, run):
+    """Returns a number that increases whenever the graph of a run changes.
+
+    Args:
+      run: A string name of a run.
+
+    Raises:
+      KeyError: If the run is not found.
+
+    Returns:
+      The `EventAccumulator.GraphGeneration` of `run`.
+    """
+    return self._GetAccumulator(run).GraphGeneration()
+
   def Scalars(self, run, tag):
     """Retrieve the scalar events associated with a run and tag.
 
@@ -301,13 +457,85 @@ class EventMultiplexer(object):
         for run_name, accumulator in items
     }
 
+  def RunsWithGenerations(self):
+    """Return all the run names, with the generations of their data.
+
+    Clients can compare the generations with those of an earlier call to find
+    out which runs and tags have new data, and fetch only those.
+
+    Returns:
+    ```
+      {runName: {tags: { images: [tag1, tag2, tag3],
+                         ...
+                         graph: true},
+                 generation: 57,
+                 tagGenerations: {tag1: 12, tag2: 57, ...}}}
+    ```
+      where `tags` is as returned by `Runs`, and the generations are as
+      returned by `Generation`.
+    """
+    with self._accumulators_mutex:
+      items = list(self._accumulators.iteritems())
+    runs = {}
+    for run_name, accumulator in items:
+      # Read the generations before the tags, so that the tags are never older
+      # than the generations claim.
+      generation = accumulator.Generation()
+      tag_generations = accumulator.TagGenerations()
+      runs[run_name] = {'tags': accumulator.Tags(),
+                        'generation': generation,
+                        'tagGenerations': tag_generations}
+    return runs
+
   def _GetAccumulator(self, run):
     with self._accumulators_mutex:
       return self._accumulators[run]
 
+  def _CachePath(self, path):
+    """Returns the path of the cache for the run at `path`, or None."""
+    if self._cache_dir is None:
+      return None
+    return os.path.join(self._cache_dir,
+                        hashlib.md5(path).hexdigest() + '.cache')
+
+
+def _OutstandingBytes(loader):
+  """Returns `loader.OutstandingBytes()`, or 0 if it fails.
+
+  Event files can be deleted or rotated at any time. The run is still
+  reloaded, which reports the error if it persists.
+
+  Args:
+    loader: An `EventAccumulator`.
+
+  Returns:
+    The number of bytes that `loader` has yet to load.
+  """
+  try:
+    return loader.OutstandingBytes()
+  except Exception as e:  # pylint: disable=broad-except
+    logging.warning('Failed to get the size of the new data of a run: %s', e)
+    return 0
+
+
+def _ReloadAndLogErrors(loader):
+  """Calls `loader.Reload()`, and logs any error instead of raising it.
+
+  This keeps automatic updates running when a reload fails, for example
+  because an event file is corrupt.
+
+  Args:
+    loader: An `EventMultiplexer` or `EventAccumulator`.
+  """
+  try:
+    loader.Reload()
+  except Exception as e:  # pylint: disable=broad-except
+    logging.error('Failed to reload runs: %s', e)
+
 
 def AutoloadingMultiplexer(path_to_run, interval_secs=60,
-    size_guidance=event_accumulator.DEFAULT_SIZE_GUIDANCE):
+    size_guidance=event_accumulator.DEFAULT_SIZE_GUIDANCE,
+    reload_threads=DEFAULT_RELOAD_THREADS, cache_dir=None, use_inotify=False):
   """Create an `EventMultiplexer` that automatically loads runs in directories.
 
   Args:
@@ -320,6 +548,12 @@ def AutoloadingMultiplexer(path_to_run, interval_secs=60,
     interval_secs: How often to poll the directory for new runs.
     size_guidance: How much data to store for each tag of various types - see
       `event_accumulator.EventAccumulator`.
+    reload_threads: The maximum number of runs that `Reload` loads
+      concurrently.
+    cache_dir: If not None, a directory in which to cache the data of each
+      run - see `EventMultiplexer`.
+    use_inotify: Whether to use inotify to find out which directories changed
+      - see `EventMultiplexer`.
 
   Returns:
     The multiplexer which will automatically load from the directories.
@@ -328,7 +562,10 @@ def AutoloadingMultiplexer(path_to_run, interval_secs=60,
     ValueError: if `path_to_run` is `None`
     TypeError: if `path_to_run` is not a dict
   """
-  multiplexer = EventMultiplexer(size_guidance=size_guidance)
+  multiplexer = EventMultiplexer(size_guidance=size_guidance,
+                                 reload_threads=reload_threads,
+                                 cache_dir=cache_dir,
+                                 use_inotify=use_inotify)
   if path_to_run is None:
     raise ValueError('Cant construct an autoloading multiplexer without runs.')
   if not isinstance(path_to_run, dict):
@@ -1,4 +1,5 @@
 import os
+import threading
 
 import tensorflow.python.platform
 
@@ -13,9 +14,12 @@ class _FakeAccumulator(object):
 
   def __init__(self, path):
     self._path = path
-    self.autoupdate_called = False
-    self.autoupdate_interval = None
     self.reload_called = False
+    self.reloaded = threading.Event()
+    self.outstanding_bytes = 0
+    self.reload_log = None
+    self.generation = 0
+    self.graph_generation = 0
 
   def Tags(self):
     return {event_accumulator.IMAGES: ['im1', 'im2'],
@@ -43,15 +47,30 @@ class _FakeAccumulator(object):
       raise KeyError
     return ['%s/%s' % (self._path, tag_name)]
 
-  def AutoUpdate(self, interval):
-    self.autoupdate_called = True
-    self.autoupdate_interval = interval
-
   def Reload(self):
     self.reload_called = True
+    self.reloaded.set()
+    if self.reload_log is not None:
+      self.reload_log.append(self._path)
+
+  def OutstandingBytes(self):
+    return self.outstanding_bytes
+
+  def Generation(self, tag=None):
+    if tag is None:
+      return self.generation
+    return self.TagGenerations().get(tag, 0)
 
+  def TagGenerations(self):
+    return {'sv1': self.generation}
 
-def _GetFakeAccumulator(path, size_guidance):  # pylint: disable=unused-argument
+  def GraphGeneration(self):
+    return self.graph_generation
+
+
+def _GetFakeAccumulator(path, size_guidance, cache_path=None,
+                        directory_lister=None):
+  # pylint: disable=unused-argument
   return _FakeAccumulator(path)
 
 
@@ -79,13 +98,113 @@ class EventMultiplexerTest(test_util.TensorFlowTestCase):
     self.assertTrue(x._GetAccumulator('run1').reload_called)
     self.assertTrue(x._GetAccumulator('run2').reload_called)
 
+  def testReloadPrioritizesGrownRuns(self):
+    x = event_multiplexer.EventMultiplexer(
+        {'run1': 'path1', 'run2': 'path2', 'run3': 'path3'}, reload_threads=1)
+    reload_log = []
+    for run, outstanding_bytes in [('run1', 0), ('run2', 100), ('run3', 10)]:
+      x._GetAccumulator(run).outstanding_bytes = outstanding_bytes
+      x._GetAccumulator(run).reload_log = reload_log
+    x.Reload()
+    self.assertEqual(['path2', 'path3', 'path1'], reload_log)
+
+  def testReloadWhenOutstandingBytesFails(self):
+    x = event_multiplexer.EventMultiplexer(
+        {'run1': 'path1', 'run2': 'path2'}, reload_threads=1)
+    def _Raise():
+      raise IOError('The event file was deleted')
+    x._GetAccumulator('run1').OutstandingBytes = _Raise
+    x.Reload()
+    self.assertTrue(x._GetAccumulator('run1').reload_called)
+    self.assertTrue(x._GetAccumulator('run2').reload_called)
+
+  def testReloadInParallel(self):
+    runs = dict(('run%d' % i, 'path%d' % i) for i in xrange(20))
+    x = event_multiplexer.EventMultiplexer(runs, reload_threads=4)
+    reload_log = []
+    for run in runs:
+      x._GetAccumulator(run).reload_log = reload_log
+    x.Reload()
+    self.assertItemsEqual(runs.values(), reload_log)
+
+  def testReloadRaisesAfterReloadingOtherRuns(self):
+    x = event_multiplexer.EventMultiplexer(
+        {'run1': 'path1', 'run2': 'path2'}, reload_threads=2)
+    def _Raise():
+      raise IOError('Failed to open a record reader')
+    x._GetAccumulator('run1').outstanding_bytes = 1
+    x._GetAccumulator('run1').Reload = _Raise
+    with self.assertRaises(IOError):
+      x.Reload()
+    self.assertTrue(x._GetAccumulator('run2').reload_called)
+
+  def testInvalidReloadThreads(self):
+    with self.assertRaises(ValueError):
+      event_multiplexer.EventMultiplexer(reload_threads=0)
+
+  def testGeneration(self):
+    x = event_multiplexer.EventMultiplexer()
+    self.assertEqual(0, x.Generation())
+    x.AddRun('path1', 'run1')
+    x.AddRun('path2', 'run2')
+    x._GetAccumulator('run1').generation = 3
+    x._GetAccumulator('run2').generation = 5
+    self.assertEqual(3, x.Generation('run1'))
+    self.assertEqual(5, x.Generation())
+    self.assertEqual(3, x.Generation('run1', 'sv1'))
+    self.assertEqual(0, x.Generation('run1', 'sv2'))
+    with self.assertRaises(KeyError):
+      x.Generation('sir not appearing in this film')
+
+  def testGraphGeneration(self):
+    x = event_multiplexer.EventMultiplexer({'run1': 'path1'})
+    x._GetAccumulator('run1').generation = 5
+    x._GetAccumulator('run1').graph_generation = 3
+    self.assertEqual(3, x.GraphGeneration('run1'))
+    with self.assertRaises(KeyError):
+      x.GraphGeneration('sir not appearing in this film')
+
+  def testWaitForChange(self):
+    x = event_multiplexer.EventMultiplexer({'run1': 'path1'})
+    x._GetAccumulator('run1').generation = 3
+    self.assertEqual(3, x.WaitForChange('run1', None, 2))
+    self.assertEqual(3, x.WaitForChange(None, 'sv1', 2))
+    self.assertEqual(3, x.WaitForChange('run1', None, 3, timeout=0.01))
+    with self.assertRaises(KeyError):
+      x.WaitForChange('sir not appearing in this film', None, 3)
+
+  def testRunsWithGenerations(self):
+    x = event_multiplexer.EventMultiplexer({'run1': 'path1'})
+    x._GetAccumulator('run1').generation = 3
+    runs = x.RunsWithGenerations()
+    self.assertEqual(['run1'], runs.keys())
+    self.assertEqual(x.Runs()['run1'], runs['run1']['tags'])
+    self.assertEqual(3, runs['run1']['generation'])
+    self.assertEqual({'sv1': 3}, runs['run1']['tagGenerations'])
+
   def testAutoUpdate(self):
-    x = event_multiplexer.EventMultiplexer({'run1': 'path1', 'run2': 'path2'})
+    x = event_multiplexer.EventMultiplexer(
+        {'run1': 'path1', 'run2': 'path2'}, reload_threads=1)
+    reload_log = []
+    for run, outstanding_bytes in [('run1', 0), ('run2', 100)]:
+      x._GetAccumulator(run).outstanding_bytes = outstanding_bytes
+      x._GetAccumulator(run).reload_log = reload_log
     x.AutoUpdate(5)
-    self.assertTrue(x._GetAccumulator('run1').autoupdate_called)
-    self.assertEqual(x._GetAccumulator('run1').autoupdate_interval, 5)
-    self.assertTrue(x._GetAccumulator('run2').autoupdate_called)
-    self.assertEqual(x._GetAccumulator('run2').autoupdate_interval, 5)
+    self.assertTrue(x._GetAccumulator('run1').reloaded.wait(10))
+    # The runs are reloaded by the multiplexer, grown runs first.
+    self.assertEqual(['path2', 'path1'], reload_log)
+
+  def testAutoUpdateContinuesAfterReloadFails(self):
+    x = event_multiplexer.EventMultiplexer({'run1': 'path1'})
+    accumulator = x._GetAccumulator('run1')
+    reloaded = threading.Semaphore(0)
+    def _Reload():
+      reloaded.release()
+      raise IOError('The event file is corrupt')
+    accumulator.Reload = _Reload
+    x.AutoUpdate(0.01)
+    reloaded.acquire()
+    reloaded.acquire()
 
   def testScalars(self):
     x = event_multiplexer.EventMultiplexer({'run1': 'path1', 'run2': 'path2'})
@@ -235,10 +354,8 @@ class EventMultiplexerTest(test_util.TensorFlowTestCase):
     x.AutoUpdate(5)
     x.AddRun('run1')
     x.AddRun('run2')
-    self.assertTrue(x._GetAccumulator('run1').autoupdate_called)
-    self.assertTrue(x._GetAccumulator('run2').autoupdate_called)
-    self.assertEqual(x._GetAccumulator('run1').autoupdate_interval, 5)
-    self.assertEqual(x._GetAccumulator('run2').autoupdate_interval, 5)
+    self.assertTrue(x._GetAccumulator('run1').reloaded.wait(10))
+    self.assertTrue(x._GetAccumulator('run2').reloaded.wait(10))
 
 if __name__ == '__main__':
   googletest.main()
@@ -0,0 +1,242 @@
+"""Contains the implementation for the DirectoryLister class."""
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import threading
+import time
+
+from tensorflow.python.platform import gfile
+from tensorflow.python.platform import logging
+
+# A listing is only reused while the directory's modification time is
+# unchanged if the directory was last modified at least this many seconds
+# before it was listed. Otherwise, an entry added within the same tick of the
+# file system's clock, after the listing, would not change the modification
+# time, and would never be seen.
+_MTIME_GRANULARITY_SECS = 2
+
+
+class DirectoryLister(object):
+  """Lists directories, and caches the listings until the directories change.
+
+  By default, a directory is only listed again if its modification time has
+  changed. Checking the modification time is much cheaper than listing a large
+  directory, especially on network file systems.
+
+  With `use_inotify`, the lister instead has the Linux kernel report changes to
+  the directories that it has listed, so that checking an unchanged directory
+  costs no file system calls at all. inotify does not see changes made by other
+  hosts to network file systems, so it should only be used for local disks.
+
+  A `DirectoryLister` is thread safe, so one lister can be shared by everything
+  that watches the same directories.
+
+  @@ListDirectory
+  @@Subdirectories
+  """
+
+  def __init__(self, use_inotify=False):
+    """Constructs a new DirectoryLister.
+
+    Args:
+      use_inotify: Whether to use inotify to find out whether directories
+        changed. If inotify is not available, modification times are checked
+        instead.
+    """
+    self._lock = threading.Lock()
+    # Maps each directory path to its _Listing.
+    self._listings = {}
+    # The number of changes that inotify has reported.
+    self._change_count = 0
+    self._inotify = None
+    if use_inotify:
+      try:
+        self._inotify = _Inotify()
+      except OSError as e:
+        logging.warning('Cannot use inotify, checking modification times '
+                        'instead: %s', e)
+
+  def ListDirectory(self, directory):
+    """Lists a directory, like `gfile.ListDirectory`.
+
+    Args:
+      directory: The path of the directory to list.
+
+    Raises:
+      gfile.GOSError: If the directory cannot be listed.
+
+    Returns:
+      The sorted names of the entries in the directory, in a list that
+      must not be modified.
+    """
+    return self._GetListing(directory).names
+
+  def Subdirectories(self, directory):
+    """Lists the subdirectories of a directory.
+
+    Args:
+      directory: The path of the directory to list.
+
+    Raises:
+      gfile.GOSError: If the directory cannot be listed.
+
+    Returns:
+      The sorted names of the subdirectories of the directory, in a list that
+      must not be modified.
+    """
+    listing = self._GetListing(directory)
+    if listing.subdirectories is None:
+      listing.subdirectories = [
+          name for name in listing.names
+          if gfile.IsDirectory(os.path.join(directory, name))]
+    return listing.subdirectories
+
+  def _GetListing(self, directory):
+    """Returns an up to date `_Listing` of `directory`."""
+    with self._lock:
+      if self._inotify:
+        changed_directories = self._inotify.ReadChanges()
+        if changed_directories is None:
+          self._listings.clear()
+          self._change_count += 1
+        else:
+          for changed_directory in changed_directories:
+            self._listings.pop(changed_directory, None)
+          self._change_count += len(changed_directories)
+      listing = self._listings.get(directory)
+      change_count = self._change_count
+
+    if self._inotify:
+      if listing is not None:
+        return listing
+      mtime = None
+      try:
+        # Watch the directory before listing it, so that no change is missed.
+        with self._lock:
+          self._inotify.Watch(directory)
+        cacheable = True
+      except OSError:
+        # The directory probably does not exist, so listing it will fail.
+        cacheable = False
+    else:
+      mtime = gfile.ModificationTime(directory)
+      if listing is not None and listing.mtime == mtime:
+        return listing
+    list_time = time.time()
+    listing = _Listing(sorted(gfile.ListDirectory(directory)), mtime)
+    if mtime is not None:
+      cacheable = list_time - mtime >= _MTIME_GRANULARITY_SECS
+
+    if cacheable:
+      with self._lock:
+        # If inotify reported changes while the directory was listed, the
+        # listing may already be out of date.
+        if change_count == self._change_count:
+          self._listings[directory] = listing
+    return listing
+
+
+class _Listing(object):
+  """The entries of a directory at some modification time."""
+
+  def __init__(self, names, mtime):
+    self.names = names
+    self.mtime = mtime
+    # The subdirectories among names, which are only found if needed.
+    self.subdirectories = None
+
+
+# Constants from <sys/inotify.h>.
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_CLOEXEC = 0o2000000
+_IN_NONBLOCK = 0o4000
+
+# The events that change the entries of a directory.
+_IN_DIRECTORY_CHANGES = (_IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE |
+                         _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+
+# The struct inotify_event header, which is followed by a name of len bytes.
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class _Inotify(object):
+  """Reports the changes to directories, using Linux's inotify API."""
+
+  def __init__(self):
+    """Creates an inotify instance.
+
+    Raises:
+      OSError: If inotify is not available.
+    """
+    libc_name = ctypes.util.find_library('c')
+    if not libc_name:
+      raise OSError(errno.ENOSYS, 'Cannot find the C library')
+    self._libc = ctypes.CDLL(libc_name, use_errno=True)
+    if not hasattr(self._libc, 'inotify_init1'):
+      raise OSError(errno.ENOSYS, 'The C library does not support inotify')
+    self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+    if self._fd < 0:
+      _RaiseErrno()
+    # Maps each watch descriptor to the path of the directory it watches.
+    self._directories = {}
+
+  def __del__(self):
+    if getattr(self, '_fd', -1) >= 0:
+      os.close(self._fd)
+
+  def Watch(self, directory):
+    """Starts reporting the changes to `directory`.
+
+    Raises:
+      OSError: If the directory cannot be watched.
+    """
+    wd = self._libc.inotify_add_watch(self._fd, directory,
+                                      _IN_DIRECTORY_CHANGES)
+    if wd < 0:
+      _RaiseErrno()
+    self._directories[wd] = directory
+
+  def ReadChanges(self):
+    """Returns the directories that changed since the last call.
+
+    A directory that is deleted is reported as changed, and no longer watched.
+
+    Returns:
+      A set of directory paths, or None if the kernel dropped some events, in
+      which case any directory may have changed.
+    """
+    changed_directories = set()
+    while True:
+      try:
+        data = os.read(self._fd, 65536)
+      except OSError as e:
+        if e.errno == errno.EAGAIN:
+          return changed_directories
+        raise
+      offset = 0
+      while offset < len(data):
+        wd, mask, unused_cookie, name_length = _INOTIFY_EVENT.unpack_from(
+            data, offset)
+        offset += _INOTIFY_EVENT.size + name_length
+        if mask & _IN_Q_OVERFLOW:
+          return None
+        directory = self._directories.get(wd)
+        if directory is not None:
+          changed_directories.add(directory)
+        if mask & _IN_IGNORED:
+          self._directories.pop(wd, None)
+
+
+def _RaiseErrno():
+  """Raises an `OSError` for the error of the last C library call."""
+  error = ctypes.get_errno()
+  raise OSError(error, os.strerror(error))
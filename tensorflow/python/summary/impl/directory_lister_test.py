@@ -0,0 +1,93 @@
+"""Tests for directory_lister."""
+
+import os
+import shutil
+import time
+
+from tensorflow.python.framework import test_util
+from tensorflow.python.platform import gfile
+from tensorflow.python.platform import googletest
+from tensorflow.python.summary.impl import directory_lister
+
+
+class DirectoryListerTest(test_util.TensorFlowTestCase):
+
+  def setUp(self):
+    self._directory = os.path.join(self.get_temp_dir(), 'listed_dir')
+    os.mkdir(self._directory)
+
+  def tearDown(self):
+    shutil.rmtree(self._directory)
+
+  def _Create(self, name):
+    open(os.path.join(self._directory, name), 'w').close()
+
+  def _SetModificationTime(self, mtime):
+    os.utime(self._directory, (mtime, mtime))
+
+  def testListDirectory(self):
+    self._Create('b')
+    self._Create('a')
+    self._Create('.hidden')
+    lister = directory_lister.DirectoryLister()
+    self.assertEqual(['a', 'b'], lister.ListDirectory(self._directory))
+
+  def testSubdirectories(self):
+    self._Create('a')
+    os.mkdir(os.path.join(self._directory, 'c'))
+    os.mkdir(os.path.join(self._directory, 'b'))
+    lister = directory_lister.DirectoryLister()
+    self.assertEqual(['a', 'b', 'c'], lister.ListDirectory(self._directory))
+    self.assertEqual(['b', 'c'], lister.Subdirectories(self._directory))
+
+  def testRelistsModifiedDirectory(self):
+    self._Create('a')
+    self._SetModificationTime(1000)
+    lister = directory_lister.DirectoryLister()
+    self.assertEqual(['a'], lister.ListDirectory(self._directory))
+    self._Create('b')
+    self.assertEqual(['a', 'b'], lister.ListDirectory(self._directory))
+
+  def testReusesListingOfUnmodifiedDirectory(self):
+    self._Create('a')
+    self._SetModificationTime(1000)
+    lister = directory_lister.DirectoryLister()
+    self.assertEqual(['a'], lister.ListDirectory(self._directory))
+    # Hide the new file from the lister by restoring the modification time.
+    self._Create('b')
+    self._SetModificationTime(1000)
+    self.assertEqual(['a'], lister.ListDirectory(self._directory))
+
+  def testRelistsRecentlyModifiedDirectory(self):
+    now = time.time()
+    self._Create('a')
+    self._SetModificationTime(now)
+    lister = directory_lister.DirectoryLister()
+    self.assertEqual(['a'], lister.ListDirectory(self._directory))
+    # The modification time is too recent to show that nothing was added.
+    self._Create('b')
+    self._SetModificationTime(now)
+    self.assertEqual(['a', 'b'], lister.ListDirectory(self._directory))
+
+  def testInotify(self):
+    lister = directory_lister.DirectoryLister(use_inotify=True)
+    self._Create('a')
+    self.assertEqual(['a'], lister.ListDirectory(self._directory))
+    self.assertEqual(['a'], lister.ListDirectory(self._directory))
+    self._Create('b')
+    self.assertEqual(['a', 'b'], lister.ListDirectory(self._directory))
+    os.rename(os.path.join(self._directory, 'a'),
+              os.path.join(self._directory, 'c'))
+    self.assertEqual(['b', 'c'], lister.ListDirectory(self._directory))
+    os.mkdir(os.path.join(self._directory, 'd'))
+    self.assertEqual(['d'], lister.Subdirectories(self._directory))
+
+  def testMissingDirectory(self):
+    for use_inotify in [False, True]:
+      lister = directory_lister.DirectoryLister(use_inotify)
+      with self.assertRaises(gfile.GOSError):
+        lister.ListDirectory(os.path.join(self._directory, 'missing'))
+
+
+if __name__ == '__main__':
+  googletest.main()
@@ -1,8 +1,10 @@
 """Contains the implementation for the DirectoryWatcher class."""
+import bisect
 import os
 
 from tensorflow.python.platform import gfile
 from tensorflow.python.platform import logging
+from tensorflow.python.summary.impl import directory_lister
 
 
 class DirectoryWatcher(object):
@@ -16,7 +18,8 @@ class DirectoryWatcher(object):
   and the only file ever changed is whichever one is lexicographically last.
   """
 
-  def __init__(self, directory, loader_factory, path_filter=lambda x: True):
+  def __init__(self, directory, loader_factory, path_filter=lambda x: True,
+               lister=None):
     """Constructs a new DirectoryWatcher.
 
     Args:
@@ -24,8 +27,15 @@ class DirectoryWatcher(object):
       loader_factory: A factory for creating loaders. The factory should take a
         file path and return an object that has a Load method returning an
         iterator that will yield all events that have not been yielded yet.
+        To support `Position` and `Seek`, the factory must also take the
+        offset of the first event to load as an optional second argument, and
+        the loaders must have a `Position` method like
+        `EventFileLoader.Position`.
       path_filter: Only files whose full path matches this predicate will be
         loaded. If not specified, all files are loaded.
+      lister: The `directory_lister.DirectoryLister` that lists the directory,
+        which may be shared with other watchers. If not specified, the
+        watcher creates its own.
 
     Raises:
       ValueError: If directory or loader_factory is None.
@@ -38,7 +48,10 @@ class DirectoryWatcher(object):
     self._loader_factory = loader_factory
     self._loader = None
     self._path = None
+    # The size of the file at self._path when we last started loading from it.
+    self._loaded_size = 0
     self._path_filter = path_filter
+    self._lister = lister or directory_lister.DirectoryLister()
 
   def Load(self):
     """Loads new values from disk.
@@ -57,6 +70,8 @@ class DirectoryWatcher(object):
     # If the loader exists, check it for a value.
     if not self._loader:
       self._InitializeLoader()
+    else:
+      self._UpdateLoadedSize()
 
     while True:
       # Yield all the new events in the file we're currently loading from.
@@ -101,15 +116,84 @@ class DirectoryWatcher(object):
     else:
       raise StopIteration
 
+  def Position(self):
+    """Returns the position of the next value to load.
+
+    Returns:
+      A `(path, offset)` tuple, which can be passed to `Seek`, or None if no
+      file has been loaded yet.
+    """
+    if not self._loader:
+      return None
+    return self._loader.Position()
+
+  def Seek(self, path, offset):
+    """Continues loading from a position returned by `Position`.
+
+    Files before `path` are skipped, and `path` is loaded from `offset`.
+
+    Args:
+      path: The path of the file to continue loading.
+      offset: The offset in the file of the next value to load.
+    """
+    self._path = path
+    self._loaded_size = offset
+    self._loader = self._loader_factory(path, offset)
+
+  def OutstandingBytes(self):
+    """Estimates how much data has been written since `Load()` last ran.
+
+    This is cheap compared to `Load()`, so it can be used to decide which of
+    several watchers to load from first.
+
+    Returns:
+      The number of bytes appended to the current file since `Load()` last
+      started reading it, plus the sizes of all newer files.
+    """
+    if not gfile.IsDirectory(self._directory):
+      return 0
+    outstanding_bytes = sum(_FileSize(path) for path in self._NewerPaths())
+    if self._path:
+      outstanding_bytes += max(0, _FileSize(self._path) - self._loaded_size)
+    return outstanding_bytes
+
   def _SetPath(self, path):
     self._path = path
+    self._loaded_size = 0
+    self._UpdateLoadedSize()
     self._loader = self._loader_factory(path)
 
+  def _UpdateLoadedSize(self):
+    """Records the size of the current file before loading from it.
+
+    The size is only used by `OutstandingBytes`, so if the file cannot be
+    stat'ed (for example, because it was deleted, but the loader can still
+    read it), the previous size is kept.
+    """
+    try:
+      self._loaded_size = _FileSize(self._path)
+    except (IOError, OSError) as e:
+      logging.warning('Unable to get the size of %s: %s', self._path, e)
+
   def _GetNextPath(self):
     """Returns the path of the next file to use or None if no file exists."""
-    sorted_paths = [os.path.join(self._directory, path)
-                    for path in sorted(gfile.ListDirectory(self._directory))]
+    return next(self._NewerPaths(), None)
+
+  def _NewerPaths(self):
+    """Returns an iterator over the paths after the current path, in order."""
+    names = self._lister.ListDirectory(self._directory)
+    if self._path:
+      # Only the names after the current one need to be joined and filtered.
+      start = bisect.bisect_right(names, os.path.basename(self._path))
+    else:
+      start = 0
+    paths = (os.path.join(self._directory, names[i])
+             for i in xrange(start, len(names)))
     # We filter here so the filter gets the full directory name.
-    filtered_paths = (path for path in sorted_paths
-                      if self._path_filter(path) and path > self._path)
-    return next(filtered_paths, None)
+    return (path for path in paths if self._path_filter(path))
+
+
+def _FileSize(path):
+  """Returns the size of the file at `path` in bytes."""
+  with gfile.GFile(path, 'r') as f:
+    return f.Size()
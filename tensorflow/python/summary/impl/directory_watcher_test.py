@@ -11,8 +11,13 @@ from tensorflow.python.summary.impl import directory_watcher
 class _ByteLoader(object):
   """A loader that loads individual bytes from a file."""
 
-  def __init__(self, path):
+  def __init__(self, path, start_offset=0):
+    self._path = path
     self._f = open(path)
+    self._f.seek(start_offset)
+
+  def Position(self):
+    return (self._path, self._f.tell())
 
   def Load(self):
     while True:
@@ -88,6 +93,48 @@ class DirectoryWatcherTest(test_util.TensorFlowTestCase):
     self._WriteToFile('c', 'c')
     self.assertWatcherYields(['a', 'c'])
 
+  def testOutstandingBytes(self):
+    self.assertEqual(0, self._watcher.OutstandingBytes())
+    self._WriteToFile('a', 'ab')
+    self._WriteToFile('b', 'c')
+    self.assertEqual(3, self._watcher.OutstandingBytes())
+    self.assertWatcherYields(['a', 'b', 'c'])
+    self.assertEqual(0, self._watcher.OutstandingBytes())
+    self._WriteToFile('c', 'de')
+    self.assertEqual(2, self._watcher.OutstandingBytes())
+    self.assertWatcherYields(['d', 'e'])
+    self.assertEqual(0, self._watcher.OutstandingBytes())
+    self._WriteToFile('c', 'f')
+    self._WriteToFile('d', 'gh')
+    self.assertEqual(3, self._watcher.OutstandingBytes())
+
+  def testLoadAfterFileIsDeleted(self):
+    self._WriteToFile('a', 'abc')
+    self.assertEqual('a', next(self._watcher.Load()))
+    os.remove(os.path.join(self._directory, 'a'))
+    # The loader can still read the rest of the file.
+    self.assertWatcherYields(['b', 'c'])
+    self._WriteToFile('b', 'd')
+    self.assertWatcherYields(['d'])
+
+  def testOutstandingBytesWithoutDirectory(self):
+    watcher = directory_watcher.DirectoryWatcher(
+        os.path.join(self._directory, 'missing'), _ByteLoader)
+    self.assertEqual(0, watcher.OutstandingBytes())
+
+  def testPositionAndSeek(self):
+    self.assertEqual(None, self._watcher.Position())
+    self._WriteToFile('a', 'abc')
+    self._WriteToFile('b', 'de')
+    self.assertWatcherYields(['a', 'b', 'c', 'd', 'e'])
+    self.assertEqual((os.path.join(self._directory, 'b'), 2),
+                     self._watcher.Position())
+    self._watcher = directory_watcher.DirectoryWatcher(
+        self._directory, _ByteLoader)
+    self._watcher.Seek(os.path.join(self._directory, 'a'), 1)
+    self.assertEqual(4, self._watcher.OutstandingBytes())
+    self.assertWatcherYields(['b', 'c', 'd', 'e'])
+
   def testFileFilter(self):
     self._watcher = directory_watcher.DirectoryWatcher(
         self._directory, _ByteLoader,
@@ -3,19 +3,33 @@
 from tensorflow.core.util import event_pb2
 from tensorflow.python import pywrap_tensorflow
 from tensorflow.python.platform import app
+from tensorflow.python.platform import gfile
 from tensorflow.python.platform import logging
 
 
 class EventFileLoader(object):
   """An EventLoader is an iterator that yields Event protos."""
 
-  def __init__(self, file_path):
+  def __init__(self, file_path, start_offset=0):
+    """Constructs an `EventFileLoader`.
+
+    Args:
+      file_path: The path of the event file to load.
+      start_offset: The offset in the file of the first event to load.
+
+    Raises:
+      ValueError: If `file_path` is None.
+      IOError: If the file cannot be opened.
+    """
     if file_path is None:
       raise ValueError('A file path is required')
     logging.debug('Opening a record reader pointing at %s', file_path)
-    self._reader = pywrap_tensorflow.PyRecordReader_New(file_path, 0)
+    self._reader = pywrap_tensorflow.PyRecordReader_New(file_path,
+                                                        start_offset)
     # Store it for logging purposes.
     self._file_path = file_path
+    # The offset that Load() last finished reading at.
+    self._loaded_size = start_offset
     if not self._reader:
       raise IOError('Failed to open a record reader pointing to %s' % file_path)
 
@@ -34,6 +48,44 @@ class EventFileLoader(object):
       event.ParseFromString(self._reader.record())
       yield event
     logging.debug('No more events in %s', self._file_path)
+    self._loaded_size = self._reader.offset()
+
+  def Position(self):
+    """Returns the position of the next event to load.
+
+    Returns:
+      A `(file_path, offset)` tuple, which can be passed to `Seek`.
+    """
+    return (self._file_path, self._reader.offset())
+
+  def Seek(self, file_path, offset):
+    """Continues loading from a position returned by `Position`.
+
+    Args:
+      file_path: The path of the event file, which must be the path that this
+        loader was constructed with.
+      offset: The offset in the file of the next event to load.
+
+    Raises:
+      ValueError: If `file_path` is not the file this loader reads.
+      IOError: If the file cannot be opened.
+    """
+    if file_path != self._file_path:
+      raise ValueError('Cannot seek to %s in a loader for %s' %
+                       (file_path, self._file_path))
+    reader = pywrap_tensorflow.PyRecordReader_New(file_path, offset)
+    if not reader:
+      raise IOError('Failed to open a record reader pointing to %s' % file_path)
+    self._reader = reader
+    self._loaded_size = offset
+
+  def OutstandingBytes(self):
+    """Returns the number of bytes that `Load()` has not read yet."""
+    return max(0, self._FileSize() - self._loaded_size)
+
+  def _FileSize(self):
+    with gfile.GFile(self._file_path, 'r') as f:
+      return f.Size()
 
 
 def main(argv):
@@ -48,6 +48,43 @@ class EventFileLoaderTest(test_util.TensorFlowTestCase):
     loader.Load()
     self.assertEquals(len(list(loader.Load())), 1)
 
+  def testOutstandingBytes(self):
+    self._WriteToFile('outstanding_event_file', EventFileLoaderTest.RECORD)
+    loader = self._LoaderForTestFile('outstanding_event_file')
+    self.assertEquals(len(EventFileLoaderTest.RECORD),
+                      loader.OutstandingBytes())
+    self.assertEquals(len(list(loader.Load())), 1)
+    self.assertEquals(0, loader.OutstandingBytes())
+    self._WriteToFile('outstanding_event_file', EventFileLoaderTest.RECORD)
+    self.assertEquals(len(EventFileLoaderTest.RECORD),
+                      loader.OutstandingBytes())
+
+  def testLoadAfterFileIsDeleted(self):
+    self._WriteToFile('deleted_event_file', EventFileLoaderTest.RECORD)
+    self._WriteToFile('deleted_event_file', EventFileLoaderTest.RECORD)
+    loader = self._LoaderForTestFile('deleted_event_file')
+    next(loader.Load())
+    os.remove(os.path.join(self.get_temp_dir(), 'deleted_event_file'))
+    # The open reader can still read the rest of the file.
+    self.assertEquals(len(list(loader.Load())), 1)
+
+  def testPositionAndSeek(self):
+    self._WriteToFile('seek_event_file', EventFileLoaderTest.RECORD)
+    loader = self._LoaderForTestFile('seek_event_file')
+    path, offset = loader.Position()
+    self.assertEquals(0, offset)
+    self.assertEquals(len(list(loader.Load())), 1)
+    self.assertEquals((path, len(EventFileLoaderTest.RECORD)),
+                      loader.Position())
+    self._WriteToFile('seek_event_file', EventFileLoaderTest.RECORD)
+    resumed_loader = event_file_loader.EventFileLoader(path)
+    resumed_loader.Seek(*loader.Position())
+    self.assertEquals(len(list(resumed_loader.Load())), 1)
+    loader.Seek(path, 0)
+    self.assertEquals(len(list(loader.Load())), 2)
+    with self.assertRaises(ValueError):
+      loader.Seek(path + '_other', 0)
+
   def testMultipleWritesAtOnce(self):
     self._WriteToFile('multiple_event_file', EventFileLoaderTest.RECORD)
     self._WriteToFile('multiple_event_file', EventFileLoaderTest.RECORD)
@@ -36,7 +36,7 @@ class Reservoir(object):
 
   """
 
-  def __init__(self, size, seed=0):
+  def __init__(self, size, seed=0, items_factory=list):
     """Creates a new reservoir.
 
     Args:
@@ -45,6 +45,10 @@ class Reservoir(object):
       seed: The seed of the random number generator to use when sampling.
         Different values for |seed| will produce different samples from the same
         input items.
+      items_factory: A callable that returns an empty container for the items
+        of a key. The container must support `len`, `append`, `pop`, item
+        and slice assignment, and copying with `[:]`, like a list. Defaults
+        to `list`.
 
     Raises:
       ValueError: If size is negative or not an integer.
@@ -52,7 +56,7 @@ class Reservoir(object):
     if size < 0 or size != round(size):
       raise ValueError('size must be nonegative integer, was %s' % size)
     self._buckets = collections.defaultdict(
-        lambda: _ReservoirBucket(size, random.Random(seed)))
+        lambda: _ReservoirBucket(size, random.Random(seed), items_factory()))
     # _mutex guards the keys - creating new keys, retreiving by key, etc
     # the internal items are guarded by the ReservoirBuckets' internal mutexes
     self._mutex = threading.Lock()
@@ -84,6 +88,54 @@ class Reservoir(object):
       bucket = self._buckets[key]
     return bucket.Items()
 
+  def Snapshot(self, key):
+    """Return a copy of the items associated with given key.
+
+    Unlike `Items`, the copy is taken while no item is being added, so it is
+    consistent even if other threads keep adding items.
+
+    Args:
+      key: The key for which we are finding associated items.
+
+    Raises:
+      KeyError: If the key is not found in the reservoir.
+
+    Returns:
+      A copy of the items associated with that key, made with `[:]`.
+    """
+    with self._mutex:
+      if key not in self._buckets:
+        raise KeyError('Key %s was not found in Reservoir' % key)
+      bucket = self._buckets[key]
+    return bucket.Snapshot()
+
+  def GetState(self):
+    """Returns the contents of the reservoir.
+
+    Returns:
+      A dictionary that can be passed to `SetState`, from each key to an
+      `(items, count, random_state)` tuple, where `count` is the number of
+      items added to the bucket so far, and `random_state` comes from
+      `random.Random.getstate`.
+    """
+    with self._mutex:
+      buckets = self._buckets.items()
+    return dict((key, bucket.GetState()) for key, bucket in buckets)
+
+  def SetState(self, state):
+    """Replaces the contents of the reservoir with a state from `GetState`.
+
+    Reservoir sampling continues exactly as it would have in the reservoir
+    that `state` was taken from.
+
+    Args:
+      state: The result of calling `GetState` on a reservoir of the same size.
+    """
+    with self._mutex:
+      self._buckets.clear()
+      for key, bucket_state in state.iteritems():
+        self._buckets[key].SetState(bucket_state)
+
   def AddItem(self, key, item):
     """Add a new item to the Reservoir with the given tag.
 
@@ -105,7 +157,7 @@ class _ReservoirBucket(object):
   It always stores the most recent item as its final item.
   """
 
-  def __init__(self, _max_size, _random=None):
+  def __init__(self, _max_size, _random=None, _items=None):
     """Create the _ReservoirBucket.
 
     Args:
@@ -113,13 +165,15 @@ class _ReservoirBucket(object):
         zero, the bucket has unbounded size.
       _random: The random number generator to use. If not specified, defaults to
         random.Random(0).
+      _items: The empty container in which to store the items. If not
+        specified, defaults to a list.
 
     Raises:
       ValueError: if the size is not a nonnegative integer.
     """
     if _max_size < 0 or _max_size != round(_max_size):
       raise ValueError('_max_size must be nonegative int, was %s' % _max_size)
-    self.items = []
+    self.items = _items if _items is not None else []
     # This mutex protects the internal items, ensuring that calls to Items and
     # AddItem are thread-safe
     self._mutex = threading.Lock()
@@ -162,3 +216,21 @@ class _ReservoirBucket(object):
     """Get all the items in the bucket."""
     with self._mutex:
       return self.items
+
+  def Snapshot(self):
+    """Get a copy of all the items in the bucket."""
+    with self._mutex:
+      return self.items[:]
+
+  def GetState(self):
+    """Returns the items, count and random state of the bucket."""
+    with self._mutex:
+      return (self.items[:], self._count, self._random.getstate())
+
+  def SetState(self, state):
+    """Restores a state returned by `GetState`."""
+    items, count, random_state = state
+    with self._mutex:
+      self.items[:] = items
+      self._count = count
+      self._random.setstate(random_state)
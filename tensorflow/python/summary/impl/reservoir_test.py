@@ -44,6 +44,44 @@ class ReservoirTest(googletest.TestCase):
 
     self.assertEqual(r1.Items(key), r2.Items(key))
 
+  def testGetAndSetState(self):
+    r1 = reservoir.Reservoir(10)
+    for i in xrange(50):
+      r1.AddItem('key1', i)
+      r1.AddItem('key2', -i)
+    r2 = reservoir.Reservoir(10)
+    r2.AddItem('key3', 0)
+    r2.SetState(r1.GetState())
+    self.assertItemsEqual(['key1', 'key2'], r2.Keys())
+    # Sampling continues exactly as it would have in the original reservoir.
+    for i in xrange(50, 100):
+      r1.AddItem('key1', i)
+      r2.AddItem('key1', i)
+    self.assertEqual(r1.Items('key1'), r2.Items('key1'))
+    self.assertEqual(r1.Items('key2'), r2.Items('key2'))
+
+  def testItemsFactory(self):
+    class _Items(list):
+      pass
+
+    r = reservoir.Reservoir(10, items_factory=_Items)
+    for i in xrange(100):
+      r.AddItem('key', i)
+    items = r.Items('key')
+    self.assertTrue(isinstance(items, _Items))
+    self.assertEqual(10, len(items))
+    self.assertEqual(99, items[-1])
+
+  def testSnapshot(self):
+    r = reservoir.Reservoir(10)
+    r.AddItem('key', 1)
+    snapshot = r.Snapshot('key')
+    r.AddItem('key', 2)
+    self.assertEqual([1], snapshot)
+    self.assertEqual([1, 2], r.Items('key'))
+    with self.assertRaises(KeyError):
+      r.Snapshot('missing key')
+
   def testBucketDeterminism(self):
     """Tests that reservoirs are deterministic at a bucket level.
 
@@ -1,10 +1,15 @@
 # pylint: disable=invalid-name
 """Save and restore variables."""
 import collections
+import heapq
 import numbers
 import os.path
+import sys
+import threading
 import time
 
+import numpy as np
+
 from google.protobuf import text_format
 
 from tensorflow.python.client import graph_util
@@ -137,7 +142,8 @@ class BaseSaverBuilder(object):
                      restore_sequentially,
                      reshape,
                      preferred_shard=-1,
-                     name="restore_all"):
+                     name="restore_all",
+                     restore_ops_by_name=None):
     """Add operations to restore vars_to_save.
 
     Args:
@@ -149,6 +155,8 @@ class BaseSaverBuilder(object):
         the corresponding variable.
       preferred_shard: Shard to open first when loading a sharded file.
       name: Name for the returned op.
+      restore_ops_by_name: Optional dict.  If set, the assign ops for each
+        name in the checkpoint are appended to the list at that key.
 
     Returns:
       An Operation that restores the variables.
@@ -175,12 +183,15 @@ class BaseSaverBuilder(object):
         assign_ops.append(state_ops.assign(v,
                                            values,
                                            validate_shape=not reshape))
+      if restore_ops_by_name is not None:
+        restore_ops_by_name.setdefault(vs.name, []).append(assign_ops[-1])
 
     # Create a Noop that has control dependencies from all the updates.
     return control_flow_ops.group(*assign_ops, name=name)
 
   def _AddShardedRestoreOps(self, filename_tensor, per_device,
-                            restore_sequentially, reshape):
+                            restore_sequentially, reshape,
+                            restore_ops_by_name=None):
     """Add Ops to save variables from multiple devices.
 
     Args:
@@ -191,6 +202,8 @@ class BaseSaverBuilder(object):
         within a shard.
       reshape: True if we want to reshape loaded tensors to the shape of
         the corresponding variable.
+      restore_ops_by_name: Optional dict.  If set, the assign ops for each
+        name in the checkpoint are appended to the list at that key.
 
     Returns:
       An Operation that restores the variables.
@@ -204,7 +217,8 @@ class BaseSaverBuilder(object):
             restore_sequentially,
             reshape,
             preferred_shard=shard,
-            name="restore_shard"))
+            name="restore_shard",
+            restore_ops_by_name=restore_ops_by_name))
     return control_flow_ops.group(*sharded_restores, name="restore_all")
 
   def _IsVariable(self, v):
@@ -231,6 +245,74 @@ class BaseSaverBuilder(object):
     return sorted([(dev, tup) for dev, tup in per_device.iteritems()],
                   key=lambda t: t[0])
 
+  def _GroupBySize(self, vars_to_save, num_shards):
+    """Group Variable tensor slices into shards of about the same byte size.
+
+    The variables are assigned to shards from the largest to the smallest,
+    each to the shard with the fewest bytes so far, regardless of their
+    devices.
+
+    Args:
+      vars_to_save: a list of BaseSaverBuilder.VarToSave objects.
+      num_shards: the maximum number of shards.
+
+    Returns:
+      A list of tuples: (device_name, BaseSaverBuilder.VarToSave) tuples, as
+      returned by _GroupByDevices().  The device of a shard is the device of
+      its variables if they are all on the same device, and "" otherwise.
+      There are fewer than num_shards shards if there are fewer variables.
+    """
+    def _NumBytes(var_to_save):
+      num_elements = var_to_save.var.get_shape().num_elements() or 0
+      dtype = var_to_save.var.dtype.base_dtype
+      return num_elements * np.dtype(dtype.as_numpy_dtype).itemsize
+
+    position = dict((vs, i) for i, vs in enumerate(vars_to_save))
+    num_shards = min(num_shards, len(vars_to_save))
+    shards = [[] for _ in xrange(num_shards)]
+    # (bytes, shard) pairs.
+    shard_sizes = [(0, shard) for shard in xrange(num_shards)]
+    for var_to_save in sorted(vars_to_save, key=_NumBytes, reverse=True):
+      size, shard = heapq.heappop(shard_sizes)
+      shards[shard].append(var_to_save)
+      heapq.heappush(shard_sizes, (size + _NumBytes(var_to_save), shard))
+    per_shard = []
+    for shard in shards:
+      # Keep the order of vars_to_save within each shard.
+      shard.sort(key=position.get)
+      devices = set(var_to_save.var.device for var_to_save in shard)
+      per_shard.append((devices.pop() if len(devices) == 1 else "", shard))
+    return per_shard
+
+  def _AddSnapshotOps(self, vars_to_save):
+    """Add variables that hold a snapshot of the variables to save.
+
+    The snapshots are kept in host memory, on the CPU of the device of each
+    variable, or on the local CPU for variables without a device.
+
+    Args:
+      vars_to_save: a list of BaseSaverBuilder.VarToSave objects.
+
+    Returns:
+      A tuple containing: (1) a list of the ops that update the snapshots,
+      and (2) a dictionary that maps each of vars_to_save to a
+      BaseSaverBuilder.VarToSave object for its snapshot.
+    """
+    assign_ops = []
+    snapshots = {}
+    for vs in vars_to_save:
+      v = vs.var
+      with ops.device(graph_util.set_cpu0(v.device) if v.device
+                      else "/cpu:0"):
+        snapshot = state_ops.variable_op(
+            [], v.dtype.base_dtype, set_shape=False,
+            name=v.op.name + "_snapshot")
+        assign_ops.append(
+            state_ops.assign(snapshot, v, validate_shape=False).op)
+      snapshots[vs] = BaseSaverBuilder.VarToSave(snapshot, vs.slice_spec,
+                                                 vs.name)
+    return assign_ops, snapshots
+
   def _VarListToDict(self, var_list):
     """Create a dictionary of names to variable lists.
 
@@ -356,7 +438,9 @@ class BaseSaverBuilder(object):
             max_to_keep=5,
             keep_checkpoint_every_n_hours=10000.0,
             name=None,
-            restore_sequentially=False):
+            restore_sequentially=False,
+            num_shards=None,
+            async_save=False):
     """Adds save/restore nodes to the graph and creates a SaverDef proto.
 
     Args:
@@ -378,6 +462,10 @@ class BaseSaverBuilder(object):
       name: string.  Optional name to use as a prefix when adding operations.
       restore_sequentially: A Bool, which if true, causes restore of different
         variables to happen sequentially within each device.
+      num_shards: If set, shard the checkpoints into that many files of about
+        the same size, regardless of the devices of the variables.
+      async_save: If True, save snapshots of the variables, so that the
+        variables can be updated while the checkpoint is written.
 
     Returns:
       A SaverDef proto.
@@ -396,26 +484,70 @@ class BaseSaverBuilder(object):
       # Add the Constant string tensor for the filename.
       filename_tensor = constant_op.constant("model")
 
+      # The variables that the save ops read.
+      if async_save:
+        snapshot_ops, snapshots = self._AddSnapshotOps(vars_to_save)
+        vars_to_write = [snapshots[vs] for vs in vars_to_save]
+      else:
+        snapshots = dict((vs, vs) for vs in vars_to_save)
+        vars_to_write = vars_to_save
+
       # Add the save ops.
-      if sharded:
+      restore_ops_by_name = {}
+      if num_shards:
+        sharded = True
+        per_device = self._GroupBySize(vars_to_save, num_shards)
+      elif sharded:
         per_device = self._GroupByDevices(vars_to_save)
-        save_tensor = self._AddShardedSaveOps(filename_tensor, per_device)
+      if sharded:
+        # The shards have no dependencies between them, so they are written
+        # in parallel.
+        save_tensor = self._AddShardedSaveOps(
+            filename_tensor,
+            [(device, [snapshots[vs] for vs in shard])
+             for device, shard in per_device])
         restore_op = self._AddShardedRestoreOps(
-            filename_tensor, per_device, restore_sequentially, reshape)
+            filename_tensor, per_device, restore_sequentially, reshape,
+            restore_ops_by_name=restore_ops_by_name)
       else:
-        save_tensor = self._AddSaveOps(filename_tensor, vars_to_save)
+        save_tensor = self._AddSaveOps(filename_tensor, vars_to_write)
         restore_op = self._AddRestoreOps(
-            filename_tensor, vars_to_save, restore_sequentially, reshape)
+            filename_tensor, vars_to_save, restore_sequentially, reshape,
+            restore_ops_by_name=restore_ops_by_name)
+
+      # The ops that restore each name, grouped if it was saved in slices.
+      restore_op_names = {}
+      for var_name, assign_ops in restore_ops_by_name.iteritems():
+        if len(assign_ops) > 1:
+          restore_op_names[var_name] = control_flow_ops.group(
+              *assign_ops, name="restore_slices").name
+        else:
+          restore_op_names[var_name] = assign_ops[0].name
+
+      if async_save:
+        # The path that save_tensor returns, once the snapshots are taken.
+        if sharded:
+          save_path = gen_io_ops._sharded_filespec(
+              filename_tensor,
+              constant_op.constant(len(per_device), name="num_shards"))
+        else:
+          save_path = filename_tensor
+        snapshot_tensor = control_flow_ops.with_dependencies(
+            snapshot_ops, save_path, name="snapshot")
 
     assert restore_op.name.endswith("restore_all"), restore_op.name
 
-    return saver_pb2.SaverDef(
+    saver_def = saver_pb2.SaverDef(
         filename_tensor_name=filename_tensor.name,
         save_tensor_name=save_tensor.name,
         restore_op_name=restore_op.name,
         max_to_keep=max_to_keep,
         keep_checkpoint_every_n_hours=keep_checkpoint_every_n_hours,
-        sharded=sharded)
+        sharded=sharded,
+        snapshot_tensor_name=snapshot_tensor.name if async_save else "")
+    for var_name, op_name in restore_op_names.iteritems():
+      saver_def.restore_op_names[var_name] = op_name
+    return saver_def
 
 def _GetCheckpointFilename(save_dir, latest_filename):
   """Returns a filename for storing the CheckpointState.
@@ -588,8 +720,24 @@ class Saver(object):
   If you create several savers, you can specify a different filename for the
   protocol buffer file in the call to `save()`.
 
+  Writing the checkpoint of a large model can take minutes.  A saver created
+  with `num_shards` writes that many files of about the same size in
+  parallel, and one created with `async_save=True` only blocks `save()` while
+  it copies the variables, and then writes the copy in a background thread.
+  The 'checkpoint' file is only updated once all the files are written:
+
+  ```python
+  saver = tf.train.Saver(num_shards=8, async_save=True)
+  ...
+  saver.save(sess, 'my-model', global_step=step)
+  ...
+  # Wait for the last checkpoint before closing the session.
+  saver.wait_for_save()
+  ```
+
   @@__init__
   @@save
+  @@wait_for_save
   @@restore
 
   Other utility methods.
@@ -608,7 +756,9 @@ class Saver(object):
                name=None,
                restore_sequentially=False,
                saver_def=None,
-               builder=None):
+               builder=None,
+               num_shards=None,
+               async_save=False):
     """Creates a `Saver`.
 
     The constructor adds ops to save and restore variables.
@@ -643,7 +793,14 @@ class Saver(object):
     want to reload it from an older checkpoint.
 
     The optional `sharded` argument, if True, instructs the saver to shard
-    checkpoints per device.
+    checkpoints per device.  The optional `num_shards` argument instead
+    shards them into files of about the same size, regardless of the devices
+    of the variables.  The shards are written in parallel.
+
+    The optional `async_save` argument, if True, makes `save()` return as soon
+    as it has copied the variables to host memory, and write the copy in a
+    background thread.  The copy doubles the host memory that the variables
+    use.
 
     Args:
       var_list: A list of Variables or a dictionary mapping names to
@@ -666,6 +823,9 @@ class Saver(object):
         Saver that was created for that Graph.
       builder: Optional SaverBuilder to use if a saver_def was not provided.
         Defaults to BaseSaverBuilder().
+      num_shards: If set, shard the checkpoints into that many files of about
+        the same size.
+      async_save: If True, write the checkpoints in a background thread.
 
     Raises:
       TypeError: If `var_list` is invalid.
@@ -685,7 +845,9 @@ class Saver(object):
           max_to_keep=max_to_keep,
           keep_checkpoint_every_n_hours=keep_checkpoint_every_n_hours,
           name=name,
-          restore_sequentially=restore_sequentially)
+          restore_sequentially=restore_sequentially,
+          num_shards=num_shards,
+          async_save=async_save)
     if not isinstance(saver_def, saver_pb2.SaverDef):
       raise ValueError("saver_def must if a saver_pb2.SaverDef: %s" % saver_def)
     if not saver_def.save_tensor_name:
@@ -705,7 +867,13 @@ class Saver(object):
     self._next_checkpoint_time = (
         time.time() + self._keep_checkpoint_every_n_hours * 3600)
     self._sharded = saver_def.sharded
+    self._snapshot_tensor_name = saver_def.snapshot_tensor_name
+    self._restore_op_names = dict(saver_def.restore_op_names.items())
     self._last_checkpoints = []
+    # The thread that writes the last asynchronous save, and the exc_info of
+    # its error, if any.
+    self._save_thread = None
+    self._save_error = None
 
   def _CheckpointFilename(self, p):
     """Returns the checkpoint file name.
@@ -763,13 +931,17 @@ class Saver(object):
     Returns:
       A `SaverDef` proto.
     """
-    return saver_pb2.SaverDef(
+    saver_def = saver_pb2.SaverDef(
         filename_tensor_name=self._filename_tensor_name,
         save_tensor_name=self._save_tensor_name,
         restore_op_name=self._restore_op_name,
         max_to_keep=self._max_to_keep,
         keep_checkpoint_every_n_hours=self._keep_checkpoint_every_n_hours,
-        sharded=self._sharded)
+        sharded=self._sharded,
+        snapshot_tensor_name=self._snapshot_tensor_name)
+    for var_name, op_name in self._restore_op_names.iteritems():
+      saver_def.restore_op_names[var_name] = op_name
+    return saver_def
 
   @property
   def last_checkpoints(self):
@@ -805,6 +977,12 @@ class Saver(object):
     The method returns the path of the newly created checkpoint file.  This
     path can be passed directly to a call to `restore()`.
 
+    If the saver was created with `async_save=True`, the method first waits
+    for the previous save to finish, then copies the variables, and returns
+    while the copy is written.  The path can only be restored, and only
+    appears in `last_checkpoints` and the 'checkpoint' file, once
+    `wait_for_save()` returns.
+
     Args:
       sess: A Session to use to save the variables.
       save_path: string.  Path to the checkpoint filename.  If the saver is
@@ -825,7 +1003,10 @@ class Saver(object):
 
     Raises:
       TypeError: If `sess` is not a Session.
+      Exception: The error that writing the previous checkpoint in the
+        background raised, if any.
     """
+    self.wait_for_save()
     if latest_filename is None:
       latest_filename = "checkpoint"
     if global_step is not None:
@@ -838,15 +1019,66 @@ class Saver(object):
     if not isinstance(sess, session.SessionInterface):
       raise TypeError("'sess' must be a Session; %s" % sess)
 
+    if self._snapshot_tensor_name:
+      model_checkpoint_path = sess.run(
+          self._snapshot_tensor_name,
+          {self._filename_tensor_name: checkpoint_file})
+      self._save_thread = threading.Thread(
+          target=self._SaveInBackground,
+          args=(sess, checkpoint_file, save_path, latest_filename))
+      self._save_thread.daemon = True
+      self._save_thread.start()
+      return str(model_checkpoint_path)
+    return self._Save(sess, checkpoint_file, save_path, latest_filename)
+
+  def _Save(self, sess, checkpoint_file, save_dir, latest_filename):
+    """Writes the checkpoint, and then updates the checkpoint state.
+
+    Args:
+      sess: A Session to use to save the variables.
+      checkpoint_file: The path of the checkpoint, without sharding.
+      save_dir: The directory of the checkpoint state file.
+      latest_filename: The name of the checkpoint state file.
+
+    Returns:
+      The path at which the variables were saved.
+    """
     model_checkpoint_path = sess.run(
         self._save_tensor_name, {self._filename_tensor_name: checkpoint_file})
     model_checkpoint_path = str(model_checkpoint_path)
+    # The save op only returns once all the shards were written.
     self._MaybeDeleteOldCheckpoints(model_checkpoint_path)
-    update_checkpoint_state(save_path, model_checkpoint_path,
+    update_checkpoint_state(save_dir, model_checkpoint_path,
                             self.last_checkpoints, latest_filename)
     return model_checkpoint_path
 
-  def restore(self, sess, save_path):
+  def _SaveInBackground(self, sess, checkpoint_file, save_dir,
+                        latest_filename):
+    """Runs _Save(), and records its error for wait_for_save()."""
+    try:
+      self._Save(sess, checkpoint_file, save_dir, latest_filename)
+    except Exception:  # pylint: disable=broad-except
+      logging.error("Failed to save %s", checkpoint_file)
+      self._save_error = sys.exc_info()
+
+  def wait_for_save(self):
+    """Waits for the checkpoint that `save()` writes in the background.
+
+    This only waits if the saver was created with `async_save=True`.  Call it
+    before closing the session that was passed to `save()`.
+
+    Raises:
+      Exception: The error that writing the checkpoint raised, if any.
+    """
+    if self._save_thread is not None:
+      self._save_thread.join()
+      self._save_thread = None
+    if self._save_error is not None:
+      exc_info = self._save_error
+      self._save_error = None
+      raise exc_info[0], exc_info[1], exc_info[2]
+
+  def restore(self, sess, save_path, names=None):
     """Restores previously saved variables.
 
     This method runs the ops added by the constructor for restoring variables.
@@ -857,11 +1089,30 @@ class Saver(object):
     The `save_path` argument is typically a value previously returned from a
     `save()` call, or a call to `latest_checkpoint()`.
 
+    Passing `names` restores only the variables saved under those names, for
+    example to fine-tune part of a large model.  When the checkpoint is
+    sharded, only the files that hold these variables are read, and the
+    shards are read in parallel.  With `restore_sequentially=True`, the
+    variables restored before them on the same device are restored too.
+
     Args:
       sess: A Session to use to restore the parameters.
       save_path: Path where parameters were previously saved.
+      names: Optional list of the names of the variables to restore, as in
+        the checkpoint.  Defaults to all the variables of the saver.
+
+    Raises:
+      ValueError: If `names` has a name that the saver does not save.
     """
-    sess.run([self._restore_op_name], {self._filename_tensor_name: save_path})
+    if names is None:
+      restore_ops = [self._restore_op_name]
+    else:
+      restore_ops = []
+      for var_name in names:
+        if var_name not in self._restore_op_names:
+          raise ValueError("The saver does not restore %s" % var_name)
+        restore_ops.append(self._restore_op_names[var_name])
+    sess.run(restore_ops, {self._filename_tensor_name: save_path})
 
 
 def latest_checkpoint(checkpoint_dir, latest_filename=None):
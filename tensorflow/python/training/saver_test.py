@@ -312,6 +312,122 @@ class SaveRestoreShardedTest(tf.test.TestCase):
       sd = save.as_saver_def()
       self.assertTrue(sd.sharded)
 
+  def testNumShards(self):
+    save_path = os.path.join(self.get_temp_dir(), "num_shards")
+
+    with self.test_session() as sess:
+      v0 = tf.Variable(np.arange(100, dtype=np.float32), name="v0")
+      v1 = tf.Variable(np.arange(60, dtype=np.float32), name="v1")
+      v2 = tf.Variable(np.arange(50, dtype=np.float32), name="v2")
+      save = tf.train.Saver({"v0": v0, "v1": v1, "v2": v2}, num_shards=2)
+      self.assertTrue(save.as_saver_def().sharded)
+      tf.initialize_all_variables().run()
+      val = save.save(sess, save_path)
+      self.assertEqual(save_path + "-?????-of-00002", val)
+      self.assertEqual(2, len(gfile.Glob(val)))
+
+    # v0 is written alone in one shard, and v1 and v2 in the other.
+    with self.test_session() as sess:
+      v0 = tf.Variable(np.zeros(100, dtype=np.float32), name="v0")
+      save = tf.train.Saver({"v0": v0})
+      save.restore(sess, save_path + "-00000-of-00002")
+      self.assertAllEqual(np.arange(100), v0.eval())
+
+    with self.test_session() as sess:
+      v0 = tf.Variable(np.zeros(100, dtype=np.float32), name="v0")
+      v1 = tf.Variable(np.zeros(60, dtype=np.float32), name="v1")
+      v2 = tf.Variable(np.zeros(50, dtype=np.float32), name="v2")
+      save = tf.train.Saver({"v0": v0, "v1": v1, "v2": v2}, num_shards=2)
+      save.restore(sess, val)
+      self.assertAllEqual(np.arange(100), v0.eval())
+      self.assertAllEqual(np.arange(60), v1.eval())
+      self.assertAllEqual(np.arange(50), v2.eval())
+
+  def testRestoreNames(self):
+    save_path = os.path.join(self.get_temp_dir(), "restore_names")
+
+    with tf.Session(
+        target="",
+        config=tf.ConfigProto(device_count={"CPU": 2})) as sess:
+      with sess.graph.device("/cpu:0"):
+        v0 = tf.Variable(10, name="v0")
+      with sess.graph.device("/cpu:1"):
+        v1 = tf.Variable(20, name="v1")
+      save = tf.train.Saver({"v0": v0, "v1": v1}, sharded=True)
+      tf.initialize_all_variables().run()
+      val = save.save(sess, save_path)
+
+    # Restore only "v1".
+    with tf.Session(
+        target="",
+        config=tf.ConfigProto(device_count={"CPU": 2})) as sess:
+      with sess.graph.device("/cpu:0"):
+        v0 = tf.Variable(111, name="v0")
+      with sess.graph.device("/cpu:1"):
+        v1 = tf.Variable(222, name="v1")
+      save = tf.train.Saver({"v0": v0, "v1": v1}, sharded=True)
+      self.assertEqual(["v0", "v1"],
+                       sorted(save.as_saver_def().restore_op_names))
+      tf.initialize_all_variables().run()
+      save.restore(sess, val, names=["v1"])
+      self.assertEqual(111, v0.eval())
+      self.assertEqual(20, v1.eval())
+      with self.assertRaisesRegexp(ValueError, "does not restore v2"):
+        save.restore(sess, val, names=["v2"])
+
+
+class AsyncSaveTest(tf.test.TestCase):
+
+  def testSavesSnapshot(self):
+    save_dir = os.path.join(self.get_temp_dir(), "async_save")
+    gfile.MakeDirs(save_dir)
+    save_path = os.path.join(save_dir, "model")
+
+    with self.test_session() as sess:
+      v0 = tf.Variable(10.0, name="v0")
+      v1 = tf.Variable(20.0, name="v1")
+      save = tf.train.Saver({"v0": v0, "v1": v1}, num_shards=2,
+                            async_save=True)
+      self.assertTrue(save.as_saver_def().snapshot_tensor_name)
+      tf.initialize_all_variables().run()
+      val = save.save(sess, save_path)
+      self.assertEqual(save_path + "-?????-of-00002", val)
+      # Updating the variables does not change the checkpoint being written.
+      v0.assign(11.0).op.run()
+      v1.assign(21.0).op.run()
+      save.wait_for_save()
+      self.assertEqual([val], save.last_checkpoints)
+      self.assertEqual(
+          val, tf.train.get_checkpoint_state(save_dir).model_checkpoint_path)
+
+      save.restore(sess, val)
+      self.assertEqual(10.0, v0.eval())
+      self.assertEqual(20.0, v1.eval())
+
+  def testSnapshotsOnCpu(self):
+    with tf.Graph().as_default() as g:
+      v0 = tf.Variable(10.0, name="v0")
+      with g.device("/job:ps/task:0/gpu:0"):
+        v1 = tf.Variable(20.0, name="v1")
+      tf.train.Saver({"v0": v0, "v1": v1}, async_save=True)
+      self.assertEqual("/cpu:0",
+                       g.get_operation_by_name("save/v0_snapshot").device)
+      self.assertEqual("/job:ps/task:0/device:CPU:0",
+                       g.get_operation_by_name("save/v1_snapshot").device)
+
+  def testError(self):
+    save_path = os.path.join(self.get_temp_dir(), "no_such_dir", "model")
+
+    with self.test_session() as sess:
+      v0 = tf.Variable(10.0, name="v0")
+      save = tf.train.Saver({"v0": v0}, async_save=True)
+      tf.initialize_all_variables().run()
+      self.assertEqual(save_path, save.save(sess, save_path))
+      with self.assertRaises(tf.OpError):
+        save.wait_for_save()
+      # The error is only raised once.
+      save.wait_for_save()
+
 
 class MaxToKeepTest(tf.test.TestCase):
 
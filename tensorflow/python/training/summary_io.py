@@ -1,15 +1,17 @@
 """Reads Summaries from and writes Summaries to event files."""
 
+import collections
 import os.path
-import Queue
 import threading
 import time
 
+from google.protobuf import message
 from tensorflow.core.framework import summary_pb2
 from tensorflow.core.util import event_pb2
 from tensorflow.python import pywrap_tensorflow
 from tensorflow.python.lib.io import tf_record
 from tensorflow.python.platform import gfile
+from tensorflow.python.platform import logging
 
 
 class SummaryWriter(object):
@@ -29,9 +31,18 @@ class SummaryWriter(object):
 
   @@flush
   @@close
+
+  @@stats
   """
 
-  def __init__(self, logdir, graph_def=None, max_queue=10, flush_secs=120):
+  # The overload policies, for when more summaries are pending than fit in the
+  # buffer.
+  BLOCK = "block"
+  DROP_OLDEST = "drop_oldest"
+  COALESCE = "coalesce"
+
+  def __init__(self, logdir, graph_def=None, max_queue=1000, flush_secs=120,
+               overload_policy=BLOCK):
     """Creates a `SummaryWriter` and an event file.
 
     On construction the summary writer creates a new event file in `logdir`.
@@ -60,7 +71,22 @@ class SummaryWriter(object):
     *  `flush_secs`: How often, in seconds, to flush the added summaries
        and events to disk.
     *  `max_queue`: Maximum number of summaries or events pending to be
-       written to disk before one of the 'add' calls block.
+       written to disk before `overload_policy` applies.
+    *  `overload_policy`: What the 'add' calls do when `max_queue` summaries
+       and events are pending:
+       *  `SummaryWriter.BLOCK` (the default): Block until some of them are
+          written, so that no summary is lost.
+       *  `SummaryWriter.DROP_OLDEST`: Drop the oldest pending summary.
+       *  `SummaryWriter.COALESCE`: Merge the summary into the latest pending
+          summary of the same step, keeping only the latest value of each
+          tag when they are written, or drop the oldest pending summary if
+          no summary of that step is pending.
+
+    The last two policies keep slow disks from slowing down training, at the
+    cost of losing summaries. Events added with `add_event()` or
+    `add_graph()` are never dropped, so if only such events are pending, they
+    are queued beyond `max_queue`. Use `stats()` to find out how many
+    summaries were dropped.
 
     Args:
       logdir: A string. Directory where event file will be written.
@@ -68,14 +94,22 @@ class SummaryWriter(object):
       max_queue: Integer. Size of the queue for pending events and summaries.
       flush_secs: Number. How often, in seconds, to flush the
         pending events and summaries to disk.
+      overload_policy: `SummaryWriter.BLOCK`, `SummaryWriter.DROP_OLDEST` or
+        `SummaryWriter.COALESCE`.
+
+    Raises:
+      ValueError: If `overload_policy` is not one of the policies.
     """
+    if overload_policy not in (SummaryWriter.BLOCK, SummaryWriter.DROP_OLDEST,
+                               SummaryWriter.COALESCE):
+      raise ValueError("Unknown overload_policy: %s" % overload_policy)
     self._logdir = logdir
     if not gfile.IsDirectory(self._logdir):
       gfile.MakeDirs(self._logdir)
-    self._event_queue = Queue.Queue(max_queue)
+    self._event_buffer = _EventBuffer(max_queue, overload_policy)
     self._ev_writer = pywrap_tensorflow.EventsWriter(
         os.path.join(self._logdir, "events"))
-    self._worker = _EventLoggerThread(self._event_queue, self._ev_writer,
+    self._worker = _EventLoggerThread(self._event_buffer, self._ev_writer,
                                       flush_secs)
     self._worker.start()
     if graph_def is not None:
@@ -92,19 +126,21 @@ class SummaryWriter(object):
     own data. This is commonly done to report evaluation results in event
     files.
 
+    A serialized summary is only parsed by the thread that writes the event
+    file, so that adding it costs the caller as little as possible.
+
     Args:
       summary: A `Summary` protocol buffer, optionally serialized as a string.
       global_step: Number. Optional global step value to record with the
         summary.
     """
-    if isinstance(summary, basestring):
+    if not isinstance(summary, basestring):
+      # Copy the summary, which the caller may change once this returns.
       summ = summary_pb2.Summary()
-      summ.ParseFromString(summary)
+      summ.CopyFrom(summary)
       summary = summ
-    event = event_pb2.Event(wall_time=time.time(), summary=summary)
-    if global_step is not None:
-      event.step = long(global_step)
-    self.add_event(event)
+    step = 0 if global_step is None else long(global_step)
+    self._event_buffer.Put(_PendingSummaries(time.time(), step, [summary]))
 
   def add_event(self, event):
     """Adds an event to the event file.
@@ -112,7 +148,7 @@ class SummaryWriter(object):
     Args:
       event: An `Event` protocol buffer.
     """
-    self._event_queue.put(event)
+    self._event_buffer.Put(_PendingEvent(event))
 
   def add_graph(self, graph_def, global_step=None):
     """Adds a `GraphDef` protocol buffer to the event file.
@@ -128,7 +164,7 @@ class SummaryWriter(object):
     event = event_pb2.Event(wall_time=time.time(), graph_def=graph_def)
     if global_step is not None:
       event.step = long(global_step)
-    self._event_queue.put(event)
+    self.add_event(event)
 
   def flush(self):
     """Flushes the event file to disk.
@@ -136,7 +172,7 @@ class SummaryWriter(object):
     Call this method to make sure that all pending events have been written to
     disk.
     """
-    self._event_queue.join()
+    self._event_buffer.Join()
     self._ev_writer.Flush()
 
   def close(self):
@@ -147,15 +183,218 @@ class SummaryWriter(object):
     self.flush()
     self._ev_writer.Close()
 
+  def stats(self):
+    """Returns statistics about the summaries and events added so far.
+
+    Returns:
+      A `SummaryWriterStats` namedtuple with fields:
+        written_events: The number of events written.
+        dropped_summaries: The number of summaries dropped by the overload
+          policy.
+        coalesced_summaries: The number of summaries merged into the event of
+          another summary of the same step, by the `COALESCE` policy.
+        mean_queue_latency_secs: The mean time between adding an event and
+          starting to write it.
+        max_queue_latency_secs: The longest time between adding an event and
+          starting to write it.
+    """
+    return self._event_buffer.Stats()
+
+
+SummaryWriterStats = collections.namedtuple(
+    "SummaryWriterStats",
+    ["written_events", "dropped_summaries", "coalesced_summaries",
+     "mean_queue_latency_secs", "max_queue_latency_secs"])
+
+
+class _PendingEvent(object):
+  """An event that waits to be written."""
+
+  # Whether the overload policies may drop or merge the event.
+  droppable = False
+
+  def __init__(self, event):
+    self._event = event
+    self.add_time = time.time()
+    # The number of 'add' calls that the event stands for.
+    self.count = 1
+
+  def ToEvent(self):
+    """Returns the `Event` to write."""
+    return self._event
+
+
+class _PendingSummaries(object):
+  """The summaries of one step, which wait to be written as one event."""
+
+  droppable = True
+
+  def __init__(self, wall_time, step, summaries):
+    self.add_time = wall_time
+    self.step = step
+    self.count = len(summaries)
+    # The `Summary` protos or serialized summaries, oldest first.
+    self.summaries = summaries
+
+  def Merge(self, other):
+    """Merges the later summaries of `other`, of the same step, into these."""
+    self.summaries.extend(other.summaries)
+    self.count += other.count
+
+  def ToEvent(self):
+    """Parses the summaries and returns the `Event` to write."""
+    event = event_pb2.Event(wall_time=self.add_time, step=self.step)
+    for summary in self.summaries:
+      if isinstance(summary, basestring):
+        event.summary.MergeFromString(summary)
+      else:
+        event.summary.MergeFrom(summary)
+    if len(self.summaries) > 1:
+      # Keep only the latest value of each tag.
+      latest = collections.OrderedDict()
+      for value in event.summary.value:
+        latest.pop(value.tag, None)
+        latest[value.tag] = value
+      if len(latest) < len(event.summary.value):
+        summary = summary_pb2.Summary(value=latest.values())
+        event.summary.CopyFrom(summary)
+    return event
+
+
+class _EventBuffer(object):
+  """A bounded buffer of the events pending to be written."""
+
+  def __init__(self, capacity, overload_policy):
+    """Creates an _EventBuffer.
+
+    Args:
+      capacity: The number of pending events at which the buffer is full.
+      overload_policy: One of the `SummaryWriter` overload policies.
+    """
+    self._capacity = max(capacity, 1)
+    self._overload_policy = overload_policy
+    # Protects all attributes, and is notified when events are put, taken or
+    # done.
+    self._cond = threading.Condition()
+    self._pending = collections.deque()
+    # With the COALESCE policy, maps each step to the latest of its pending
+    # summaries, into which later summaries of the step can be merged.
+    self._latest_by_step = {}
+    # The counts of the 'add' calls that were put, and that were written or
+    # dropped.
+    self._put_count = 0
+    self._done_count = 0
+    self._written_events = 0
+    self._dropped_summaries = 0
+    self._coalesced_summaries = 0
+    self._total_latency_secs = 0.0
+    self._max_latency_secs = 0.0
+
+  def Put(self, pending):
+    """Adds a _PendingEvent or _PendingSummaries to the buffer."""
+    with self._cond:
+      coalescing = self._overload_policy == SummaryWriter.COALESCE
+      while len(self._pending) >= self._capacity:
+        if self._overload_policy == SummaryWriter.BLOCK:
+          self._cond.wait()
+        elif coalescing and self._Coalesce(pending):
+          self._put_count += pending.count
+          return
+        elif not self._DropOldest():
+          break
+      self._pending.append(pending)
+      if coalescing and pending.droppable:
+        self._latest_by_step[pending.step] = pending
+      self._put_count += pending.count
+      self._cond.notify_all()
+
+  def Take(self):
+    """Waits for pending events, and removes all of them from the buffer.
+
+    Returns:
+      A list of the pending events, oldest first.
+    """
+    with self._cond:
+      while not self._pending:
+        self._cond.wait()
+      batch = list(self._pending)
+      self._pending.clear()
+      self._latest_by_step.clear()
+      now = time.time()
+      for pending in batch:
+        latency = max(now - pending.add_time, 0.0)
+        self._total_latency_secs += latency
+        self._max_latency_secs = max(self._max_latency_secs, latency)
+      self._cond.notify_all()
+    return batch
+
+  def Done(self, batch):
+    """Marks a list of events returned by `Take()` as written."""
+    with self._cond:
+      self._written_events += len(batch)
+      self._done_count += sum(pending.count for pending in batch)
+      self._cond.notify_all()
+
+  def Join(self):
+    """Waits until the events put so far are written or dropped."""
+    with self._cond:
+      put_count = self._put_count
+      while self._done_count < put_count:
+        self._cond.wait()
+
+  def Stats(self):
+    """Returns the `SummaryWriterStats` of the buffer."""
+    with self._cond:
+      mean_latency_secs = (self._total_latency_secs / self._written_events
+                           if self._written_events else 0.0)
+      return SummaryWriterStats(self._written_events, self._dropped_summaries,
+                                self._coalesced_summaries, mean_latency_secs,
+                                self._max_latency_secs)
+
+  def _Coalesce(self, pending):
+    """Merges `pending` into the latest pending summaries of the same step.
+
+    Args:
+      pending: The _PendingEvent or _PendingSummaries being put.
+
+    Returns:
+      Whether `pending` was merged.
+    """
+    if not pending.droppable:
+      return False
+    latest = self._latest_by_step.get(pending.step)
+    if latest is None:
+      return False
+    latest.Merge(pending)
+    self._coalesced_summaries += pending.count
+    return True
+
+  def _DropOldest(self):
+    """Drops the oldest pending summaries.
+
+    Returns:
+      Whether any summaries were dropped.
+    """
+    for i, pending in enumerate(self._pending):
+      if pending.droppable:
+        del self._pending[i]
+        if self._latest_by_step.get(pending.step) is pending:
+          del self._latest_by_step[pending.step]
+        self._dropped_summaries += pending.count
+        self._done_count += pending.count
+        self._cond.notify_all()
+        return True
+    return False
+
 
 class _EventLoggerThread(threading.Thread):
   """Thread that logs events."""
 
-  def __init__(self, queue, ev_writer, flush_secs):
+  def __init__(self, event_buffer, ev_writer, flush_secs):
     """Creates an _EventLoggerThread.
 
     Args:
-      queue: a Queue from which to dequeue events.
+      event_buffer: an _EventBuffer from which to take events.
       ev_writer: an event writer. Used to log brain events for
        the visualizer.
       flush_secs: How often, in seconds, to flush the
@@ -163,7 +402,7 @@ class _EventLoggerThread(threading.Thread):
     """
     threading.Thread.__init__(self)
     self.daemon = True
-    self._queue = queue
+    self._event_buffer = event_buffer
     self._ev_writer = ev_writer
     self._flush_secs = flush_secs
     # The first event will be flushed immediately.
@@ -171,9 +410,16 @@ class _EventLoggerThread(threading.Thread):
 
   def run(self):
     while True:
-      event = self._queue.get()
+      # Write all the pending events at once.
+      batch = self._event_buffer.Take()
       try:
-        self._ev_writer.WriteEvent(event)
+        for pending in batch:
+          try:
+            event = pending.ToEvent()
+          except message.DecodeError as e:
+            logging.error("Dropping a summary that cannot be parsed: %s", e)
+            continue
+          self._ev_writer.WriteEvent(event)
         # Flush the event writer every so often.
         now = time.time()
         if now > self._next_event_flush_time:
@@ -181,7 +427,7 @@ class _EventLoggerThread(threading.Thread):
           # Do it again in two minutes.
           self._next_event_flush_time = now + self._flush_secs
       finally:
-        self._queue.task_done()
+        self._event_buffer.Done(batch)
 
 
 def summary_iterator(path):
@@ -8,6 +8,8 @@ import tensorflow.python.platform
 
 import tensorflow as tf
 
+from tensorflow.python.training import summary_io
+
 
 class SummaryWriterTestCase(tf.test.TestCase):
 
@@ -146,6 +148,100 @@ class SummaryWriterTestCase(tf.test.TestCase):
     # We should be done.
     self.assertRaises(StopIteration, lambda: next(rr))
 
+  def testStats(self):
+    test_dir = self._CleanTestDir("stats")
+    sw = tf.train.SummaryWriter(test_dir)
+    for step in xrange(3):
+      sw.add_summary(tf.Summary(value=[tf.Summary.Value(tag="s",
+                                                        simple_value=step)]),
+                     step)
+    sw.flush()
+    stats = sw.stats()
+    self.assertEqual(3, stats.written_events)
+    self.assertEqual(0, stats.dropped_summaries)
+    self.assertEqual(0, stats.coalesced_summaries)
+    self.assertTrue(
+        0 <= stats.mean_queue_latency_secs <= stats.max_queue_latency_secs)
+    sw.close()
+
+  def testUnknownOverloadPolicy(self):
+    with self.assertRaises(ValueError):
+      tf.train.SummaryWriter(self._TestDir("unknown_policy"),
+                             overload_policy="unknown")
+
+
+class EventBufferTest(tf.test.TestCase):
+
+  def _Summary(self, tag, value):
+    return tf.Summary(value=[tf.Summary.Value(tag=tag, simple_value=value)])
+
+  def _PutSummary(self, event_buffer, step, tag, value, serialize=False):
+    summary = self._Summary(tag, value)
+    if serialize:
+      summary = summary.SerializeToString()
+    event_buffer.Put(summary_io._PendingSummaries(0.0, step, [summary]))
+
+  def testDropOldest(self):
+    event_buffer = summary_io._EventBuffer(
+        2, tf.train.SummaryWriter.DROP_OLDEST)
+    graph_event = tf.Event(graph_def=tf.GraphDef())
+    event_buffer.Put(summary_io._PendingEvent(graph_event))
+    for step in xrange(3):
+      self._PutSummary(event_buffer, step, "s", step)
+    batch = event_buffer.Take()
+    # The graph is never dropped.
+    self.assertEqual(graph_event, batch[0].ToEvent())
+    self.assertEqual([2], [pending.ToEvent().step for pending in batch[1:]])
+    event_buffer.Done(batch)
+    event_buffer.Join()
+    self.assertEqual(2, event_buffer.Stats().dropped_summaries)
+
+  def testCoalesce(self):
+    event_buffer = summary_io._EventBuffer(3, tf.train.SummaryWriter.COALESCE)
+    self._PutSummary(event_buffer, 1, "a", 1.0)
+    self._PutSummary(event_buffer, 1, "b", 2.0, serialize=True)
+    self._PutSummary(event_buffer, 2, "a", 3.0)
+    # The buffer is full, so the summary is merged into the latest pending
+    # summary of step 1.
+    self._PutSummary(event_buffer, 1, "a", 4.0, serialize=True)
+    batch = event_buffer.Take()
+    events = [pending.ToEvent() for pending in batch]
+    self.assertEqual([1, 1, 2], [event.step for event in events])
+    self.assertProtoEquals("value { tag: 'a' simple_value: 1.0 }",
+                           events[0].summary)
+    self.assertProtoEquals("""
+      value { tag: 'b' simple_value: 2.0 }
+      value { tag: 'a' simple_value: 4.0 }
+      """, events[1].summary)
+    event_buffer.Done(batch)
+    # Merging keeps only the latest value of each tag.
+    self._PutSummary(event_buffer, 5, "a", 5.0)
+    self._PutSummary(event_buffer, 6, "a", 6.0)
+    self._PutSummary(event_buffer, 5, "b", 7.0)
+    self._PutSummary(event_buffer, 5, "a", 8.0)
+    self._PutSummary(event_buffer, 5, "b", 9.0)
+    batch = event_buffer.Take()
+    events = [pending.ToEvent() for pending in batch]
+    self.assertEqual([5, 6, 5], [event.step for event in events])
+    self.assertProtoEquals("""
+      value { tag: 'a' simple_value: 8.0 }
+      value { tag: 'b' simple_value: 9.0 }
+      """, events[2].summary)
+    event_buffer.Done(batch)
+    event_buffer.Join()
+    stats = event_buffer.Stats()
+    self.assertEqual(3, stats.coalesced_summaries)
+    self.assertEqual(0, stats.dropped_summaries)
+    self.assertEqual(6, stats.written_events)
+
+  def testCoalesceDropsOldestWithoutDuplicateSteps(self):
+    event_buffer = summary_io._EventBuffer(2, tf.train.SummaryWriter.COALESCE)
+    for step in xrange(4):
+      self._PutSummary(event_buffer, step, "s", step)
+    batch = event_buffer.Take()
+    self.assertEqual([2, 3], [pending.ToEvent().step for pending in batch])
+    self.assertEqual(2, event_buffer.Stats().dropped_summaries)
+
 
 if __name__ == "__main__":
   tf.test.main()
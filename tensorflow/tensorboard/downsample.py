@@ -0,0 +1,51 @@
+"""A module for downsampling series of scalars before they are plotted.
+
+Plotting more points than a chart has pixels only costs bandwidth and
+rendering time, but naively keeping every n-th point hides the spikes that
+users look for. MinMaxDownsample instead keeps the extremes of each part of
+the series, like the M4 and largest-triangle-three-buckets algorithms.
+"""
+
+import numpy as np
+
+
+def MinMaxDownsample(values, max_points):
+  """Chooses at most `max_points` of `values` to plot.
+
+  The first and last values are always kept. The values between them are
+  split into buckets of consecutive values, and the smallest and largest value
+  of each bucket are kept.
+
+  Args:
+    values: A 1-D array of the values to downsample.
+    max_points: The maximum number of values to keep.
+
+  Returns:
+    A sorted array of the indices of the values to keep.
+
+  Raises:
+    ValueError: If `max_points` is less than 1.
+  """
+  if max_points < 1:
+    raise ValueError('max_points must be at least 1, was %d' % max_points)
+  values = np.asarray(values)
+  num_values = len(values)
+  if num_values <= max_points:
+    return np.arange(num_values)
+  if max_points == 1:
+    return np.array([num_values - 1])
+
+  num_buckets = (max_points - 2) // 2
+  if num_buckets == 0:
+    return np.array([0, num_values - 1])
+  interior = values[1:-1]
+  # The bucket boundaries, as indices into interior. There are at least as
+  # many interior values as buckets, so no bucket is empty.
+  edges = np.arange(num_buckets + 1) * len(interior) // num_buckets
+  indices = [0, num_values - 1]
+  for start, end in zip(edges[:-1], edges[1:]):
+    bucket = interior[start:end]
+    # Add 1 to convert from indices into interior to indices into values.
+    indices.append(start + 1 + np.argmin(bucket))
+    indices.append(start + 1 + np.argmax(bucket))
+  return np.unique(indices)
@@ -0,0 +1,41 @@
+import numpy as np
+import tensorflow.python.platform
+
+from tensorflow.python.platform import googletest
+from tensorflow.tensorboard import downsample
+
+
+class MinMaxDownsampleTest(googletest.TestCase):
+
+  def testKeepsShortSeries(self):
+    self.assertEqual([0, 1, 2],
+                     list(downsample.MinMaxDownsample([3.0, 1.0, 2.0], 3)))
+    self.assertEqual([], list(downsample.MinMaxDownsample([], 3)))
+
+  def testKeepsAtMostMaxPoints(self):
+    values = np.sin(np.arange(1000) / 10.0)
+    for max_points in [1, 2, 3, 4, 5, 10, 99, 100, 999]:
+      indices = downsample.MinMaxDownsample(values, max_points)
+      self.assertLessEqual(len(indices), max_points)
+      self.assertEqual(sorted(set(indices)), list(indices))
+      self.assertEqual(999, indices[-1])
+      if max_points > 1:
+        self.assertEqual(0, indices[0])
+
+  def testKeepsExtremes(self):
+    values = np.zeros(1000)
+    values[123] = 10.0
+    values[456] = -10.0
+    values[789] = 5.0
+    indices = downsample.MinMaxDownsample(values, 10)
+    self.assertIn(123, indices)
+    self.assertIn(456, indices)
+    self.assertIn(789, indices)
+
+  def testRaisesOnInvalidMaxPoints(self):
+    with self.assertRaises(ValueError):
+      downsample.MinMaxDownsample([1.0, 2.0], 0)
+
+
+if __name__ == '__main__':
+  googletest.main()
@@ -0,0 +1,132 @@
+"""A module for serving large graphs one name scope at a time.
+
+Sending a whole `GraphDef` to the browser is slow for large graphs: the text
+format can take hundreds of megabytes, and the browser must parse all of it
+before it can show anything. A GraphIndex instead summarizes the graph one
+name scope at a time, with the name scopes inside it collapsed, so that the
+browser only fetches the scopes that the user opens.
+
+A node and a name scope can have the same name, as a variable `w` and the
+scope of its `w/read` and `w/Assign` ops do. The index therefore refers to
+the scopes by their name followed by a '/', like `w/`.
+"""
+
+import bisect
+import collections
+
+
+class GraphIndex(object):
+  """Summarizes the name scopes of a `GraphDef`.
+
+  The index is built once per graph, and is not changed afterwards, so it can
+  be shared by threads.
+  """
+
+  def __init__(self, graph_def):
+    """Indexes the nodes of `graph_def`.
+
+    Args:
+      graph_def: A `GraphDef` protocol buffer.
+    """
+    self._nodes = dict((node.name, node) for node in graph_def.node)
+    self._names = sorted(self._nodes)
+    # The number of nodes inside each name scope, at any depth.
+    self._scope_sizes = collections.defaultdict(int)
+    for name in self._names:
+      slash = name.find('/')
+      while slash != -1:
+        self._scope_sizes[name[:slash]] += 1
+        slash = name.find('/', slash + 1)
+
+  def Scope(self, prefix=''):
+    """Summarizes the name scope `prefix`, with its inner scopes collapsed.
+
+    Args:
+      prefix: The name scope to summarize, with or without its trailing '/',
+        or '' for the whole graph.
+
+    Raises:
+      KeyError: If there is no name scope `prefix`.
+
+    Returns:
+      A dict that can be serialized as JSON, with the keys:
+        prefix: The name of the scope followed by a '/', or ''.
+        nodes: A list of `{name, op, inputs, device}` dicts, for the nodes
+          directly in the scope. `inputs` lists the inputs of the node as in
+          the `GraphDef`.
+        scopes: A list of `{name, numNodes}` dicts, for the name scopes
+          directly in the scope, and the number of nodes inside each of them.
+          Their names end with a '/'.
+        edges: A sorted list of `[source, destination]` pairs, one for each
+          pair of nodes or scopes in `prefix` with a data edge between them,
+          or between nodes inside them. Edges into `prefix` are included, and
+          start at the outside node or scope with the same depth as the nodes
+          and scopes in `prefix`. Edges out of `prefix` are listed by the
+          scopes that contain their destinations.
+        controlEdges: The same as `edges`, for control edges.
+    """
+    if prefix.endswith('/'):
+      prefix = prefix[:-1]
+    if prefix and prefix not in self._scope_sizes:
+      raise KeyError('No name scope %s' % prefix)
+    scope_prefix = prefix + '/' if prefix else ''
+    # The number of name components of the nodes and scopes in the scope.
+    depth = scope_prefix.count('/') + 1
+    # The nodes in the scope are the names in [scope_prefix, scope_prefix + 1)
+    # where the last '/' of scope_prefix is incremented to '0'.
+    start = bisect.bisect_left(self._names, scope_prefix)
+    end = (bisect.bisect_left(self._names, prefix + '0', start)
+           if prefix else len(self._names))
+
+    nodes = []
+    scopes = []
+    edges = set()
+    control_edges = set()
+    for name in self._names[start:end]:
+      node = self._nodes[name]
+      child = _Ancestor(name, depth)
+      if child == name:
+        nodes.append({'name': name, 'op': node.op,
+                      'inputs': list(node.input), 'device': node.device})
+      elif not scopes or scopes[-1]['name'] != child:
+        scopes.append({'name': child,
+                       'numNodes': self._scope_sizes[child[:-1]]})
+      for input_name in node.input:
+        source = _Ancestor(_NodeName(input_name), depth)
+        if source != child:
+          if input_name.startswith('^'):
+            control_edges.add((source, child))
+          else:
+            edges.add((source, child))
+    return {'prefix': scope_prefix,
+            'nodes': nodes,
+            'scopes': scopes,
+            'edges': [list(edge) for edge in sorted(edges)],
+            'controlEdges': [list(edge) for edge in sorted(control_edges)]}
+
+
+def _NodeName(input_name):
+  """Returns the name of the node of an input, like '^a/b' or 'a/b:1'."""
+  if input_name.startswith('^'):
+    input_name = input_name[1:]
+  colon = input_name.rfind(':')
+  if colon != -1 and input_name[colon + 1:].isdigit():
+    input_name = input_name[:colon]
+  return input_name
+
+
+def _Ancestor(name, depth):
+  """Returns the node or scope that is the first `depth` components of `name`.
+
+  Args:
+    name: The name of a node.
+    depth: The number of name components to keep.
+
+  Returns:
+    `name` if it has at most `depth` components, and otherwise the name of
+    its scope with `depth` components, followed by a '/'.
+  """
+  components = name.split('/', depth)
+  if len(components) > depth:
+    return '/'.join(components[:depth]) + '/'
+  return name
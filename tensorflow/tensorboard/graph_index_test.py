@@ -0,0 +1,88 @@
+import tensorflow.python.platform
+
+from google.protobuf import text_format
+from tensorflow.core.framework import graph_pb2
+from tensorflow.python.platform import googletest
+from tensorflow.tensorboard import graph_index
+
+_GRAPH = """
+node { name: 'x' op: 'Placeholder' }
+node { name: 'a/b/c' op: 'MatMul' input: 'x' device: '/cpu:0' }
+node { name: 'a/b/d' op: 'Split' input: 'a/b/c:1' input: '^a/e' }
+node { name: 'a/e' op: 'Identity' input: 'x' }
+node { name: 'a/b-f' op: 'Const' }
+node { name: 'y' op: 'Add' input: 'a/b/d' input: '^a/e' }
+"""
+
+
+class GraphIndexTest(googletest.TestCase):
+
+  def setUp(self):
+    graph_def = graph_pb2.GraphDef()
+    text_format.Merge(_GRAPH, graph_def)
+    self.index = graph_index.GraphIndex(graph_def)
+
+  def testRoot(self):
+    self.assertEqual({
+        'prefix': '',
+        'nodes': [
+            {'name': 'x', 'op': 'Placeholder', 'inputs': [], 'device': ''},
+            {'name': 'y', 'op': 'Add', 'inputs': ['a/b/d', '^a/e'],
+             'device': ''}],
+        'scopes': [{'name': 'a/', 'numNodes': 4}],
+        'edges': [['a/', 'y'], ['x', 'a/']],
+        'controlEdges': [['a/', 'y']]}, self.index.Scope())
+
+  def testScope(self):
+    scope = self.index.Scope('a')
+    self.assertEqual('a/', scope['prefix'])
+    self.assertEqual(['a/b-f', 'a/e'],
+                     [node['name'] for node in scope['nodes']])
+    self.assertEqual([{'name': 'a/b/', 'numNodes': 2}], scope['scopes'])
+    self.assertEqual([['x', 'a/b/'], ['x', 'a/e']], scope['edges'])
+    self.assertEqual([['a/e', 'a/b/']], scope['controlEdges'])
+    # The names of scopes can be passed back as prefixes.
+    self.assertEqual(scope, self.index.Scope('a/'))
+
+  def testInnermostScope(self):
+    scope = self.index.Scope('a/b/')
+    self.assertEqual([
+        {'name': 'a/b/c', 'op': 'MatMul', 'inputs': ['x'], 'device': '/cpu:0'},
+        {'name': 'a/b/d', 'op': 'Split', 'inputs': ['a/b/c:1', '^a/e'],
+         'device': ''}], scope['nodes'])
+    self.assertEqual([], scope['scopes'])
+    self.assertEqual([['a/b/c', 'a/b/d'], ['x', 'a/b/c']], scope['edges'])
+    self.assertEqual([['a/e', 'a/b/d']], scope['controlEdges'])
+
+  def testNodeWithTheNameOfAScope(self):
+    graph_def = graph_pb2.GraphDef()
+    text_format.Merge("""
+        node { name: 'x' op: 'Placeholder' }
+        node { name: 'w' op: 'Variable' }
+        node { name: 'w/initial_value' op: 'Const' }
+        node { name: 'w/Assign' op: 'Assign'
+               input: 'w' input: 'w/initial_value' }
+        node { name: 'w/read' op: 'Identity' input: 'w' }
+        node { name: 'mm' op: 'MatMul' input: 'x' input: 'w/read' }
+        """, graph_def)
+    index = graph_index.GraphIndex(graph_def)
+
+    root = index.Scope()
+    self.assertEqual(['mm', 'w', 'x'], [node['name'] for node in root['nodes']])
+    self.assertEqual([{'name': 'w/', 'numNodes': 3}], root['scopes'])
+    self.assertEqual([['w', 'w/'], ['w/', 'mm'], ['x', 'mm']], root['edges'])
+
+    scope = index.Scope('w')
+    self.assertEqual(['w/Assign', 'w/initial_value', 'w/read'],
+                     [node['name'] for node in scope['nodes']])
+    self.assertEqual([['w', 'w/Assign'], ['w', 'w/read'],
+                      ['w/initial_value', 'w/Assign']], scope['edges'])
+
+  def testMissingScope(self):
+    for prefix in ['b', 'x', 'a/b/c']:
+      with self.assertRaises(KeyError):
+        self.index.Scope(prefix)
+
+
+if __name__ == '__main__':
+  googletest.main()
@@ -43,6 +43,13 @@ flags.DEFINE_string('host', '0.0.0.0', 'What host to listen to. Defaults to '
                     'allowing remote access, set to 127.0.0.1 to serve only on '
                     'localhost.')
 flags.DEFINE_integer('port', 6006, 'What port to serve TensorBoard on.')
+flags.DEFINE_string('cache_dir', None, 'A directory in which to cache the '
+                    'data loaded from each run, so that TensorBoard can '
+                    'resume loading where it left off when it is restarted.')
+flags.DEFINE_boolean('inotify', False, 'Whether to use inotify to find out '
+                     'which log directories changed, rather than checking '
+                     'their modification times. Only use this if the logdir '
+                     'is on a local disk.')
 
 FLAGS = flags.FLAGS
 
@@ -97,6 +104,9 @@ class ThreadedHTTPServer(SocketServer.ThreadingMixIn,
 
 
 def main(unused_argv=None):
+  # Resolve the cache directory before changing the working directory.
+  cache_dir = os.path.abspath(FLAGS.cache_dir) if FLAGS.cache_dir else None
+
   # Change current working directory to tensorflow/'s parent directory.
   server_root = os.path.join(os.path.dirname(__file__),
                              os.pardir, os.pardir)
@@ -116,12 +126,14 @@ def main(unused_argv=None):
   path_to_run = ParseEventFilesFlag(FLAGS.logdir)
   multiplexer = event_multiplexer.AutoloadingMultiplexer(
       path_to_run=path_to_run, interval_secs=60,
-      size_guidance=TENSORBOARD_SIZE_GUIDANCE)
+      size_guidance=TENSORBOARD_SIZE_GUIDANCE, cache_dir=cache_dir,
+      use_inotify=FLAGS.inotify)
 
   multiplexer.AutoUpdate(interval=30)
 
   factory = functools.partial(tensorboard_handler.TensorboardHandler,
-                              multiplexer)
+                              multiplexer,
+                              tensorboard_handler.ResponseCache())
   try:
     server = ThreadedHTTPServer((FLAGS.host, FLAGS.port), factory)
   except socket.error:
@@ -6,23 +6,29 @@ about loaded events.
 """
 
 import BaseHTTPServer
+import collections
 import csv
 import gzip
+import hashlib
 import imghdr
 import json
 import mimetypes
 import os
 import StringIO
+import threading
 import urllib
 import urlparse
 
 from google.protobuf import text_format
+import numpy as np
 import tensorflow.python.platform
 
 from tensorflow.python.platform import logging
 from tensorflow.python.platform import resource_loader
 from tensorflow.python.summary import event_accumulator
+from tensorflow.tensorboard import downsample
 from tensorflow.tensorboard import float_wrapper
+from tensorflow.tensorboard import graph_index
 
 RUNS_ROUTE = '/runs'
 SCALARS_ROUTE = '/' + event_accumulator.SCALARS
@@ -41,11 +47,97 @@ _IMGHDR_TO_MIMETYPE = {
 _DEFAULT_IMAGE_MIMETYPE = 'application/octet-stream'
 
 
+# The routes whose responses are cached, because dashboards poll them, or
+# because they are expensive to compute.
+_CACHED_ROUTES = frozenset([RUNS_ROUTE, SCALARS_ROUTE,
+                            COMPRESSED_HISTOGRAMS_ROUTE, GRAPH_ROUTE])
+
+# The default maximum number of responses that a ResponseCache holds.
+DEFAULT_RESPONSE_CACHE_SIZE = 1000
+
+# A response that is ready to send, with a gzipped body.
+_Response = collections.namedtuple('_Response',
+                                   ['content_type', 'etag', 'gzipped_content'])
+
+
+def _gzip(content):
+  """Returns `content` compressed with gzip."""
+  out = StringIO.StringIO()
+  f = gzip.GzipFile(fileobj=out, mode='w')
+  f.write(content)
+  f.close()
+  return out.getvalue()
+
+
+def _gunzip(gzipped_content):
+  """Returns the decompressed `gzipped_content`."""
+  return gzip.GzipFile(fileobj=StringIO.StringIO(gzipped_content)).read()
+
+
+class ResponseCache(object):
+  """A thread-safe, least recently used cache of responses.
+
+  Each response is stored with the generation of the data it was computed
+  from (see `EventMultiplexer.Generation`), and is only returned for requests
+  made while the data still has that generation. Graph responses use
+  `EventMultiplexer.GraphGeneration` instead, so that they are only computed
+  again when the graph changes. The cache also holds the `GraphIndex` of each
+  graph, which responses are computed from.
+  """
+
+  def __init__(self, max_size=DEFAULT_RESPONSE_CACHE_SIZE):
+    """Creates a `ResponseCache` that holds up to `max_size` responses."""
+    self._max_size = max_size
+    self._lock = threading.Lock()
+    # Maps a request key to a (generation, _Response) pair, in order of use.
+    self._responses = collections.OrderedDict()
+
+  def Get(self, key, generation):
+    """Returns the response for `key` at `generation`, or None."""
+    with self._lock:
+      entry = self._responses.pop(key, None)
+      if entry is None:
+        return None
+      if entry[0] != generation:
+        # The data has changed, so the response will never be used again.
+        return None
+      self._responses[key] = entry
+      return entry[1]
+
+  def Put(self, key, generation, response):
+    """Stores the response for `key` at `generation`."""
+    with self._lock:
+      self._responses.pop(key, None)
+      self._responses[key] = (generation, response)
+      while len(self._responses) > self._max_size:
+        self._responses.popitem(last=False)
+
+
 def _content_type_for_image(encoded_image_string):
   image_type = imghdr.what(None, encoded_image_string)
   return _IMGHDR_TO_MIMETYPE.get(image_type, _DEFAULT_IMAGE_MIMETYPE)
 
 
+def _int_param(query_params, name):
+  """Returns the integer query parameter `name`, or None if it is absent.
+
+  Args:
+    query_params: The query parameters as a dict.
+    name: The name of the parameter.
+
+  Raises:
+    ValueError: If the parameter is not an integer.
+  """
+  value = query_params.get(name)
+  if value is None:
+    return None
+  try:
+    return int(value)
+  except ValueError:
+    raise ValueError('query parameter %s should be an integer, was %r' %
+                     (name, value))
+
+
 class _OutputFormat(object):
   """An enum used to list the valid output formats for API calls.
 
@@ -63,8 +155,11 @@ class TensorboardHandler(BaseHTTPServer.BaseHTTPRequestHandler):
   as well as serving files off disk.
   """
 
-  def __init__(self, multiplexer, *args):
+  def __init__(self, multiplexer, response_cache, *args):
     self._multiplexer = multiplexer
+    self._response_cache = response_cache
+    # The (key, generation) under which to cache this request's response.
+    self._response_cache_entry = None
     BaseHTTPServer.BaseHTTPRequestHandler.__init__(self, *args)
 
   # We use underscore_names for consistency with inherited methods.
@@ -112,27 +207,67 @@ class TensorboardHandler(BaseHTTPServer.BaseHTTPRequestHandler):
     prefix = os.path.commonprefix([base, absolute_path])
     return prefix == base
 
-  def _send_gzip_response(self, content, content_type, code=200):
-    """Writes the given content as gzip response using the given content type.
+  def _send_content(self, content, content_type, code=200, cacheable=False):
+    """Writes out the given content using the given HTTP status code.
+
+    Successful responses to the routes in `_CACHED_ROUTES` are also stored in
+    the response cache.
 
     Args:
-      content: The content to respond with.
+      content: A string containing the body of the response.
       content_type: The mime type of the content.
       code: The numeric HTTP status code to use.
+      cacheable: If True, the response is sent as by `_send_response`, with an
+        ETag, even if it is not stored in the response cache.
     """
-    out = StringIO.StringIO()
-    f = gzip.GzipFile(fileobj=out, mode='w')
-    f.write(content)
-    f.close()
-    gzip_content = out.getvalue()
+    if code == 200 and (cacheable or self._response_cache_entry):
+      response = _Response(content_type=content_type,
+                           etag='"%s"' % hashlib.md5(content).hexdigest(),
+                           gzipped_content=_gzip(content))
+      if self._response_cache_entry:
+        key, generation = self._response_cache_entry
+        self._response_cache.Put(key, generation, response)
+      self._send_response(response)
+      return
+
     self.send_response(code)
     self.send_header('Content-Type', content_type)
-    self.send_header('Content-Length', len(gzip_content))
-    self.send_header('Content-Encoding', 'gzip')
+    self.send_header('Content-Length', len(content))
     self.end_headers()
-    self.wfile.write(gzip_content)
+    self.wfile.write(content)
+
+  def _send_response(self, response):
+    """Writes out a `_Response`.
 
-  def _send_json_response(self, obj, code=200):
+    If the request's If-None-Match header lists the response's ETag, a 304
+    response without a body is sent instead. The body is sent gzipped, unless
+    the client does not accept gzip.
+
+    Args:
+      response: The `_Response` to send.
+    """
+    if_none_match = self.headers.get('If-None-Match')
+    if if_none_match and (if_none_match.strip() == '*' or response.etag in [
+        t.strip() for t in if_none_match.split(',')]):
+      self.send_response(304)
+      self.send_header('ETag', response.etag)
+      self.end_headers()
+      return
+
+    self.send_response(200)
+    self.send_header('Content-Type', response.content_type)
+    self.send_header('ETag', response.etag)
+    if 'gzip' in self.headers.get('Accept-Encoding', ''):
+      content = response.gzipped_content
+      self.send_header('Content-Encoding', 'gzip')
+    else:
+      content = _gunzip(response.gzipped_content)
+    self.send_header('Content-Length', len(content))
+    self.end_headers()
+    self.wfile.write(content)
+
+  def _send_json_response(self, obj, code=200, wrap_special_floats=True,
+                          cacheable=False):
     """Writes out the given object as JSON using the given HTTP status code.
 
     This also replaces special float values with stringified versions.
@@ -140,17 +275,17 @@ class TensorboardHandler(BaseHTTPServer.BaseHTTPRequestHandler):
     Args:
       obj: The object to respond with.
       code: The numeric HTTP status code to use.
+      wrap_special_floats: Whether to replace special float values. Callers
+        that know that `obj` has none can pass False to skip the work.
+      cacheable: Whether to support conditional requests, see `_send_content`.
     """
 
-    output = json.dumps(float_wrapper.WrapSpecialFloats(obj))
+    if wrap_special_floats:
+      obj = float_wrapper.WrapSpecialFloats(obj)
+    output = json.dumps(obj)
+    self._send_content(output, 'application/json', code, cacheable)
 
-    self.send_response(code)
-    self.send_header('Content-Type', 'application/json')
-    self.send_header('Content-Length', len(output))
-    self.end_headers()
-    self.wfile.write(output)
-
-  def _send_csv_response(self, serialized_csv, code=200):
+  def _send_csv_response(self, serialized_csv, code=200, cacheable=False):
     """Writes out the given string, which represents CSV data.
 
     Unlike _send_json_response, this does *not* perform the CSV serialization
@@ -159,47 +294,135 @@ class TensorboardHandler(BaseHTTPServer.BaseHTTPRequestHandler):
     Args:
       serialized_csv: A string containing some CSV data.
       code: The numeric HTTP status code to use.
+      cacheable: Whether to support conditional requests, see `_send_content`.
     """
-
-    self.send_response(code)
-    self.send_header('Content-Type', 'text/csv')
-    self.send_header('Content-Length', len(serialized_csv))
-    self.end_headers()
-    self.wfile.write(serialized_csv)
+    self._send_content(serialized_csv, 'text/csv', code, cacheable)
 
   def _serve_scalars(self, query_params):
-    """Given a tag and single run, return array of ScalarEvents."""
+    """Given a tag and single run, return array of ScalarEvents.
+
+    The response can be narrowed with the optional query parameters:
+
+    * `min_step` and `max_step`: only include the values at steps in this
+      (inclusive) range.
+    * `since_step`: only include the values at steps after this one, so that
+      clients can fetch just the values added since they last polled.
+    * `max_points`: downsample the values to at most this many, keeping the
+      extremes (see `downsample.MinMaxDownsample`).
+
+    Responses have an ETag, so clients that poll with If-None-Match receive a
+    304 when nothing has changed.
+
+    Args:
+      query_params: The query parameters as a dict.
+    """
     # TODO(cassandrax): return HTTP status code for malformed requests
     tag = query_params.get('tag')
     run = query_params.get('run')
-    values = self._multiplexer.Scalars(run, tag)
+    try:
+      min_step, max_step, since_step, max_points = [
+          _int_param(query_params, name)
+          for name in ['min_step', 'max_step', 'since_step', 'max_points']]
+    except ValueError as e:
+      self.send_error(400, str(e))
+      return
+    if max_points is not None and max_points < 1:
+      self.send_error(400, 'query parameter max_points must be at least 1')
+      return
+
+    events = self._multiplexer.Scalars(run, tag)
+    if isinstance(events, event_accumulator.ScalarEvents):
+      # Read the columns directly, which is much faster than building a
+      # ScalarEvent for each value. Scalars() returns a snapshot, so reloads
+      # do not change the columns while they are read.
+      wall_times, steps, values = events.wall_times, events.steps, events.values
+    else:
+      wall_times = np.array([e.wall_time for e in events], dtype=np.float64)
+      steps = np.array([e.step for e in events], dtype=np.int64)
+      values = np.array([e.value for e in events], dtype=np.float64)
+
+    keep = np.ones(len(steps), dtype=bool)
+    if min_step is not None:
+      keep &= steps >= min_step
+    if max_step is not None:
+      keep &= steps <= max_step
+    if since_step is not None:
+      keep &= steps > since_step
+    indices = np.flatnonzero(keep)
+    if max_points is not None and len(indices) > max_points:
+      indices = indices[downsample.MinMaxDownsample(values[indices],
+                                                    max_points)]
+    wall_times = wall_times[indices]
+    steps = steps[indices]
+    values = values[indices]
+    rows = zip(wall_times.tolist(), steps.tolist(), values.tolist())
 
     if query_params.get('format') == _OutputFormat.CSV:
       string_io = StringIO.StringIO()
       writer = csv.writer(string_io)
       writer.writerow(['Wall time', 'Step', 'Value'])
-      writer.writerows(values)
-      self._send_csv_response(string_io.getvalue())
+      writer.writerows(rows)
+      self._send_csv_response(string_io.getvalue(), cacheable=True)
     else:
-      self._send_json_response(values)
+      has_special_floats = not (np.isfinite(wall_times).all() and
+                                np.isfinite(values).all())
+      self._send_json_response(rows, wrap_special_floats=has_special_floats,
+                               cacheable=True)
 
   def _serve_graph(self, query_params):
-    """Given a single run, return the graph definition in json format."""
+    """Given a single run, return the graph definition.
+
+    The optional `format` query parameter selects the format of the response:
+
+    * `pbtxt` (the default): the `GraphDef` in text format.
+    * `proto`: the serialized `GraphDef`, which is much smaller and faster to
+      parse.
+    * `scopes`: the JSON summary of one name scope, with the scopes inside it
+      collapsed, as returned by `GraphIndex.Scope`. The optional `prefix`
+      query parameter names the scope, which defaults to the whole graph.
+
+    Responses are cached until the graph of the run changes.
+    """
     run = query_params.get('run', None)
     if run is None:
       self.send_error(400, 'query parameter "run" is required')
       return
+    graph_format = query_params.get('format', 'pbtxt')
+    if graph_format not in ('pbtxt', 'proto', 'scopes'):
+      self.send_error(400, 'unknown graph format %s' % graph_format)
+      return
 
     try:
       graph = self._multiplexer.Graph(run)
-    except ValueError:
-      self.send_response(404)
+    except (KeyError, ValueError):
+      self.send_error(404, 'no graph for run %s' % run)
       return
 
-    # Serialize the graph to pbtxt format.
-    graph_pbtxt = text_format.MessageToString(graph)
-    # Gzip it and send it to the user.
-    self._send_gzip_response(graph_pbtxt, 'text/plain')
+    if graph_format == 'pbtxt':
+      self._send_content(text_format.MessageToString(graph), 'text/plain')
+    elif graph_format == 'proto':
+      self._send_content(graph.SerializeToString(),
+                         'application/octet-stream')
+    else:
+      index = self._graph_index(run)
+      prefix = query_params.get('prefix', '')
+      try:
+        scope = index.Scope(prefix)
+      except KeyError:
+        self.send_error(404, 'no name scope %s in the graph' % prefix)
+        return
+      self._send_json_response(scope, wrap_special_floats=False)
+
+  def _graph_index(self, run):
+    """Returns the `GraphIndex` of the graph of `run`, which must have one."""
+    key = (GRAPH_ROUTE, run)
+    # Get the generation first, so that the index is at least as recent.
+    generation = self._multiplexer.GraphGeneration(run)
+    index = self._response_cache.Get(key, generation)
+    if index is None:
+      index = graph_index.GraphIndex(self._multiplexer.Graph(run))
+      self._response_cache.Put(key, generation, index)
+    return index
 
   def _serve_histograms(self, query_params):
     """Given a tag and single run, return an array of histogram values."""
@@ -374,6 +597,27 @@ class TensorboardHandler(BaseHTTPServer.BaseHTTPRequestHandler):
           return
 
         query_params[key] = query_params[key][0]
+
+      if clean_path in _CACHED_ROUTES:
+        try:
+          if clean_path == GRAPH_ROUTE:
+            # Graphs are expensive to serve, and rarely change, so they are
+            # not computed again whenever new summaries are loaded.
+            generation = self._multiplexer.GraphGeneration(
+                query_params.get('run'))
+          else:
+            generation = self._multiplexer.Generation(query_params.get('run'),
+                                                      query_params.get('tag'))
+        except KeyError:
+          # Let the handler report the unknown run.
+          generation = None
+        if generation is not None:
+          key = (clean_path, tuple(sorted(query_params.items())))
+          response = self._response_cache.Get(key, generation)
+          if response is not None:
+            self._send_response(response)
+            return
+          self._response_cache_entry = (key, generation)
       handlers[clean_path](query_params)
     else:
       self._serve_static_file(clean_path)
@@ -0,0 +1,137 @@
+import BaseHTTPServer
+import functools
+import httplib
+import json
+import threading
+
+import tensorflow.python.platform
+
+from google.protobuf import text_format
+from tensorflow.core.framework import graph_pb2
+from tensorflow.python.platform import googletest
+from tensorflow.tensorboard import tensorboard_handler
+
+_GRAPH = """
+node { name: 'x' op: 'Placeholder' }
+node { name: 'w' op: 'Variable' }
+node { name: 'w/read' op: 'Identity' input: 'w' }
+node { name: 'mm' op: 'MatMul' input: 'x' input: 'w/read' }
+"""
+
+
+class _FakeMultiplexer(object):
+  """Serves the graph of 'run1'. 'run2' has no graph."""
+
+  def __init__(self, graph_def):
+    self.graph_def = graph_def
+    self.generation = 1
+    self.graph_generation = 1
+    self.graph_calls = 0
+
+  def _CheckRun(self, run):
+    if run not in ('run1', 'run2'):
+      raise KeyError(run)
+
+  def Generation(self, run=None, tag=None):
+    # pylint: disable=unused-argument
+    if run is not None:
+      self._CheckRun(run)
+    return self.generation
+
+  def GraphGeneration(self, run):
+    self._CheckRun(run)
+    return self.graph_generation if run == 'run1' else 0
+
+  def Graph(self, run):
+    self._CheckRun(run)
+    if run != 'run1':
+      raise ValueError('No graph')
+    self.graph_calls += 1
+    return self.graph_def
+
+
+class TensorboardHandlerGraphTest(googletest.TestCase):
+
+  def setUp(self):
+    self._graph_def = graph_pb2.GraphDef()
+    text_format.Merge(_GRAPH, self._graph_def)
+    self._multiplexer = _FakeMultiplexer(self._graph_def)
+    factory = functools.partial(tensorboard_handler.TensorboardHandler,
+                                self._multiplexer,
+                                tensorboard_handler.ResponseCache())
+    self._server = BaseHTTPServer.HTTPServer(('localhost', 0), factory)
+    self._server_thread = threading.Thread(target=self._server.serve_forever)
+    self._server_thread.daemon = True
+    self._server_thread.start()
+
+  def tearDown(self):
+    self._server.shutdown()
+    self._server.server_close()
+
+  def _Get(self, path):
+    """Returns the status and body of the response to a GET of `path`."""
+    connection = httplib.HTTPConnection('localhost',
+                                        self._server.server_address[1])
+    try:
+      connection.request('GET', path)
+      response = connection.getresponse()
+      return response.status, response.read()
+    finally:
+      connection.close()
+
+  def testPbtxt(self):
+    status, body = self._Get('/graph?run=run1')
+    self.assertEqual(200, status)
+    graph_def = graph_pb2.GraphDef()
+    text_format.Merge(body, graph_def)
+    self.assertEqual(self._graph_def, graph_def)
+    self.assertEqual((200, body), self._Get('/graph?run=run1&format=pbtxt'))
+
+  def testProto(self):
+    status, body = self._Get('/graph?run=run1&format=proto')
+    self.assertEqual(200, status)
+    graph_def = graph_pb2.GraphDef()
+    graph_def.ParseFromString(body)
+    self.assertEqual(self._graph_def, graph_def)
+
+  def testScopes(self):
+    status, body = self._Get('/graph?run=run1&format=scopes')
+    self.assertEqual(200, status)
+    root = json.loads(body)
+    self.assertEqual(['mm', 'w', 'x'], [node['name'] for node in root['nodes']])
+    self.assertEqual([{'name': 'w/', 'numNodes': 1}], root['scopes'])
+
+    status, body = self._Get('/graph?run=run1&format=scopes&prefix=w/')
+    self.assertEqual(200, status)
+    self.assertEqual(['w/read'],
+                     [node['name'] for node in json.loads(body)['nodes']])
+
+    status, _ = self._Get('/graph?run=run1&format=scopes&prefix=nope')
+    self.assertEqual(404, status)
+
+  def testErrors(self):
+    self.assertEqual(400, self._Get('/graph')[0])
+    self.assertEqual(400, self._Get('/graph?run=run1&format=xml')[0])
+    self.assertEqual(404, self._Get('/graph?run=run2')[0])
+    self.assertEqual(404, self._Get('/graph?run=run3&format=scopes')[0])
+
+  def testCachedUntilTheGraphChanges(self):
+    paths = ['/graph?run=run1', '/graph?run=run1&format=proto',
+             '/graph?run=run1&format=scopes']
+    responses = [self._Get(path) for path in paths]
+    graph_calls = self._multiplexer.graph_calls
+    # New summaries do not change the graph.
+    self._multiplexer.generation += 1
+    self.assertEqual(responses, [self._Get(path) for path in paths])
+    self.assertEqual(graph_calls, self._multiplexer.graph_calls)
+
+    self._multiplexer.graph_def.node.add(name='y', op='Identity', input=['mm'])
+    self._multiplexer.graph_generation += 1
+    status, body = self._Get('/graph?run=run1&format=scopes')
+    self.assertEqual(200, status)
+    self.assertIn('y', [node['name'] for node in json.loads(body)['nodes']])
+    self.assertGreater(self._multiplexer.graph_calls, graph_calls)
+
+
+if __name__ == '__main__':
+  googletest.main()